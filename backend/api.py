@@ -1,13 +1,48 @@
-from fastapi import FastAPI, HTTPException
+import time
+_INICIO_IMPORTACOES = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from typing import List, Optional
+import gc
 import json
 import os
+import threading
 from grafo_predios import GrafoPredios
+from pathfinding_interno import calcular_rota_completa
+from registro_grafos import registro_grafos
+from roteador_campus import RoteadorCampus
+from respostas_estaticas import RespostaPreSerializada
+from info_predios import info_predios
+from indice_busca import construir_indice
+from metricas import MiddlewareMetricas, ler_memoria_processo, registrar_cache, registro_metricas
+from inicializacao import Inicializacao
 from chatbot import chatbot
+from motor_intencoes import obter_motor
+
+# Startup phases and lazily built components, reported at /api/pronto
+INICIALIZACAO = Inicializacao()
+INICIALIZACAO.registrar_fase("importacoes", time.perf_counter() - _INICIO_IMPORTACOES)
+
+# Preload mode (gunicorn --preload, see gunicorn.conf.py): graphs and search
+# index are built in the master before the workers are forked
+API_PRELOAD = os.getenv("API_PRELOAD", "").lower() in ("1", "true", "sim", "yes")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build graphs, search index and model client in the background; the
+    # server accepts requests right away and /api/pronto reports readiness
+    INICIALIZACAO.aquecer_em_segundo_plano()
+    yield
+
+app = FastAPI(title="Campus Guide API", lifespan=lifespan)
 
-app = FastAPI(title="Campus Guide API")
+# Request count and latency per route, exported at /metrics
+app.add_middleware(MiddlewareMetricas)
 
 # CORS configuration to allow frontend to access backend
 app.add_middleware(
@@ -42,23 +77,104 @@ def carregar_geojson():
     except FileNotFoundError:
         return {"type": "FeatureCollection", "features": []}
 
-MAPAS_DATA = carregar_mapas()
-GEOJSON_DATA = carregar_geojson()
+with INICIALIZACAO.medir("mapas"):
+    MAPAS_DATA = carregar_mapas()
 
 # Load building graph
+SNAPSHOT_GRAFO_PREDIOS = "dados/grafo_predios.snap"
+DISTANCIA_CONEXAO_PREDIOS = 250.0
+
 def carregar_grafo_predios():
     try:
         grafo = GrafoPredios()
+        
+        # Snapshot built from the current GeoJSON: memory-mapped, no rebuild
+        if grafo.carregar_snapshot(SNAPSHOT_GRAFO_PREDIOS, "dados/campus.geojson",
+                                   DISTANCIA_CONEXAO_PREDIOS):
+            return grafo
+        
         grafo.carregar_geojson("dados/campus.geojson")
-        grafo.criar_conexoes_automaticas(distancia_maxima=250.0)
+        grafo.criar_conexoes_automaticas(distancia_maxima=DISTANCIA_CONEXAO_PREDIOS)
+        
+        try:
+            grafo.salvar_snapshot(SNAPSHOT_GRAFO_PREDIOS)
+        except OSError as e:
+            print(f"⚠️ Could not write building graph snapshot: {e}")
         return grafo
     except Exception as e:
         print(f"Error loading graph: {e}")
         return None
 
-GRAFO_PREDIOS = carregar_grafo_predios()
+# Serialized once; the endpoints only pick the encoding and check the ETag
+with INICIALIZACAO.medir("respostas_estaticas"):
+    MAPAS_RESPOSTA = RespostaPreSerializada(MAPAS_DATA)
+# Only the serialized bytes are kept: the parsed GeoJSON is not used elsewhere
+with INICIALIZACAO.medir("geojson"):
+    GEOJSON_RESPOSTA = RespostaPreSerializada(carregar_geojson())
+
+# Built on first use or by the background warm-up, in this order
+COMPONENTE_GRAFO_PREDIOS = INICIALIZACAO.componente("grafo_predios", carregar_grafo_predios)
+COMPONENTE_GRAFOS_INTERNOS = INICIALIZACAO.componente("grafos_internos", registro_grafos.aquecer)
+# Version of predios_info.json the current search index was built from
+_versao_info_indice = None
+_lock_reindexacao = threading.Lock()
+
+def construir_indice_busca():
+    global _versao_info_indice
+    # Read before the data: a reload in between only causes one extra rebuild
+    versao = info_predios.versao
+    indice = construir_indice(MAPAS_DATA, info_predios.todos())
+    _versao_info_indice = versao
+    return indice
+
+# Search index over mapas.json, SVG rooms and predios_info.json
+COMPONENTE_INDICE_BUSCA = INICIALIZACAO.componente("indice_busca", construir_indice_busca)
+COMPONENTE_ROTEADOR_CAMPUS = INICIALIZACAO.componente(
+    "roteador_campus", lambda: criar_roteador_campus(), essencial=False
+)
+# Aho-Corasick automaton of building names that answers chat messages
+# before the model
+COMPONENTE_MOTOR_INTENCOES = INICIALIZACAO.componente("motor_intencoes", obter_motor,
+                                                      essencial=False)
+# The Gemini client holds network channels that do not survive a fork:
+# always created in each worker
+COMPONENTE_MODELO_CHAT = INICIALIZACAO.componente("modelo_chat", chatbot.inicializar_modelo,
+                                                  compartilhavel=False, aceita_none=True)
+
+def obter_grafo_predios() -> Optional[GrafoPredios]:
+    return COMPONENTE_GRAFO_PREDIOS.obter()
+
+def obter_roteador_campus() -> Optional[RoteadorCampus]:
+    return COMPONENTE_ROTEADOR_CAMPUS.obter()
+
+def reindexar_busca():
+    """Rebuild the search index after predios_info.json was hot-reloaded"""
+    try:
+        COMPONENTE_INDICE_BUSCA.substituir(construir_indice_busca())
+        print("🔄 Search index rebuilt with the new building information")
+    except Exception as e:
+        print(f"❌ Error rebuilding search index: {e}")
+    finally:
+        _lock_reindexacao.release()
+
+def obter_indice_busca():
+    indice = COMPONENTE_INDICE_BUSCA.obter()
+    # Building information changed: rebuild in the background (one rebuild at
+    # a time) and keep answering with the current index meanwhile
+    if (indice is not None and info_predios.versao != _versao_info_indice
+            and _lock_reindexacao.acquire(blocking=False)):
+        threading.Thread(target=reindexar_busca, name='reindexacao', daemon=True).start()
+    return indice
+
+def exigir_indice_busca():
+    """Search index, or 503 while it is not built (failed builds are retried)"""
+    indice = obter_indice_busca()
+    if indice is None:
+        raise HTTPException(status_code=503, detail="Índice de busca não carregado")
+    return indice
 
-MAPAS_DATA = carregar_mapas()
+registrar_cache("grafos_internos", registro_grafos.estatisticas)
+registrar_cache("intencoes_chat", chatbot.cache.estatisticas)
 
 # Data models
 class PerguntaChat(BaseModel):
@@ -67,11 +183,37 @@ class PerguntaChat(BaseModel):
 
 class BuscaLocal(BaseModel):
     termo: str
+    limite: int = 20
 
 class RotaPrediosRequest(BaseModel):
     origem: str  # Ex: "A", "Building A"
     destino: str  # Ex: "M", "Building M"
 
+class RotaInternaRequest(BaseModel):
+    origem: str  # Ex: "Node_H1_01", "Room_1014"
+    destino: str
+    andar: Optional[str] = "A1"  # None: prédio inteiro, IDs como "A2:Room_2001"
+    predio: str = "A"
+    explicar: bool = False  # Incluir os passos da busca A* (depuração)
+
+class PontoCampus(BaseModel):
+    predio: str  # Ex: "A", "Building M"
+    local: Optional[str] = None  # Ex: "A1:Room_1014"; None: qualquer entrada
+
+class RotaCampusRequest(BaseModel):
+    origem: PontoCampus
+    destino: PontoCampus
+
+class IsocronaRequest(BaseModel):
+    origem: PontoCampus
+    minutos: List[float] = [1, 3, 5, 10]
+
+class RotaLoteRequest(BaseModel):
+    pares: Optional[List[RotaCampusRequest]] = None
+    origem: Optional[PontoCampus] = None  # Um para muitos
+    destinos: Optional[List[PontoCampus]] = None  # None: todos os prédios
+    detalhar: bool = False
+
 # ==================== API ROUTES ====================
 
 @app.get("/")
@@ -83,19 +225,58 @@ def index():
             "predios": "/api/predios",
             "buscar": "/api/buscar",
             "chat": "/api/chat",
-            "rota": "/api/rota"
+            "chat_stream": "/api/chat/stream",
+            "rota": "/api/rota",
+            "rota_interna": "/api/rota-interna",
+            "rota_campus": "/api/rota-campus",
+            "rotas_lote": "/api/rotas-lote",
+            "isocrona": "/api/isocrona",
+            "pronto": "/api/pronto",
+            "memoria": "/api/memoria"
         }
     }
 
+@app.get("/api/pronto")
+def verificar_prontidao():
+    """
+    Readiness: 200 when graphs, search index and model client are built,
+    503 while the background warm-up is still running or an essential
+    component failed to build (listed in "falhas"). The body is the
+    startup report with the time spent in each phase.
+    """
+    relatorio = INICIALIZACAO.relatorio()
+    return JSONResponse(relatorio, status_code=200 if relatorio["pronto"] else 503)
+
+@app.get("/api/memoria")
+def relatorio_memoria():
+    """
+    Memory of the worker that answered (bytes). With several workers each
+    request may hit a different one; "pss" counts pages shared with the
+    other workers proportionally, so summing it over workers gives the
+    real total.
+    """
+    return {
+        "pid": os.getpid(),
+        "pre_carregado": INICIALIZACAO.pre_carregado,
+        "objetos_congelados_gc": gc.get_freeze_count(),
+        "memoria": ler_memoria_processo()
+    }
+
+@app.get("/metrics")
+def exportar_metricas():
+    """Process metrics in the Prometheus text format"""
+    return PlainTextResponse(registro_metricas.exportar(),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/api/mapas")
-def obter_mapas():
-    """Returns all map data"""
-    return MAPAS_DATA
+def obter_mapas(request: Request):
+    """Returns all map data (pre-serialized, gzip/brotli, ETag)"""
+    return MAPAS_RESPOSTA.responder(request)
 
 @app.get("/api/geojson")
-def obter_geojson():
-    """Returns building GeoJSON data"""
-    return GEOJSON_DATA
+def obter_geojson(request: Request):
+    """Returns building GeoJSON data (pre-serialized, gzip/brotli, ETag)"""
+    return GEOJSON_RESPOSTA.responder(request)
 
 @app.get("/api/predios")
 def listar_predios():
@@ -129,111 +310,76 @@ def obter_predio(predio_id: str):
 
 @app.post("/api/buscar")
 def buscar_local(busca: BuscaLocal):
-    """Search locations by name or description"""
-    termo = busca.termo.lower()
-    resultados = []
-    
-    for predio in MAPAS_DATA["campus"]["predios"]:
-        for local in predio["locais"]:
-            if (termo in local["nome"].lower() or 
-                termo in local.get("descricao", "").lower()):
-                resultados.append({
-                    "predio": predio["nome"],
-                    "predio_id": predio["id"],
-                    "local": local["nome"],
-                    "local_id": local["id"],
-                    "tipo": local["tipo"],
-                    "coordenadas": local["coordenadas"]
-                })
+    """Search locations by name or description (ranked, typo tolerant)"""
+    resultados = exigir_indice_busca().buscar(busca.termo, limite=max(1, min(busca.limite, 100)))
     
     return {"resultados": resultados, "total": len(resultados)}
 
-def formatar_info_predio(info):
-    """Format building information in bullet points"""
-    linhas = []
-    
-    # Title
-    linhas.append(f"📍 {info['nome']}")
-    linhas.append("")
-    
-    # Description
-    linhas.append(f"• {info['descricao']}")
-    linhas.append("")
-    
-    # Floors
-    if info.get('andares'):
-        andares_str = ', '.join(map(str, info['andares']))
-        linhas.append(f"• 🏢 Floors: {andares_str}")
-        linhas.append("")
-    
-    # Facilities
-    if info.get('facilidades'):
-        linhas.append("• ✨ Available facilities:")
-        for fac in info['facilidades']:
-            linhas.append(f"  - {fac}")
-        linhas.append("")
-    
-    # Main rooms
-    if info.get('salas_principais') and len(info['salas_principais']) > 0:
-        linhas.append("• 🚪 Main rooms:")
-        for sala in info['salas_principais']:
-            linhas.append(f"  - {sala['numero']}: {sala['tipo']} (Floor {sala['andar']})")
-        linhas.append("")
-    
-    # Operating hours
-    if info.get('horario_funcionamento'):
-        linhas.append(f"• 🕐 Operating hours:")
-        linhas.append(f"  - {info['horario_funcionamento']}")
-    
-    return '\n'.join(linhas)
-
 @app.post("/api/chat")
-def chat_endpoint(pergunta: PerguntaChat):
+async def chat_endpoint(pergunta: PerguntaChat):
     """
     Chatbot endpoint - processes questions and returns responses using Gemini
+    Runs on the event loop: the model call is awaited with a deadline and a
+    concurrency limit, so slow answers don't hold threadpool workers
     """
     mensagem = pergunta.mensagem
     
-    # Use enhanced chatbot with Gemini
-    resultado = chatbot.processar_mensagem(mensagem)
+    # Use enhanced chatbot with Gemini (regex fallback on timeout)
+    resultado = await chatbot.processar_mensagem_async(mensagem)
+    
+    return montar_resposta_chat(resultado)
+
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(pergunta: PerguntaChat):
+    """
+    Streaming chat (Server-Sent Events)
     
+    Events, in order:
+    - intencao: origin/destination from the regex extraction (immediate)
+    - texto: {"delta": ...} pieces of the friendly answer as Gemini writes it
+    - final: same body as /api/chat, with the resolved origem/destino
+    """
+    async def eventos():
+        async for evento, dados in chatbot.processar_mensagem_stream(pergunta.mensagem):
+            if evento == "final":
+                dados = montar_resposta_chat(dados)
+            yield f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def montar_resposta_chat(resultado: dict) -> dict:
+    """Builds the /api/chat response body from the chatbot result"""
     # If it's a building information request
     if resultado.get("tipo") == "info_predio":
         predio_ref = resultado.get("predio_ref")
         
-        # Search for building information
-        import json
-        import os
+        # Search for building information (in-memory, pre-formatted)
+        if not info_predios.carregado:
+            return {
+                "resposta": f"An error occurred while fetching information for building {predio_ref}. Please try again.",
+                "tipo": "erro"
+            }
         
-        caminho_info = os.path.join(os.path.dirname(__file__), "dados", "predios_info.json")
+        encontrado = info_predios.obter(predio_ref)
         
-        try:
-            with open(caminho_info, 'r', encoding='utf-8') as f:
-                predios_info = json.load(f)
+        if encontrado:
+            info, texto = encontrado
             
-            if predio_ref in predios_info:
-                info = predios_info[predio_ref]
-                
-                # Format response in bullet points
-                texto = formatar_info_predio(info)
-                
-                return {
-                    "resposta": texto,
-                    "tipo": "info_predio",
-                    "predio_ref": predio_ref,
-                    "info_completa": info
-                }
-            else:
-                return {
-                    "resposta": f"Sorry, I don't have detailed information about building {predio_ref} at the moment. You can ask me about the location or routes to this building.",
-                    "tipo": "info_predio",
-                    "predio_ref": predio_ref
-                }
-        except Exception as e:
-            print(f"Error loading building information: {e}")
             return {
-                "resposta": f"An error occurred while fetching information for building {predio_ref}. Please try again.",
-                "tipo": "erro"
+                "resposta": texto,
+                "tipo": "info_predio",
+                "predio_ref": predio_ref,
+                "info_completa": info
+            }
+        else:
+            return {
+                "resposta": f"Sorry, I don't have detailed information about building {predio_ref} at the moment. You can ask me about the location or routes to this building.",
+                "tipo": "info_predio",
+                "predio_ref": predio_ref
             }
     
     # Normal navigation response
@@ -244,6 +390,21 @@ def chat_endpoint(pergunta: PerguntaChat):
         "acao": "navegar" if resultado.get("origem") and resultado.get("destino") else None
     }
 
+@app.get("/api/chat/cache")
+def estatisticas_cache_chat():
+    """
+    Retorna os contadores do cache de intenções do chatbot
+    """
+    return chatbot.cache.estatisticas()
+
+@app.get("/api/chat/intencoes")
+def estatisticas_intencoes_chat():
+    """
+    Retorna a fração das mensagens do chat resolvida pelo motor de
+    intenções local, sem chamar o modelo
+    """
+    return obter_motor().estatisticas()
+
 def processar_pergunta_chatbot(mensagem: str):
     """
     Process user questions in a simple way
@@ -307,22 +468,7 @@ Ask me anything about campus locations!""",
 
 def buscar_em_texto(texto: str):
     """Busca menções a locais no texto"""
-    resultados = []
-    
-    for predio in MAPAS_DATA["campus"]["predios"]:
-        for local in predio["locais"]:
-            # Busca pelo nome do local ou número de sala
-            nome_local = local["nome"].lower()
-            if nome_local in texto:
-                resultados.append({
-                    "predio": predio["nome"],
-                    "predio_id": predio["id"],
-                    "local": local["nome"],
-                    "local_id": local["id"],
-                    "coordenadas": local["coordenadas"]
-                })
-    
-    return resultados
+    return exigir_indice_busca().mencoes(texto)
 
 import math
 from typing import List, Dict, Tuple
@@ -576,10 +722,11 @@ def calcular_distancia_caminho(caminho: list) -> float:
     
     return distancia
 
+VELOCIDADE_CAMINHADA_MS = 1.4
+
 def calcular_tempo_estimado(distancia_metros: float) -> str:
     """Calcula tempo estimado em minutos (velocidade média: 1.4 m/s)"""
-    velocidade_ms = 1.4
-    tempo_segundos = distancia_metros / velocidade_ms
+    tempo_segundos = distancia_metros / VELOCIDADE_CAMINHADA_MS
     tempo_minutos = tempo_segundos / 60
     
     if tempo_minutos < 1:
@@ -620,11 +767,13 @@ def calcular_rota_entre_predios_api(request: RotaPrediosRequest):
     
     Retorna o caminho com coordenadas geográficas para desenhar no mapa
     """
-    if not GRAFO_PREDIOS:
-        raise HTTPException(status_code=500, detail="Grafo de prédios não carregado")
+    grafo_predios = obter_grafo_predios()
+    
+    if not grafo_predios:
+        raise HTTPException(status_code=503, detail="Grafo de prédios não carregado")
     
     try:
-        rota = GRAFO_PREDIOS.calcular_rota(request.origem, request.destino)
+        rota = grafo_predios.calcular_rota(request.origem, request.destino)
         
         if not rota:
             raise HTTPException(
@@ -646,12 +795,191 @@ def calcular_rota_entre_predios_api(request: RotaPrediosRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/rota-interna")
+def calcular_rota_interna_api(request: RotaInternaRequest):
+    """
+    Calcula rota dentro de um andar usando os grafos de navegação interna.
+    Com "andar": null a rota usa o grafo do prédio inteiro e pode passar
+    por escadas e elevadores.
+    
+    Exemplo de uso:
+    POST /api/rota-interna
+    {
+        "origem": "Node_H1_01",
+        "destino": "Room_1014",
+        "andar": "A1"
+    }
+    
+    Com "explicar": true a resposta traz rota.explicacao com a ordem de
+    expansão dos nós, o tamanho da fila de abertos e os g-scores.
+    """
+    rota = calcular_rota_completa(request.origem, request.destino,
+                                  request.andar, request.predio, request.explicar)
+    
+    if not rota:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Nenhuma rota encontrada entre {request.origem} e {request.destino}"
+        )
+    
+    return {"sucesso": True, "rota": rota}
+
+def criar_roteador_campus() -> Optional[RoteadorCampus]:
+    """Cria o roteador hierárquico (tabelas de saídas de todos os prédios)"""
+    grafo_predios = obter_grafo_predios()
+    if not grafo_predios:
+        return None
+    return RoteadorCampus(grafo_predios, registro_grafos)
+
+@app.post("/api/rota-campus")
+def calcular_rota_campus_api(request: RotaCampusRequest):
+    """
+    Calcula rota de uma sala (ou prédio) até outra sala do campus:
+    trecho interno até a melhor saída, trecho externo entre prédios
+    e trecho interno até o destino.
+    
+    Exemplo de uso:
+    POST /api/rota-campus
+    {
+        "origem": {"predio": "A", "local": "A1:Room_1014"},
+        "destino": {"predio": "M"}
+    }
+    """
+    roteador = obter_roteador_campus()
+    
+    if not roteador:
+        raise HTTPException(status_code=503, detail="Grafo de prédios não carregado")
+    
+    rota = roteador.rotear(request.origem.predio, request.destino.predio,
+                           request.origem.local, request.destino.local)
+    
+    if not rota:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Nenhuma rota encontrada entre {request.origem.predio} e {request.destino.predio}"
+        )
+    
+    return {
+        "sucesso": True,
+        "rota": rota,
+        "tempo_estimado": calcular_tempo_estimado(rota['distancia_metros'])
+    }
+
+MAX_ROTAS_LOTE = 1000
+
+@app.post("/api/rotas-lote")
+def calcular_rotas_lote_api(request: RotaLoteRequest):
+    """
+    Calcula várias rotas em uma única requisição. Aceita uma lista de
+    pares origem/destino ou uma origem com vários destinos (sem
+    "destinos", todos os prédios do campus).
+    
+    Exemplo de uso:
+    POST /api/rotas-lote
+    {
+        "origem": {"predio": "A", "local": "A1:Room_1014"},
+        "destinos": [{"predio": "M"}, {"predio": "T"}]
+    }
+    """
+    roteador = obter_roteador_campus()
+    
+    if not roteador:
+        raise HTTPException(status_code=503, detail="Grafo de prédios não carregado")
+    
+    if request.pares is not None:
+        pares = [(p.origem.predio, p.origem.local, p.destino.predio, p.destino.local)
+                 for p in request.pares]
+    elif request.origem is not None:
+        destinos = request.destinos if request.destinos is not None else [
+            PontoCampus(predio=info["ref"]) for info in roteador.grafo_predios.predios.values()
+        ]
+        pares = [(request.origem.predio, request.origem.local, d.predio, d.local)
+                 for d in destinos]
+    else:
+        raise HTTPException(status_code=400, detail="Informe 'pares' ou 'origem'")
+    
+    if len(pares) > MAX_ROTAS_LOTE:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_ROTAS_LOTE} rotas por lote")
+    
+    rotas = roteador.rotear_lote(pares, detalhar=request.detalhar)
+    
+    return {
+        "sucesso": True,
+        "total": len(rotas),
+        "encontradas": sum(r is not None for r in rotas),
+        "rotas": [
+            {**rota, "tempo_estimado": calcular_tempo_estimado(rota['distancia_metros'])}
+            if rota else None
+            for rota in rotas
+        ]
+    }
+
+@app.post("/api/isocrona")
+def calcular_isocrona_api(request: IsocronaRequest):
+    """
+    Lista prédios, saídas e salas alcançáveis a pé dentro de cada limite
+    de tempo, com uma única busca limitada pelo maior deles.
+    
+    Exemplo de uso:
+    POST /api/isocrona
+    {
+        "origem": {"predio": "A", "local": "A1:Room_1014"},
+        "minutos": [1, 3, 5, 10]
+    }
+    """
+    roteador = obter_roteador_campus()
+    
+    if not roteador:
+        raise HTTPException(status_code=503, detail="Grafo de prédios não carregado")
+    
+    # Normaliza 5.0 -> 5 para que chaves do resumo, faixas e 'faixa' coincidam
+    faixas = sorted({int(m) if float(m).is_integer() else m for m in request.minutos if m > 0})
+    if not faixas:
+        raise HTTPException(status_code=400, detail="Informe ao menos um limite de tempo positivo")
+    
+    limite_metros = faixas[-1] * 60 * VELOCIDADE_CAMINHADA_MS
+    alcancaveis = roteador.alcancaveis(request.origem.predio, request.origem.local, limite_metros)
+    
+    if alcancaveis is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Origem não encontrada: {request.origem.predio} {request.origem.local or ''}"
+        )
+    
+    resumo = {str(m): {categoria: 0 for categoria in alcancaveis} for m in faixas}
+    
+    for categoria, itens in alcancaveis.items():
+        for item in itens:
+            minutos = item['distancia_metros'] / VELOCIDADE_CAMINHADA_MS / 60
+            item['minutos'] = round(minutos, 2)
+            item['faixa'] = next(m for m in faixas if minutos <= m)
+            for m in faixas:
+                if minutos <= m:
+                    resumo[str(m)][categoria] += 1
+    
+    return {
+        "sucesso": True,
+        "origem": request.origem,
+        "faixas_minutos": faixas,
+        "resumo": resumo,
+        **alcancaveis
+    }
+
+@app.get("/api/rota-interna/cache")
+def estatisticas_cache_grafos():
+    """
+    Retorna os contadores do registro de grafos internos em memória
+    """
+    return registro_grafos.estatisticas()
+
 @app.get("/api/predios-disponiveis")
 def listar_predios_disponiveis():
     """
     Lista todos os prédios disponíveis para navegação
     """
-    if not GRAFO_PREDIOS:
+    grafo_predios = obter_grafo_predios()
+    
+    if not grafo_predios:
         return {"predios": []}
     
     predios_lista = [
@@ -661,7 +989,7 @@ def listar_predios_disponiveis():
             "ref": info["ref"],
             "coords": info["centroide"]
         }
-        for info in GRAFO_PREDIOS.predios.values()
+        for info in grafo_predios.predios.values()
     ]
     
     return {
@@ -674,47 +1002,30 @@ def obter_info_predio(predio_ref: str):
     """
     Retorna informações detalhadas de um prédio específico
     """
-    import json
-    import os
+    predio_ref_upper = predio_ref.upper()
     
-    # Carregar informações dos prédios
-    caminho_info = os.path.join(os.path.dirname(__file__), "dados", "predios_info.json")
+    if not info_predios.carregado:
+        return {
+            "ref": predio_ref_upper,
+            "info": None,
+            "texto_formatado": info_predios.erro
+        }
     
-    try:
-        with open(caminho_info, 'r', encoding='utf-8') as f:
-            predios_info = json.load(f)
-        
-        predio_ref_upper = predio_ref.upper()
-        
-        if predio_ref_upper in predios_info:
-            info = predios_info[predio_ref_upper]
-            
-            # Formatar resposta em bullet points
-            texto = formatar_info_predio(info)
-            
-            return {
-                "ref": predio_ref_upper,
-                "info": info,
-                "texto_formatado": texto
-            }
-        else:
-            return {
-                "ref": predio_ref_upper,
-                "info": None,
-                "texto_formatado": f"Informações do prédio {predio_ref_upper} não disponíveis no momento."
-            }
+    encontrado = info_predios.obter(predio_ref_upper)
     
-    except FileNotFoundError:
+    if encontrado:
+        info, texto = encontrado
+        
         return {
-            "ref": predio_ref.upper(),
-            "info": None,
-            "texto_formatado": "Base de dados de informações dos prédios não encontrada."
+            "ref": predio_ref_upper,
+            "info": info,
+            "texto_formatado": texto
         }
-    except Exception as e:
+    else:
         return {
-            "ref": predio_ref.upper(),
+            "ref": predio_ref_upper,
             "info": None,
-            "texto_formatado": f"Erro ao carregar informações: {str(e)}"
+            "texto_formatado": f"Informações do prédio {predio_ref_upper} não disponíveis no momento."
         }
 
 @app.get("/api/predios/{predio_id}/locais")
@@ -729,7 +1040,12 @@ def listar_locais_predio(predio_id: str):
             }
     raise HTTPException(status_code=404, detail="Prédio não encontrado")
 
+# Last, so every component factory above is defined
+if API_PRELOAD:
+    INICIALIZACAO.pre_carregar()
+
 # Executar com: uvicorn api:app --reload
+# Vários workers compartilhando os grafos: gunicorn api:app -c gunicorn.conf.py
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
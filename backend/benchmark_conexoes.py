@@ -0,0 +1,70 @@
+"""
+Benchmark de GrafoNavegacao.conectar_nos_proximos
+Compara a busca por grade uniforme com a comparação de todos os pares
+e confere que as arestas geradas são idênticas, em andares sintéticos
+do gerador_plantas
+"""
+
+import contextlib
+import io
+import time
+from typing import Dict
+from criar_grafo_navegacao import GrafoNavegacao
+from gerador_plantas import gerar_planta
+
+def medir(elementos: Dict, metodo: str, distancia_maxima: float):
+    """
+    Constrói o grafo e mede apenas a etapa de conexão
+    """
+    grafo = GrafoNavegacao('BENCH')
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        grafo.adicionar_elementos_svg(elementos)
+        inicio = time.perf_counter()
+        getattr(grafo, metodo)(distancia_maxima=distancia_maxima)
+        duracao = time.perf_counter() - inicio
+
+    return grafo, duracao
+
+def executar_benchmark(escalas=(100, 500, 1000, 2000), distancia_maxima: float = 150.0):
+    """
+    Executa o benchmark em várias escalas de número de salas
+    """
+    print("="*60)
+    print("⏱️  BENCHMARK - conectar_nos_proximos")
+    print("="*60)
+    print(f"\n{'Salas':>6} {'Nós':>7} {'Arestas':>8} {'Todos pares':>12} {'Grade':>9} {'Ganho':>7}")
+
+    resultados = []
+
+    for num_salas in escalas:
+        elementos = gerar_planta(num_salas)
+
+        grafo_ref, t_ref = medir(elementos, '_conectar_nos_proximos_todos_pares', distancia_maxima)
+        grafo_grade, t_grade = medir(elementos, 'conectar_nos_proximos', distancia_maxima)
+
+        identicas = grafo_ref.arestas == grafo_grade.arestas and all(
+            grafo_ref.nos[nid]['conexoes'] == grafo_grade.nos[nid]['conexoes']
+            for nid in grafo_ref.nos
+        )
+
+        if not identicas:
+            raise AssertionError(f"Arestas diferentes para {num_salas} salas")
+
+        print(f"{num_salas:>6} {len(grafo_ref.nos):>7} {len(grafo_ref.arestas):>8} "
+              f"{t_ref:>11.3f}s {t_grade:>8.3f}s {t_ref / t_grade:>6.1f}x")
+
+        resultados.append({
+            'salas': num_salas,
+            'nos': len(grafo_ref.nos),
+            'arestas': len(grafo_ref.arestas),
+            'todos_pares_s': t_ref,
+            'grade_s': t_grade
+        })
+
+    print("\n✅ Arestas idênticas em todas as escalas")
+
+    return resultados
+
+if __name__ == '__main__':
+    executar_benchmark()
@@ -0,0 +1,297 @@
+"""
+Benchmark de criação de grafos e pathfinding em plantas sintéticas
+Gera andares com gerador_plantas em várias escalas, mede a construção do
+GrafoNavegacao, conectar_nos_proximos, landmarks, compilação e milhares de
+consultas calcular_caminho_a_star entre salas aleatórias, e compara com um
+baseline gravado.
+
+Regressão:
+- tempos: acima do baseline por mais que a tolerância relativa (e por mais
+  que uma folga absoluta, para tempos muito pequenos não darem alarme)
+- métricas determinísticas (nós, arestas, nós expandidos, comprimento
+  médio das rotas): qualquer diferença indica que o grafo ou a busca
+  mudaram e o baseline precisa ser regravado
+
+Uso:
+    python benchmark_pathfinding.py                     # compara com o baseline
+    python benchmark_pathfinding.py --gravar-baseline   # regrava o baseline
+    python benchmark_pathfinding.py --rapido            # só as escalas pequenas
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from criar_grafo_navegacao import GrafoNavegacao, combinar_andares, NUM_LANDMARKS
+from gerador_plantas import gerar_planta
+from grafo_compilado import GrafoCompilado
+from pathfinding_interno import calcular_caminho_a_star, _calcular_caminho_indices
+
+BASELINE_PADRAO = Path(__file__).parent / 'dados' / 'benchmark_pathfinding_baseline.json'
+
+# (salas por andar, número de andares)
+CENARIOS = ((100, 1), (500, 1), (2000, 1), (5000, 1), (500, 3))
+CENARIOS_RAPIDOS = ((100, 1), (500, 1), (500, 3))
+
+DISTANCIA_MAXIMA = 150.0
+TOLERANCIA_PADRAO = 0.5
+# Folga absoluta em milissegundos abaixo da qual diferenças são ruído
+FOLGA_MS = 0.5
+# A construção é repetida ao menos este tempo (cenários pequenos são
+# repetidos mais vezes, para o mínimo ser estável)
+TEMPO_MINIMO_CONSTRUCAO = 1.0
+MAX_REPETICOES_CONSTRUCAO = 50
+
+METRICAS_TEMPO = ('construir_ms', 'conectar_ms', 'landmarks_ms', 'compilar_ms',
+                  'consulta_p50_ms', 'consulta_p95_ms', 'consulta_media_ms')
+METRICAS_EXATAS = ('salas', 'nos', 'arestas', 'sem_caminho', 'expandidos_medio', 'distancia_media')
+
+def _nome_cenario(salas: int, andares: int) -> str:
+    return f'{salas}x{andares}'
+
+def _percentil(valores: List[float], p: float) -> float:
+    """
+    Percentil pelo método nearest-rank
+    """
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+def _construir(salas: int, andares: int, seed: int) -> Tuple[GrafoNavegacao, float, float]:
+    """
+    Constrói o grafo do cenário; retorna o grafo e os tempos de
+    adicionar_elementos_svg e conectar_nos_proximos (somados entre andares)
+    """
+    nomes = [f'Z{a + 1}' for a in range(andares)]
+    plantas = {andar: gerar_planta(salas, andar, seed) for andar in nomes}
+    grafos = {}
+    construir = conectar = 0.0
+
+    for andar, elementos in plantas.items():
+        grafo = GrafoNavegacao(andar)
+
+        inicio = time.perf_counter()
+        grafo.adicionar_elementos_svg(elementos)
+        construir += time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        grafo.conectar_nos_proximos(distancia_maxima=DISTANCIA_MAXIMA)
+        conectar += time.perf_counter() - inicio
+
+        grafos[andar] = grafo
+
+    if andares == 1:
+        return grafos[nomes[0]], construir, conectar
+
+    inicio = time.perf_counter()
+    grafo = combinar_andares('Z', grafos)
+    construir += time.perf_counter() - inicio
+
+    return grafo, construir, conectar
+
+def executar_cenario(salas: int, andares: int = 1, consultas: int = 2000,
+                     repeticoes: int = 3, seed: int = 42) -> Dict:
+    """
+    Mede um cenário; os tempos de construção são o mínimo entre repetições
+    (ao menos repeticoes, e até somar TEMPO_MINIMO_CONSTRUCAO)
+
+    Returns:
+        Métricas do cenário (tempos em ms e métricas determinísticas)
+    """
+    melhores = {'construir_ms': math.inf, 'conectar_ms': math.inf,
+                'landmarks_ms': math.inf, 'compilar_ms': math.inf}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio_construcao = time.perf_counter()
+        for repeticao in range(MAX_REPETICOES_CONSTRUCAO):
+            if (repeticao >= repeticoes and
+                    time.perf_counter() - inicio_construcao >= TEMPO_MINIMO_CONSTRUCAO):
+                break
+
+            grafo, construir, conectar = _construir(salas, andares, seed)
+
+            inicio = time.perf_counter()
+            grafo.preprocessar_landmarks(NUM_LANDMARKS)
+            landmarks = time.perf_counter() - inicio
+
+            dados = {'nos': grafo.nos, 'landmarks': grafo.landmarks, 'arestas': [
+                {'origem': a, 'destino': b, 'distancia': d, 'tipo': 'vertical'}
+                for a, b, d in grafo.arestas if (a, b) in grafo.arestas_verticais
+            ]}
+            inicio = time.perf_counter()
+            grafo_c = GrafoCompilado.de_dict(dados)
+            compilar = time.perf_counter() - inicio
+
+            for chave, segundos in (('construir_ms', construir), ('conectar_ms', conectar),
+                                    ('landmarks_ms', landmarks), ('compilar_ms', compilar)):
+                melhores[chave] = min(melhores[chave], segundos * 1000)
+
+    ids_salas = sorted(nid for nid, no in grafo.nos.items() if no['tipo'] == 'sala_centro')
+    rnd = random.Random(seed)
+    pares = [tuple(rnd.sample(ids_salas, 2)) for _ in range(consultas)]
+
+    # Métricas determinísticas (fora da medição de tempo)
+    expandidos = []
+    distancias = []
+    sem_caminho = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for origem, destino in pares:
+            resultado = _calcular_caminho_indices(grafo_c, origem, destino)
+            if resultado is None:
+                sem_caminho += 1
+                continue
+            _, distancia, num_expandidos = resultado
+            expandidos.append(num_expandidos)
+            distancias.append(distancia)
+
+    # Latência de calcular_caminho_a_star; cada consulta fica com o melhor
+    # tempo entre as repetições
+    tempos = np.full(len(pares), np.inf)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeticoes):
+            for k, (origem, destino) in enumerate(pares):
+                inicio = time.perf_counter()
+                calcular_caminho_a_star(grafo_c, origem, destino)
+                tempos[k] = min(tempos[k], time.perf_counter() - inicio)
+    tempos_ms = (tempos * 1000).tolist()
+
+    return {
+        'salas': len(ids_salas),
+        'nos': len(grafo.nos),
+        'arestas': len(grafo.arestas),
+        'consultas': consultas,
+        'sem_caminho': sem_caminho,
+        'expandidos_medio': round(float(np.mean(expandidos)), 2) if expandidos else 0.0,
+        'distancia_media': round(float(np.mean(distancias)), 2) if distancias else 0.0,
+        **{chave: round(valor, 3) for chave, valor in melhores.items()},
+        'consulta_p50_ms': round(_percentil(tempos_ms, 50), 4),
+        'consulta_p95_ms': round(_percentil(tempos_ms, 95), 4),
+        'consulta_media_ms': round(float(np.mean(tempos_ms)), 4)
+    }
+
+def executar_benchmark(cenarios=CENARIOS, consultas: int = 2000, repeticoes: int = 3,
+                       seed: int = 42) -> Dict:
+    """
+    Executa todos os cenários e imprime a tabela de resultados
+    """
+    print("="*60)
+    print("⏱️  BENCHMARK - GrafoNavegacao + A*")
+    print("="*60)
+
+    # Rodada descartada para aquecer imports, caches e o alocador
+    executar_cenario(100, 1, consultas=100, repeticoes=1, seed=seed)
+
+    resultados = {}
+    for salas, andares in cenarios:
+        nome = _nome_cenario(salas, andares)
+        print(f"\n🏗️  {nome} ({salas} salas x {andares} andar(es))...")
+        r = executar_cenario(salas, andares, consultas, repeticoes, seed)
+        resultados[nome] = r
+        print(f"   {r['nos']} nós, {r['arestas']} arestas, {r['salas']} salas")
+        print(f"   construir {r['construir_ms']:.1f} ms | conectar {r['conectar_ms']:.1f} ms | "
+              f"landmarks {r['landmarks_ms']:.1f} ms | compilar {r['compilar_ms']:.1f} ms")
+        print(f"   A* ({consultas} consultas): p50 {r['consulta_p50_ms']:.3f} ms | "
+              f"p95 {r['consulta_p95_ms']:.3f} ms | média {r['consulta_media_ms']:.3f} ms | "
+              f"{r['expandidos_medio']:.1f} nós expandidos")
+        if r['sem_caminho']:
+            print(f"   ⚠️  {r['sem_caminho']} consultas sem caminho")
+
+    return {
+        'ambiente': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'maquina': platform.machine(),
+            'processador': platform.processor() or None
+        },
+        'parametros': {'consultas': consultas, 'repeticoes': repeticoes, 'seed': seed,
+                       'distancia_maxima': DISTANCIA_MAXIMA},
+        'cenarios': resultados
+    }
+
+def comparar_com_baseline(resultados: Dict, baseline: Dict,
+                          tolerancia: float = TOLERANCIA_PADRAO) -> List[str]:
+    """
+    Compara os resultados com o baseline
+
+    Returns:
+        Lista de regressões encontradas (vazia se tudo dentro dos limites)
+    """
+    regressoes = []
+
+    if resultados['parametros'] != baseline['parametros']:
+        regressoes.append(f"parâmetros diferentes do baseline: {baseline['parametros']}")
+        return regressoes
+
+    print(f"\n📊 Comparação com o baseline (tolerância {tolerancia:.0%})")
+
+    for nome, atual in resultados['cenarios'].items():
+        base = baseline['cenarios'].get(nome)
+        if base is None:
+            print(f"   {nome}: sem baseline")
+            continue
+
+        for metrica in METRICAS_EXATAS:
+            if atual[metrica] != base[metrica]:
+                regressoes.append(f"{nome}.{metrica}: {base[metrica]} -> {atual[metrica]} "
+                                  f"(grafo ou busca mudaram)")
+
+        for metrica in METRICAS_TEMPO:
+            limite = max(base[metrica] * (1 + tolerancia), base[metrica] + FOLGA_MS)
+            variacao = (atual[metrica] / base[metrica] - 1) if base[metrica] else 0.0
+            situacao = '❌' if atual[metrica] > limite else '✅'
+            print(f"   {situacao} {nome:<8} {metrica:<18} {base[metrica]:>10.3f} -> "
+                  f"{atual[metrica]:>10.3f} ({variacao:+.0%})")
+            if atual[metrica] > limite:
+                regressoes.append(f"{nome}.{metrica}: {base[metrica]:.3f} -> "
+                                  f"{atual[metrica]:.3f} ms ({variacao:+.0%})")
+
+    return regressoes
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark de criação de grafos e A*")
+    parser.add_argument('--baseline', default=str(BASELINE_PADRAO))
+    parser.add_argument('--gravar-baseline', action='store_true',
+                        help="Grava os resultados como novo baseline")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO,
+                        help="Aumento relativo de tempo aceito (0.5 = 50%%)")
+    parser.add_argument('--consultas', type=int, default=2000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--rapido', action='store_true', help="Só as escalas pequenas")
+    args = parser.parse_args()
+
+    resultados = executar_benchmark(CENARIOS_RAPIDOS if args.rapido else CENARIOS,
+                                    args.consultas, args.repeticoes, args.seed)
+    caminho_baseline = Path(args.baseline)
+
+    if args.gravar_baseline:
+        with open(caminho_baseline, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Baseline gravado em: {caminho_baseline}")
+        sys.exit(0)
+
+    if not caminho_baseline.exists():
+        print(f"\n⚠️  Baseline não encontrado: {caminho_baseline} (use --gravar-baseline)")
+        sys.exit(0)
+
+    with open(caminho_baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressoes = comparar_com_baseline(resultados, baseline, args.tolerancia)
+
+    if regressoes:
+        print(f"\n❌ {len(regressoes)} regressão(ões):")
+        for regressao in regressoes:
+            print(f"   - {regressao}")
+        sys.exit(1)
+
+    print("\n✅ Sem regressões")
@@ -0,0 +1,143 @@
+"""
+Cache de intenções extraídas pelo chatbot
+Mensagens quase idênticas ("how do I get from A to M?") são normalizadas
+para a mesma chave; o resultado {origem, destino, resposta} fica em um
+cache LRU com expiração, e mensagens iguais em andamento ao mesmo tempo
+compartilham uma única chamada ao modelo (single-flight)
+"""
+
+import asyncio
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+def normalizar_mensagem(mensagem: str) -> str:
+    """
+    Chave de cache: minúsculas, sem acentos, sem pontuação e com espaços
+    simples
+    """
+    texto = unicodedata.normalize('NFKD', mensagem.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r"[^\w\s']", ' ', texto)
+    return ' '.join(texto.split())
+
+class CacheIntencoes:
+    """
+    Cache LRU + TTL de intenções, chaveado pela mensagem normalizada
+    """
+
+    def __init__(self, capacidade: int = 2048, ttl_segundos: float = 3600.0):
+        self.capacidade = capacidade
+        self.ttl_segundos = ttl_segundos
+
+        self._entradas: 'OrderedDict[str, Tuple[float, Dict]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._em_andamento: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.expirados = 0
+        self.coalescidos = 0
+
+    def obter(self, mensagem: str) -> Optional[Dict]:
+        """
+        Intenção em cache para a mensagem, ou None
+        """
+        chave = normalizar_mensagem(mensagem)
+
+        with self._lock:
+            entrada = self._entradas.get(chave)
+
+            if entrada is not None and entrada[0] < time.monotonic():
+                del self._entradas[chave]
+                self.expirados += 1
+                entrada = None
+
+            if entrada is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entradas.move_to_end(chave)
+            # Cópia: quem chama pode alterar o dicionário da resposta
+            return dict(entrada[1])
+
+    def guardar(self, mensagem: str, intencao: Dict):
+        chave = normalizar_mensagem(mensagem)
+
+        with self._lock:
+            self._entradas[chave] = (time.monotonic() + self.ttl_segundos, dict(intencao))
+            self._entradas.move_to_end(chave)
+
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+
+    async def obter_ou_calcular(self, mensagem: str,
+                                calcular: Callable[[], Awaitable[Optional[Dict]]],
+                                timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Retorna a intenção em cache ou calcula uma única vez por chave
+
+        Chamadas concorrentes com a mesma mensagem normalizada aguardam a
+        mesma tarefa. Resultados None (modelo falhou) não são guardados.
+
+        Raises:
+            asyncio.TimeoutError: se o resultado não ficar pronto em timeout
+        """
+        intencao = self.obter(mensagem)
+        if intencao is not None:
+            return intencao
+
+        chave = normalizar_mensagem(mensagem)
+        tarefa = self._em_andamento.get(chave)
+
+        if tarefa is None:
+            tarefa = asyncio.ensure_future(self._executar(chave, mensagem, calcular))
+            self._em_andamento[chave] = tarefa
+        else:
+            self.coalescidos += 1
+
+        # shield: o timeout de um chamador não cancela a tarefa compartilhada
+        resultado = await asyncio.wait_for(asyncio.shield(tarefa), timeout)
+        return dict(resultado) if resultado is not None else None
+
+    async def _executar(self, chave: str, mensagem: str,
+                        calcular: Callable[[], Awaitable[Optional[Dict]]]) -> Optional[Dict]:
+        try:
+            resultado = await calcular()
+        except Exception as e:
+            # A falha chega a todos os chamadores como None (sem cache); uma
+            # exceção aqui poderia ficar sem ser lida se todos já desistiram
+            print(f"⚠️ Intent computation failed: {e!r}")
+            resultado = None
+        finally:
+            self._em_andamento.pop(chave, None)
+
+        if resultado is not None:
+            self.guardar(mensagem, resultado)
+        return resultado
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estatisticas(self) -> Dict:
+        """
+        Contadores de uso do cache
+        """
+        total = self.hits + self.misses
+
+        return {
+            'entradas': len(self._entradas),
+            'capacidade': self.capacidade,
+            'ttl_segundos': self.ttl_segundos,
+            'hits': self.hits,
+            'misses': self.misses,
+            'expirados': self.expirados,
+            'coalescidos': self.coalescidos,
+            'em_andamento': len(self._em_andamento),
+            'taxa_acerto': round(self.hits / total, 4) if total else 0.0
+        }
@@ -1,27 +1,93 @@
-import google.generativeai as genai
+import asyncio
 import os
 import re
 import json
+import threading
+import time
 from dotenv import load_dotenv
+from cache_intencoes import CacheIntencoes
+from metricas import CHAT_INTENCOES, GEMINI_ERROS, GEMINI_LATENCIA
+from modelos_llm import criar_modelo
+from motor_intencoes import obter_motor, resposta_navegacao
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Maximum time (seconds) an async chat request waits for the model,
+# including time queued behind other requests
+CHAT_TIMEOUT_SEGUNDOS = float(os.getenv("CHAT_TIMEOUT_SEGUNDOS", "8"))
+
+# Maximum number of model calls in flight across the process
+CHAT_MAX_CONCORRENCIA = int(os.getenv("CHAT_MAX_CONCORRENCIA", "8"))
+
+# How long an extracted intent stays valid in the intent cache
+CHAT_CACHE_TTL_SEGUNDOS = float(os.getenv("CHAT_CACHE_TTL_SEGUNDOS", "3600"))
+
+class ExtratorResposta:
+    """
+    Extracts the "resposta" string from a JSON answer that arrives in
+    pieces, so the friendly text can be shown while the model writes it
+    """
+    
+    _CHAVE = re.compile(r'"resposta"\s*:\s*"')
+    _ESCAPES = {'n': '\n', 't': '\t', '"': '"', '\\': '\\', '/': '/', 'r': '', 'b': '', 'f': ''}
+    
+    def __init__(self):
+        self.texto = ""
+        self._posicao = None  # Index right after the opening quote
+        self._terminado = False
+    
+    def alimentar(self, pedaco: str) -> str:
+        """Add a piece of the model output; returns the new resposta text"""
+        self.texto += pedaco
+        
+        if self._terminado:
+            return ""
+        
+        if self._posicao is None:
+            match = self._CHAVE.search(self.texto)
+            if not match:
+                return ""
+            self._posicao = match.end()
+        
+        novo = []
+        i = self._posicao
+        while i < len(self.texto):
+            c = self.texto[i]
+            if c == '\\':
+                if i + 1 >= len(self.texto):
+                    break  # Escape split across pieces: wait for the next one
+                seguinte = self.texto[i + 1]
+                if seguinte == 'u':
+                    if i + 6 > len(self.texto):
+                        break
+                    novo.append(chr(int(self.texto[i + 2:i + 6], 16)))
+                    i += 6
+                    continue
+                novo.append(self._ESCAPES.get(seguinte, seguinte))
+                i += 2
+                continue
+            if c == '"':
+                self._terminado = True
+                i += 1
+                break
+            novo.append(c)
+            i += 1
+        
+        self._posicao = i
+        return ''.join(novo)
+
 class ChatbotNavegacao:
     def __init__(self):
-        # Configure Google Gemini
-        api_key = os.getenv("GEMINI_API_KEY")
+        self._semaforo = None
+        self.cache = CacheIntencoes(ttl_segundos=CHAT_CACHE_TTL_SEGUNDOS)
         
-        try:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-2.5-flash')
-            self.use_ai = True
-            print("✅ Google Gemini AI activated")
-        except Exception as e:
-            print(f"⚠️ Error configuring Gemini: {e}")
-            print("📝 Using simple regex mode.")
-            self.model = None
-            self.use_ai = False
+        # The model client is created on first use (or by the API's
+        # background warm-up): importing the Gemini SDK takes ~1s
+        self.model = None
+        self.use_ai = False
+        self.modelo_inicializado = False
+        self._lock_modelo = threading.Lock()
         
         # Prompt for Gemini
         self.system_prompt = """You are a navigation assistant for Fanshawe College campus.
@@ -38,11 +104,56 @@ Respond ONLY in JSON format:
 
 If you can't identify origin or destination, return null for those fields."""
     
+    def inicializar_modelo(self):
+        """Create the model client once (thread-safe, no-op afterwards)"""
+        if self.modelo_inicializado:
+            return
+        
+        with self._lock_modelo:
+            if self.modelo_inicializado:
+                return
+            
+            # Backend chosen by CHATBOT_MODELO (gemini, stub or local);
+            # local models answer unmatched messages with the regex extraction
+            backend = os.getenv("CHATBOT_MODELO", "gemini").lower()
+            try:
+                self.model = criar_modelo(backend, extrator=self._processar_com_regex)
+                self.use_ai = True
+                if backend == "gemini":
+                    print("✅ Google Gemini AI activated")
+                else:
+                    print(f"🧪 Model backend '{backend}' activated")
+            except Exception as e:
+                print(f"⚠️ Error configuring {backend} model: {e}")
+                print("📝 Using simple regex mode.")
+                self.model = None
+                self.use_ai = False
+            
+            self.modelo_inicializado = True
+    
+    def _resolver_localmente(self, mensagem: str) -> dict:
+        """Deterministic intent engine (no model call); None below its confidence threshold"""
+        resultado = obter_motor().resolver(mensagem)
+        CHAT_INTENCOES.inc('local' if resultado else 'encaminhada')
+        return resultado
+    
+    async def _inicializar_modelo_async(self):
+        # Off the event loop: the first initialization imports the SDK
+        if not self.modelo_inicializado:
+            await asyncio.to_thread(self.inicializar_modelo)
+    
     def processar_mensagem(self, mensagem: str) -> dict:
         """Process message and extract navigation intent"""
         
         print(f"🔍 Processing message: {mensagem}")
         
+        # Confident local answers skip the model entirely
+        local = self._resolver_localmente(mensagem)
+        if local:
+            return local
+        
+        self.inicializar_modelo()
+        
         # First check if it's a question about building information
         info_predio = self._verificar_info_predio(mensagem)
         if info_predio:
@@ -50,22 +161,23 @@ If you can't identify origin or destination, return null for those fields."""
             return info_predio
         
         if self.use_ai and self.model:
+            em_cache = self.cache.obter(mensagem)
+            if em_cache:
+                return em_cache
+            
             try:
                 # Use Gemini to process
                 prompt = f"{self.system_prompt}\n\nUser: {mensagem}"
+                inicio = time.perf_counter()
                 response = self.model.generate_content(prompt)
-                resposta_texto = response.text
+                GEMINI_LATENCIA.observar(time.perf_counter() - inicio, 'sync')
                 
-                # Extract JSON from response
-                json_match = re.search(r'\{.*\}', resposta_texto, re.DOTALL)
-                if json_match:
-                    dados = json.loads(json_match.group())
-                    return {
-                        "origem": dados.get("origem"),
-                        "destino": dados.get("destino"),
-                        "resposta": dados.get("resposta", "I understood your request!")
-                    }
+                resultado = self._interpretar_resposta(response.text)
+                if resultado:
+                    self.cache.guardar(mensagem, resultado)
+                    return resultado
             except Exception as e:
+                GEMINI_ERROS.inc('sync', 'erro')
                 print(f"Error using Gemini: {e}")
                 # Fallback to regex
         
@@ -73,6 +185,169 @@ If you can't identify origin or destination, return null for those fields."""
         print("📝 Using simple regex mode")
         return self._processar_com_regex(mensagem)
     
+    async def processar_mensagem_async(self, mensagem: str, timeout: float = None) -> dict:
+        """
+        Async version of processar_mensagem
+        
+        The model call uses the async client, waits for a free slot in a
+        process-wide semaphore and is bounded by a deadline; on timeout or
+        error the regex extraction answers instead.
+        """
+        print(f"🔍 Processing message: {mensagem}")
+        
+        local = self._resolver_localmente(mensagem)
+        if local:
+            return local
+        
+        info_predio = self._verificar_info_predio(mensagem)
+        if info_predio:
+            print(f"✓ Detected building information request: {info_predio}")
+            return info_predio
+        
+        await self._inicializar_modelo_async()
+        
+        if self.use_ai and self.model:
+            if self._semaforo is None:
+                self._semaforo = asyncio.Semaphore(CHAT_MAX_CONCORRENCIA)
+            
+            prazo = timeout or CHAT_TIMEOUT_SEGUNDOS
+            
+            async def consultar_modelo():
+                try:
+                    async with self._semaforo:
+                        prompt = f"{self.system_prompt}\n\nUser: {mensagem}"
+                        inicio = time.perf_counter()
+                        response = await self.model.generate_content_async(prompt)
+                        GEMINI_LATENCIA.observar(time.perf_counter() - inicio, 'async')
+                        return self._interpretar_resposta(response.text)
+                except asyncio.CancelledError:
+                    # Cancelled by the deadline
+                    GEMINI_ERROS.inc('async', 'timeout')
+                    raise
+                except Exception as e:
+                    GEMINI_ERROS.inc('async', 'erro')
+                    print(f"Error using Gemini: {e}")
+                    return None
+            
+            try:
+                # Identical messages in flight share one model call
+                resultado = await self.cache.obter_ou_calcular(
+                    mensagem, lambda: asyncio.wait_for(consultar_modelo(), prazo), prazo
+                )
+                if resultado:
+                    return resultado
+            except asyncio.TimeoutError:
+                print(f"⏱️ Gemini deadline exceeded ({prazo}s)")
+            except Exception as e:
+                print(f"Error using Gemini: {e}")
+        
+        print("📝 Using simple regex mode")
+        return self._processar_com_regex(mensagem)
+    
+    async def processar_mensagem_stream(self, mensagem: str, timeout: float = None):
+        """
+        Streaming version of processar_mensagem_async
+        
+        Async generator of (event, data) pairs:
+        - "intencao": regex extraction, available immediately
+        - "texto": {"delta": ...} pieces of the model's friendly answer
+        - "final": the resolved result (same shape as processar_mensagem)
+        """
+        local = self._resolver_localmente(mensagem)
+        if local:
+            if local.get("tipo") != "info_predio":
+                yield "intencao", local
+                yield "texto", {"delta": local["resposta"]}
+            yield "final", local
+            return
+        
+        info_predio = self._verificar_info_predio(mensagem)
+        if info_predio:
+            yield "final", info_predio
+            return
+        
+        regex = self._processar_com_regex(mensagem)
+        yield "intencao", regex
+        
+        await self._inicializar_modelo_async()
+        
+        if not (self.use_ai and self.model):
+            yield "texto", {"delta": regex["resposta"]}
+            yield "final", regex
+            return
+        
+        em_cache = self.cache.obter(mensagem)
+        if em_cache:
+            yield "texto", {"delta": em_cache["resposta"]}
+            yield "final", em_cache
+            return
+        
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(CHAT_MAX_CONCORRENCIA)
+        
+        prazo = timeout or CHAT_TIMEOUT_SEGUNDOS
+        loop = asyncio.get_running_loop()
+        limite = loop.time() + prazo
+        extrator = ExtratorResposta()
+        enviou_texto = False
+        resultado = None
+        
+        try:
+            await asyncio.wait_for(self._semaforo.acquire(), prazo)
+            inicio = time.perf_counter()
+            try:
+                prompt = f"{self.system_prompt}\n\nUser: {mensagem}"
+                stream = await asyncio.wait_for(
+                    self.model.generate_content_async(prompt, stream=True),
+                    max(0.0, limite - loop.time())
+                )
+                pedacos = stream.__aiter__()
+                
+                while True:
+                    try:
+                        pedaco = await asyncio.wait_for(pedacos.__anext__(),
+                                                        max(0.0, limite - loop.time()))
+                    except StopAsyncIteration:
+                        break
+                    
+                    delta = extrator.alimentar(pedaco.text)
+                    if delta:
+                        enviou_texto = True
+                        yield "texto", {"delta": delta}
+            finally:
+                self._semaforo.release()
+            
+            GEMINI_LATENCIA.observar(time.perf_counter() - inicio, 'stream')
+            resultado = self._interpretar_resposta(extrator.texto)
+        except asyncio.TimeoutError:
+            GEMINI_ERROS.inc('stream', 'timeout')
+            print(f"⏱️ Gemini deadline exceeded ({prazo}s)")
+        except Exception as e:
+            GEMINI_ERROS.inc('stream', 'erro')
+            print(f"Error using Gemini: {e}")
+        
+        if resultado:
+            self.cache.guardar(mensagem, resultado)
+        else:
+            resultado = regex
+            if not enviou_texto:
+                yield "texto", {"delta": regex["resposta"]}
+        
+        yield "final", resultado
+    
+    def _interpretar_resposta(self, resposta_texto: str) -> dict:
+        """Extract the JSON intent from the model's answer (None if absent)"""
+        json_match = re.search(r'\{.*\}', resposta_texto, re.DOTALL)
+        if not json_match:
+            return None
+        
+        dados = json.loads(json_match.group())
+        return {
+            "origem": dados.get("origem"),
+            "destino": dados.get("destino"),
+            "resposta": dados.get("resposta", "I understood your request!")
+        }
+    
     def _verificar_info_predio(self, mensagem: str) -> dict:
         """Verifica se usuário está perguntando sobre informações de um prédio"""
         msg = mensagem.lower()
@@ -101,7 +376,8 @@ If you can't identify origin or destination, return null for those fields."""
         
         return None
     
-    def _processar_com_regex(self, mensagem: str) -> dict:
+    @staticmethod
+    def _processar_com_regex(mensagem: str) -> dict:
         """Fallback using regex to extract origin and destination"""
         msg = mensagem.lower()
         
@@ -151,18 +427,10 @@ If you can't identify origin or destination, return null for those fields."""
                 if candidato in predios_validos:
                     destino = candidato.upper()
         
-        resposta = "How can I help you with navigation?"
-        if origem and destino:
-            resposta = f"✅ Done! Showing the path from building {origem} to building {destino} on the map."
-        elif destino:
-            resposta = f"📍 Destination: building {destino}. Which building are you leaving from?"
-        elif origem:
-            resposta = f"📍 Origin: building {origem}. Which building would you like to go to?"
-        
         return {
             "origem": origem,
             "destino": destino,
-            "resposta": resposta
+            "resposta": resposta_navegacao(origem, destino)
         }
 
 # Global chatbot instance
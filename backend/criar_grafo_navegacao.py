@@ -3,10 +3,27 @@ Script para criar grafo de navegação a partir dos elementos SVG extraídos
 Conecta nós de corredor, portas e saídas para permitir pathfinding
 """
 
+import heapq
 import json
 import math
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+from grafo_compilado import GrafoCompilado
+from snapshot_grafo import assinatura_fonte, caminho_snapshot
+
+# Número padrão de landmarks (heurística ALT) gravados nos grafos
+NUM_LANDMARKS = 4
+
+# Custos das transições verticais no grafo do prédio inteiro, em pixels
+# (mesma unidade das arestas horizontais; ~0.1 m por pixel)
+CUSTOS_TRANSICAO = {
+    'escada': 150.0,           # por andar subido/descido
+    'elevador_espera': 300.0,  # espera + embarque, uma vez por viagem
+    'elevador_andar': 30.0     # por andar percorrido
+}
+
+# Palavras no ID de elementos 'outros' que viram nós de transição vertical
+TIPOS_TRANSICAO = {'stair': 'escada', 'elevator': 'elevador'}
 
 class GrafoNavegacao:
     """
@@ -17,6 +34,8 @@ class GrafoNavegacao:
         self.andar = andar
         self.nos = {}  # {id: {x, y, tipo, conexoes, metadata}}
         self.arestas = []  # [(id1, id2, distancia)]
+        self.landmarks = None  # {ids: [...], distancias: {id: [d por landmark]}}
+        self.arestas_verticais = set()  # {(id1, id2)} transições entre andares
     
     def adicionar_elementos_svg(self, elementos: Dict):
         """
@@ -92,6 +111,28 @@ class GrafoNavegacao:
                 }
         
         print(f"   ✓ {len(elementos['salas'])} centros de sala adicionados")
+        
+        # 5. Adicionar escadas e elevadores (transições entre andares)
+        transicoes = 0
+        for elem in elementos.get('outros', []):
+            tipo = next(
+                (t for palavra, t in TIPOS_TRANSICAO.items() if palavra in elem['id'].lower()),
+                None
+            )
+            if tipo and elem.get('centro'):
+                self.nos[elem['id']] = {
+                    'x': elem['centro']['x'],
+                    'y': elem['centro']['y'],
+                    'tipo': tipo,
+                    'conexoes': [],
+                    'metadata': {
+                        'tipo_elemento': elem.get('tipo_elemento', 'unknown'),
+                        'bbox': elem.get('bbox')
+                    }
+                }
+                transicoes += 1
+        
+        print(f"   ✓ {transicoes} escadas/elevadores adicionados")
         print(f"   📊 Total de nós: {len(self.nos)}")
     
     def calcular_distancia(self, id1: str, id2: str) -> float:
@@ -106,60 +147,119 @@ class GrafoNavegacao:
         
         return math.sqrt(dx*dx + dy*dy)
     
+    def _deve_conectar(self, no1: Dict, no2: Dict, dist: float, distancia_maxima: float,
+                       conectar_portas_a_salas: bool) -> bool:
+        """
+        Regras de conexão entre dois nós
+        """
+        # Caso 1: Nós de corredor entre si
+        if no1['tipo'] == 'corredor' and no2['tipo'] == 'corredor':
+            return dist <= distancia_maxima
+        
+        # Caso 2: Nós de corredor com portas
+        elif (no1['tipo'] == 'corredor' and no2['tipo'] == 'porta') or \
+             (no1['tipo'] == 'porta' and no2['tipo'] == 'corredor'):
+            return dist <= distancia_maxima * 0.8  # Distância menor para portas
+        
+        # Caso 3: Nós de corredor com saídas, escadas e elevadores
+        elif (no1['tipo'] == 'corredor' and no2['tipo'] in ('saida', 'escada', 'elevador')) or \
+             (no1['tipo'] in ('saida', 'escada', 'elevador') and no2['tipo'] == 'corredor'):
+            return dist <= distancia_maxima
+        
+        # Caso 4: Portas com centros de suas próprias salas
+        elif conectar_portas_a_salas:
+            if no1['tipo'] == 'porta' and no2['tipo'] == 'sala_centro':
+                return no1.get('sala') == no2.get('sala')
+            elif no2['tipo'] == 'porta' and no1['tipo'] == 'sala_centro':
+                return no2.get('sala') == no1.get('sala')
+        
+        return False
+    
     def conectar_nos_proximos(self, distancia_maxima: float = 150.0, 
                              conectar_portas_a_salas: bool = True):
         """
         Conecta nós que estão próximos uns dos outros
         
+        Usa uma grade uniforme com células de lado distancia_maxima: dois nós
+        a até distancia_maxima de distância estão sempre em células vizinhas,
+        então só esses pares (mais os pares porta/centro da mesma sala, que
+        não dependem de distância) são avaliados. As arestas e a ordem delas
+        são as mesmas da comparação de todos os pares.
+        
         Args:
             distancia_maxima: Distância máxima para criar conexão
             conectar_portas_a_salas: Se deve conectar portas aos centros das salas
         """
+        if distancia_maxima <= 0:
+            return self._conectar_nos_proximos_todos_pares(distancia_maxima, conectar_portas_a_salas)
+        
         print(f"\n🔗 Conectando nós (distância máxima: {distancia_maxima}px)...")
         
         ids = list(self.nos.keys())
         conexoes_criadas = 0
         
+        # Indexar nós por célula da grade e por sala
+        grade = {}
+        nos_por_sala = {}
+        for i, nid in enumerate(ids):
+            no = self.nos[nid]
+            celula = (math.floor(no['x'] / distancia_maxima), math.floor(no['y'] / distancia_maxima))
+            grade.setdefault(celula, []).append(i)
+            
+            if conectar_portas_a_salas and no['tipo'] in ('porta', 'sala_centro'):
+                nos_por_sala.setdefault(no.get('sala'), []).append(i)
+        
         for i, id1 in enumerate(ids):
             no1 = self.nos[id1]
+            cx = math.floor(no1['x'] / distancia_maxima)
+            cy = math.floor(no1['y'] / distancia_maxima)
             
-            for id2 in ids[i+1:]:
+            # Candidatos: células vizinhas + nós da mesma sala
+            candidatos = set()
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for j in grade.get((cx + dx, cy + dy), ()):
+                        if j > i:
+                            candidatos.add(j)
+            
+            if conectar_portas_a_salas and no1['tipo'] in ('porta', 'sala_centro'):
+                for j in nos_por_sala[no1.get('sala')]:
+                    if j > i:
+                        candidatos.add(j)
+            
+            # Ordem crescente preserva a ordem de criação das arestas
+            for j in sorted(candidatos):
+                id2 = ids[j]
                 no2 = self.nos[id2]
-                
-                # Calcular distância
                 dist = self.calcular_distancia(id1, id2)
                 
-                # Regras de conexão
-                deve_conectar = False
-                
-                # Caso 1: Nós de corredor entre si
-                if no1['tipo'] == 'corredor' and no2['tipo'] == 'corredor':
-                    if dist <= distancia_maxima:
-                        deve_conectar = True
-                
-                # Caso 2: Nós de corredor com portas
-                elif (no1['tipo'] == 'corredor' and no2['tipo'] == 'porta') or \
-                     (no1['tipo'] == 'porta' and no2['tipo'] == 'corredor'):
-                    if dist <= distancia_maxima * 0.8:  # Distância menor para portas
-                        deve_conectar = True
-                
-                # Caso 3: Nós de corredor com saídas
-                elif (no1['tipo'] == 'corredor' and no2['tipo'] == 'saida') or \
-                     (no1['tipo'] == 'saida' and no2['tipo'] == 'corredor'):
-                    if dist <= distancia_maxima:
-                        deve_conectar = True
-                
-                # Caso 4: Portas com centros de suas próprias salas
-                elif conectar_portas_a_salas:
-                    if no1['tipo'] == 'porta' and no2['tipo'] == 'sala_centro':
-                        if no1.get('sala') == no2.get('sala'):
-                            deve_conectar = True
-                    elif no2['tipo'] == 'porta' and no1['tipo'] == 'sala_centro':
-                        if no2.get('sala') == no1.get('sala'):
-                            deve_conectar = True
+                if self._deve_conectar(no1, no2, dist, distancia_maxima, conectar_portas_a_salas):
+                    self.arestas.append((id1, id2, dist))
+                    no1['conexoes'].append(id2)
+                    no2['conexoes'].append(id1)
+                    conexoes_criadas += 1
+        
+        print(f"   ✓ {conexoes_criadas} conexões criadas")
+    
+    def _conectar_nos_proximos_todos_pares(self, distancia_maxima: float = 150.0,
+                                           conectar_portas_a_salas: bool = True):
+        """
+        Versão de referência de conectar_nos_proximos: compara todos os pares
+        (O(n²)). Usada como fallback e no benchmark_conexoes.py
+        """
+        print(f"\n🔗 Conectando nós (distância máxima: {distancia_maxima}px)...")
+        
+        ids = list(self.nos.keys())
+        conexoes_criadas = 0
+        
+        for i, id1 in enumerate(ids):
+            no1 = self.nos[id1]
+            
+            for id2 in ids[i+1:]:
+                no2 = self.nos[id2]
+                dist = self.calcular_distancia(id1, id2)
                 
-                # Criar conexão se aplicável
-                if deve_conectar:
+                if self._deve_conectar(no1, no2, dist, distancia_maxima, conectar_portas_a_salas):
                     self.arestas.append((id1, id2, dist))
                     no1['conexoes'].append(id2)
                     no2['conexoes'].append(id1)
@@ -185,6 +285,110 @@ class GrafoNavegacao:
         
         return False
     
+    def _adjacencia_ponderada(self) -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Lista de adjacência com os pesos das arestas
+
+        Os pesos são os mesmos que GrafoCompilado usa ao carregar o JSON:
+        distância euclidiana das coordenadas para arestas horizontais e a
+        'distancia' gravada (arredondada a 2 casas) para as verticais. Assim
+        as distâncias de landmark são exatas para o grafo que a busca percorre.
+        """
+        adjacencia = {nid: [] for nid in self.nos}
+        for id1, id2, dist in self.arestas:
+            if (id1, id2) in self.arestas_verticais:
+                dist = round(dist, 2)
+            adjacencia[id1].append((id2, dist))
+            adjacencia[id2].append((id1, dist))
+        return adjacencia
+    
+    def _distancias_a_partir_de(self, origem: str,
+                                adjacencia: Dict[str, List[Tuple[str, float]]]) -> Dict[str, float]:
+        """
+        Dijkstra a partir de um nó, usando os pesos das arestas
+        """
+        distancias = {origem: 0.0}
+        fila = [(0.0, origem)]
+        
+        while fila:
+            dist_atual, atual = heapq.heappop(fila)
+            
+            if dist_atual > distancias[atual]:
+                continue
+            
+            for vizinho, peso in adjacencia[atual]:
+                nova_dist = dist_atual + peso
+                if nova_dist < distancias.get(vizinho, math.inf):
+                    distancias[vizinho] = nova_dist
+                    heapq.heappush(fila, (nova_dist, vizinho))
+        
+        return distancias
+    
+    def preprocessar_landmarks(self, num_landmarks: int = NUM_LANDMARKS) -> Optional[Dict]:
+        """
+        Escolhe landmarks e guarda a distância de cada nó até cada um deles
+        
+        Com essas distâncias o A* usa o limite inferior da desigualdade
+        triangular |d(L, destino) - d(L, nó)|, bem mais forte que a distância
+        euclidiana em plantas com corredores longos sem saída.
+        
+        Os landmarks são escolhidos por "ponto mais distante": cada novo
+        landmark é o nó cuja menor distância aos já escolhidos é máxima
+        (nós inalcançáveis têm prioridade, para cobrir outros componentes).
+        
+        Args:
+            num_landmarks: Quantidade de landmarks
+        
+        Returns:
+            Dicionário com 'ids' e 'distancias' (também salvo em self.landmarks)
+        """
+        if not self.nos or num_landmarks <= 0:
+            self.landmarks = None
+            return None
+        
+        print(f"\n📍 Calculando {num_landmarks} landmarks (heurística ALT)...")
+        
+        ids = list(self.nos.keys())
+        adjacencia = self._adjacencia_ponderada()
+        
+        # Primeiro landmark: nó mais distante de um nó qualquer
+        dist_inicial = self._distancias_a_partir_de(ids[0], adjacencia)
+        menor_dist = {nid: dist_inicial.get(nid, math.inf) for nid in ids}
+        
+        landmarks = []
+        vetores = []
+        
+        for _ in range(min(num_landmarks, len(ids))):
+            candidato = max(
+                (nid for nid in ids if nid not in landmarks),
+                key=lambda nid: menor_dist[nid]
+            )
+            distancias = self._distancias_a_partir_de(candidato, adjacencia)
+            
+            landmarks.append(candidato)
+            vetores.append(distancias)
+            
+            for nid in ids:
+                d = distancias.get(nid, math.inf)
+                if len(landmarks) == 1 or d < menor_dist[nid]:
+                    menor_dist[nid] = d
+        
+        self.landmarks = {
+            'ids': landmarks,
+            # None = nó inalcançável a partir do landmark
+            'distancias': {
+                nid: [
+                    round(v[nid], 4) if nid in v else None
+                    for v in vetores
+                ]
+                for nid in ids
+            }
+        }
+        
+        print(f"   ✓ Landmarks: {landmarks}")
+        
+        return self.landmarks
+    
     def validar_grafo(self) -> Dict:
         """
         Valida o grafo e retorna estatísticas
@@ -226,7 +430,8 @@ class GrafoNavegacao:
     
     def salvar_grafo(self, caminho_saida: str):
         """
-        Salva o grafo em formato JSON
+        Salva o grafo em formato JSON e o snapshot binário (.snap) ao lado,
+        que é o que a API carrega
         """
         print(f"\n💾 Salvando grafo...")
         
@@ -237,13 +442,17 @@ class GrafoNavegacao:
                 {
                     'origem': a[0],
                     'destino': a[1],
-                    'distancia': round(a[2], 2)
+                    'distancia': round(a[2], 2),
+                    **({'tipo': 'vertical'} if (a[0], a[1]) in self.arestas_verticais else {})
                 }
                 for a in self.arestas
             ],
             'validacao': self.validar_grafo()
         }
         
+        if self.landmarks:
+            grafo_data['landmarks'] = self.landmarks
+        
         output_path = Path(caminho_saida)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
@@ -252,6 +461,13 @@ class GrafoNavegacao:
         
         print(f"   ✓ Grafo salvo em: {output_path}")
         
+        # Compilado do mesmo dicionário; a assinatura do JSON permite à API
+        # saber se o snapshot ainda corresponde a ele
+        snapshot_path = GrafoCompilado.de_dict(grafo_data).salvar_snapshot(
+            caminho_snapshot(output_path), {'fonte': assinatura_fonte(output_path)}
+        )
+        print(f"   ✓ Snapshot salvo em: {snapshot_path}")
+        
         return str(output_path)
     
     def exportar_para_visualizacao(self, caminho_saida: str):
@@ -287,9 +503,85 @@ class GrafoNavegacao:
         
         print(f"   ✓ Dados de visualização salvos em: {output_path}")
 
-def processar_building_a_grafos():
+def combinar_andares(predio: str, grafos_andares: Dict[str, GrafoNavegacao],
+                     custos: Optional[Dict[str, float]] = None) -> GrafoNavegacao:
+    """
+    Junta os grafos de cada andar em um único grafo do prédio
+    
+    Os IDs passam a ter o andar como prefixo ("A2:Room_2001") e o número
+    das salas também ("A2:2001"), para não colidir entre andares. Escadas e
+    elevadores com o mesmo ID em andares diferentes são tratados como o
+    mesmo poço e ligados por arestas verticais:
+    - escada: entre andares consecutivos, custos['escada'] por andar
+    - elevador: entre quaisquer dois andares, espera + custo por andar
+    O custo nunca é menor que a distância em planta entre os dois nós,
+    para manter a heurística euclidiana admissível.
+    
+    Args:
+        predio: Referência do prédio (ex: 'A')
+        grafos_andares: {andar: GrafoNavegacao}, na ordem dos andares
+        custos: Sobrescreve valores de CUSTOS_TRANSICAO
+    
+    Returns:
+        GrafoNavegacao do prédio inteiro
+    """
+    custos = {**CUSTOS_TRANSICAO, **(custos or {})}
+    
+    print(f"\n🏢 Combinando andares {list(grafos_andares.keys())} do prédio {predio}...")
+    
+    grafo = GrafoNavegacao(predio)
+    pocos = {}  # {(tipo, id original): [(ordem do andar, id qualificado)]}
+    
+    for ordem, (andar, grafo_andar) in enumerate(grafos_andares.items()):
+        for nid, no in grafo_andar.nos.items():
+            novo = {
+                **no,
+                'andar': andar,
+                'conexoes': [f'{andar}:{c}' for c in no['conexoes']]
+            }
+            if no.get('sala') is not None:
+                novo['sala'] = f"{andar}:{no['sala']}"
+            grafo.nos[f'{andar}:{nid}'] = novo
+            
+            if no['tipo'] in ('escada', 'elevador'):
+                pocos.setdefault((no['tipo'], nid), []).append((ordem, f'{andar}:{nid}'))
+        
+        grafo.arestas.extend(
+            (f'{andar}:{id1}', f'{andar}:{id2}', dist)
+            for id1, id2, dist in grafo_andar.arestas
+        )
+    
+    transicoes = 0
+    for (tipo, _), nos_poco in pocos.items():
+        for i, (ordem1, id1) in enumerate(nos_poco):
+            for ordem2, id2 in nos_poco[i + 1:]:
+                andares = abs(ordem2 - ordem1)
+                
+                if tipo == 'escada':
+                    if andares != 1:
+                        continue
+                    custo = custos['escada']
+                else:
+                    custo = custos['elevador_espera'] + custos['elevador_andar'] * andares
+                
+                custo = max(custo, grafo.calcular_distancia(id1, id2))
+                
+                grafo.arestas.append((id1, id2, custo))
+                grafo.arestas_verticais.add((id1, id2))
+                grafo.nos[id1]['conexoes'].append(id2)
+                grafo.nos[id2]['conexoes'].append(id1)
+                transicoes += 1
+    
+    print(f"   ✓ {len(grafo.nos)} nós, {transicoes} transições verticais")
+    
+    return grafo
+
+def processar_building_a_grafos(num_landmarks: int = NUM_LANDMARKS):
     """
     Processa grafos para todos os andares do Building A
+    
+    Args:
+        num_landmarks: Landmarks da heurística ALT por andar (0 desativa)
     """
     print("="*60)
     print("🏗️  CRIANDO GRAFOS DE NAVEGAÇÃO - BUILDING A")
@@ -301,6 +593,7 @@ def processar_building_a_grafos():
     grafos_dir.mkdir(parents=True, exist_ok=True)
     
     resultados = {}
+    grafos_andares = {}
     
     # Processar cada andar
     for andar in ['A1', 'A2', 'A3']:
@@ -328,6 +621,9 @@ def processar_building_a_grafos():
         distancia_maxima = 200.0 if andar == 'A1' else 150.0
         grafo.conectar_nos_proximos(distancia_maxima=distancia_maxima)
         
+        # Pré-processamento opcional da heurística ALT
+        grafo.preprocessar_landmarks(num_landmarks)
+        
         # Salvar grafo
         grafo_path = grafos_dir / f'building_a_{andar.lower()}_grafo.json'
         grafo.salvar_grafo(str(grafo_path))
@@ -336,6 +632,7 @@ def processar_building_a_grafos():
         vis_path = grafos_dir / f'building_a_{andar.lower()}_vis.json'
         grafo.exportar_para_visualizacao(str(vis_path))
         
+        grafos_andares[andar] = grafo
         resultados[andar] = {
             'grafo_path': str(grafo_path),
             'vis_path': str(vis_path),
@@ -343,6 +640,28 @@ def processar_building_a_grafos():
             'total_arestas': len(grafo.arestas)
         }
     
+    # Grafo do prédio inteiro, com escadas e elevadores entre andares
+    if grafos_andares:
+        print(f"\n{'='*60}")
+        print("Processando prédio inteiro")
+        print(f"{'='*60}")
+        
+        grafo = combinar_andares('A', grafos_andares)
+        grafo.preprocessar_landmarks(num_landmarks)
+        
+        grafo_path = grafos_dir / 'building_a_grafo.json'
+        grafo.salvar_grafo(str(grafo_path))
+        
+        vis_path = grafos_dir / 'building_a_vis.json'
+        grafo.exportar_para_visualizacao(str(vis_path))
+        
+        resultados['A'] = {
+            'grafo_path': str(grafo_path),
+            'vis_path': str(vis_path),
+            'total_nos': len(grafo.nos),
+            'total_arestas': len(grafo.arestas)
+        }
+    
     # Resumo final
     print(f"\n{'='*60}")
     print("✅ PROCESSAMENTO COMPLETO")
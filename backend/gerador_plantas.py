@@ -0,0 +1,245 @@
+"""
+Gerador de plantas sintéticas
+Produz arquivos building_<predio>_<andar>_elementos.json no mesmo formato
+do extrair_salas_svg.py, com o número de salas pedido, para testar e medir
+a criação de grafos e o pathfinding em escalas maiores que a do Building A.
+
+Layout de cada andar: um corredor principal (espinha) com alas
+perpendiculares alternando para cima e para baixo; os corredores têm salas
+dos dois lados, com larguras variadas e de 1 a 3 portas conforme a
+largura. Há saídas nas pontas dos corredores e escadas/elevadores nos
+cruzamentos. A estrutura (corredores, saídas, escadas e elevadores) só
+depende do número de salas e da semente, então andares gerados juntos
+compartilham os poços e podem ser combinados com combinar_andares.
+
+Uso:
+    python gerador_plantas.py 500 --predio Z --andares Z1 Z2 Z3
+"""
+
+import argparse
+import json
+import math
+import random
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+# Dimensões em pixels (~0.1 m por pixel, como nos SVGs do campus)
+LARGURA_CORREDOR = 40.0
+PROFUNDIDADE_SALA = (100.0, 140.0)
+LARGURA_SALA = (60.0, 160.0)
+ESPACAMENTO_NOS = 50.0
+# Espaço livre nos cruzamentos entre a espinha e as alas
+FOLGA_CRUZAMENTO = 60.0
+# Comprimento médio de corredor por sala (duas fileiras de salas)
+CORREDOR_POR_SALA = (LARGURA_SALA[0] + LARGURA_SALA[1]) / 4
+
+def _estrutura(num_salas: int, seed: int) -> Dict:
+    """
+    Corredores, cruzamentos e dimensões do andar (iguais em todos os andares)
+    """
+    rnd = random.Random(seed)
+
+    comprimento_total = num_salas * CORREDOR_POR_SALA * 1.1
+    num_alas = max(1, round(math.sqrt(num_salas) / 4))
+    comprimento_espinha = max(400.0, comprimento_total * 0.35)
+    comprimento_ala = max(300.0, comprimento_total * 0.65 / num_alas)
+
+    y_espinha = comprimento_ala + 200.0
+    x_inicio = 100.0
+
+    # Alas alternam de lado; as de um mesmo lado ficam igualmente espaçadas
+    por_lado = math.ceil(num_alas / 2)
+    passo = comprimento_espinha / (por_lado + 1)
+    alas = []
+    for a in range(num_alas):
+        lado = -1 if a % 2 == 0 else 1
+        posicao = a // 2 + 1
+        # Deslocar o lado de baixo para as alas não ficarem alinhadas
+        x = x_inicio + passo * posicao + (passo / 2 if lado == 1 and por_lado > 1 else 0.0)
+        x = min(x, x_inicio + comprimento_espinha - FOLGA_CRUZAMENTO)
+        alas.append({'x': round(x + rnd.uniform(-10, 10), 2), 'lado': lado})
+
+    return {
+        'x_inicio': x_inicio,
+        'y_espinha': y_espinha,
+        'comprimento_espinha': comprimento_espinha,
+        'comprimento_ala': comprimento_ala,
+        'alas': alas
+    }
+
+def _pontos_corredor(inicio: Tuple[float, float], fim: Tuple[float, float]) -> List[Tuple[float, float]]:
+    """
+    Pontos a cada ESPACAMENTO_NOS ao longo de um corredor reto
+    """
+    comprimento = math.dist(inicio, fim)
+    passos = max(1, math.ceil(comprimento / ESPACAMENTO_NOS))
+    return [
+        (round(inicio[0] + (fim[0] - inicio[0]) * k / passos, 2),
+         round(inicio[1] + (fim[1] - inicio[1]) * k / passos, 2))
+        for k in range(passos + 1)
+    ]
+
+def gerar_planta(num_salas: int, andar: str = 'Z1', seed: int = 42,
+                 seed_estrutura: int = 0) -> Dict:
+    """
+    Gera os elementos de um andar sintético
+
+    Args:
+        num_salas: Número aproximado de salas (o layout arredonda para
+                   preencher os corredores)
+        andar: Nome do andar; o dígito final vira o prefixo das salas
+               (Z2 -> salas 2001, 2002, ...)
+        seed: Semente das salas e portas deste andar
+        seed_estrutura: Semente dos corredores, compartilhada entre andares
+
+    Returns:
+        Dicionário com salas, portas, saidas, nos_corredor e outros
+    """
+    rnd = random.Random(f'{seed}:{andar}')
+    estrutura = _estrutura(num_salas, seed_estrutura)
+    digito = ''.join(c for c in andar if c.isdigit())[-1:] or '1'
+
+    elementos = {'salas': [], 'portas': [], 'saidas': [], 'nos_corredor': [], 'outros': []}
+
+    x0 = estrutura['x_inicio']
+    y0 = estrutura['y_espinha']
+    x1 = x0 + estrutura['comprimento_espinha']
+    comprimento_ala = estrutura['comprimento_ala']
+
+    # Corredores: (id, início, fim, trechos livres de salas)
+    corredores = [('E', (x0, y0), (x1, y0), [ala['x'] for ala in estrutura['alas']])]
+    for a, ala in enumerate(estrutura['alas']):
+        # A ala começa depois das salas da espinha
+        recuo = LARGURA_CORREDOR / 2 + PROFUNDIDADE_SALA[1] + 10.0
+        inicio = (ala['x'], y0 + ala['lado'] * recuo)
+        fim = (ala['x'], y0 + ala['lado'] * (recuo + comprimento_ala))
+        corredores.append((f'W{a}', inicio, fim, []))
+
+    # Nós de corredor (a ala liga-se à espinha pelo próprio eixo)
+    for nome, inicio, fim, _ in corredores:
+        if nome != 'E':
+            inicio = (inicio[0], y0)
+        for k, (x, y) in enumerate(_pontos_corredor(inicio, fim)):
+            elementos['nos_corredor'].append({
+                'id': f'Node_{nome}_{k}', 'x': x, 'y': y, 'tipo_elemento': 'corredor'
+            })
+
+    # Salas e portas dos dois lados de cada corredor
+    contador = 0
+    for nome, inicio, fim, cruzamentos in corredores:
+        horizontal = inicio[1] == fim[1]
+        comprimento = math.dist(inicio, fim)
+        sentido = 1 if (fim[0] - inicio[0] if horizontal else fim[1] - inicio[1]) > 0 else -1
+
+        for lado in (-1, 1):
+            posicao = 20.0
+            while True:
+                largura = rnd.uniform(*LARGURA_SALA)
+                if posicao + largura > comprimento - 20.0:
+                    break
+
+                centro_longo = posicao + largura / 2
+                coordenada = (inicio[0] if horizontal else inicio[1]) + sentido * centro_longo
+                if any(abs(coordenada - c) < largura / 2 + FOLGA_CRUZAMENTO for c in cruzamentos):
+                    posicao += largura + FOLGA_CRUZAMENTO
+                    continue
+
+                contador += 1
+                numero = f'{digito}{contador:03d}'
+                profundidade = rnd.uniform(*PROFUNDIDADE_SALA)
+                afastamento = LARGURA_CORREDOR / 2 + profundidade / 2
+
+                if horizontal:
+                    cx, cy = coordenada, inicio[1] + lado * afastamento
+                    w, h = largura, profundidade
+                else:
+                    cx, cy = inicio[0] + lado * afastamento, coordenada
+                    w, h = profundidade, largura
+
+                elementos['salas'].append({
+                    'id': f'Room_{numero}', 'numero': numero,
+                    'bbox': {'x': round(cx - w / 2, 2), 'y': round(cy - h / 2, 2),
+                             'width': round(w, 2), 'height': round(h, 2)},
+                    'centro': {'x': round(cx, 2), 'y': round(cy, 2)},
+                    'tipo_elemento': 'rect'
+                })
+
+                # Portas na parede voltada para o corredor
+                num_portas = 1 if largura < 100 else (2 if largura < 150 else 3)
+                for p in range(num_portas):
+                    deslocamento = (p + 1) / (num_portas + 1) * largura - largura / 2
+                    parede = LARGURA_CORREDOR / 2 + 2.0
+                    if horizontal:
+                        px, py = cx + deslocamento, inicio[1] + lado * parede
+                    else:
+                        px, py = inicio[0] + lado * parede, cy + deslocamento
+                    elementos['portas'].append({
+                        'id': f'Door_{numero}_{p}', 'sala_relacionada': numero,
+                        'centro': {'x': round(px, 2), 'y': round(py, 2)},
+                        'tipo_elemento': 'rect'
+                    })
+
+                posicao += largura + rnd.uniform(0.0, 10.0)
+
+    # Saídas nas pontas da espinha e no fim de cada ala
+    pontas = [('Exit_E_0', (x0 - 30.0, y0)), ('Exit_E_1', (x1 + 30.0, y0))]
+    for a, (_, _, fim, _) in enumerate(corredores[1:]):
+        pontas.append((f'Exit_W{a}', (fim[0], fim[1] + math.copysign(30.0, fim[1] - y0))))
+    for saida_id, (x, y) in pontas:
+        elementos['saidas'].append({
+            'id': saida_id, 'centro': {'x': round(x, 2), 'y': round(y, 2)}, 'tipo': 'saida'
+        })
+
+    # Escada em cada cruzamento e nas pontas da espinha; elevador no meio
+    poços = [(f'Stair_E_{k}', (x, y0 + 15.0)) for k, x in enumerate((x0 + 25.0, x1 - 25.0))]
+    for a, ala in enumerate(estrutura['alas']):
+        poços.append((f'Stair_W{a}', (ala['x'] + 15.0, y0 - ala['lado'] * 15.0)))
+    poços.append(('Elevator_0', ((x0 + x1) / 2, y0 - 15.0)))
+    for elem_id, (x, y) in poços:
+        elementos['outros'].append({
+            'id': elem_id, 'centro': {'x': round(x, 2), 'y': round(y, 2)}, 'tipo_elemento': 'rect'
+        })
+
+    return elementos
+
+def salvar_planta(elementos: Dict, pasta: str, predio: str, andar: str) -> Path:
+    """
+    Grava building_<predio>_<andar>_elementos.json
+    """
+    caminho = Path(pasta) / f'building_{predio.lower()}_{andar.lower()}_elementos.json'
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(elementos, f, indent=2, ensure_ascii=False)
+
+    return caminho
+
+def gerar_predio(num_salas: int, predio: str, andares: Sequence[str], pasta: str,
+                 seed: int = 42) -> List[Path]:
+    """
+    Gera e grava os elementos de vários andares com a mesma estrutura
+    """
+    caminhos = []
+
+    for andar in andares:
+        elementos = gerar_planta(num_salas, andar, seed)
+        caminho = salvar_planta(elementos, pasta, predio, andar)
+        print(f"   ✓ {andar}: {len(elementos['salas'])} salas, {len(elementos['portas'])} portas, "
+              f"{len(elementos['nos_corredor'])} nós de corredor → {caminho}")
+        caminhos.append(caminho)
+
+    return caminhos
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera plantas sintéticas de andares")
+    parser.add_argument('salas', type=int, help="Salas por andar (aproximado)")
+    parser.add_argument('--predio', default='Z')
+    parser.add_argument('--andares', nargs='+', default=['Z1'])
+    parser.add_argument('--pasta', default=str(Path(__file__).parent / 'dados' / 'sinteticos'))
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("="*60)
+    print(f"🏗️  GERANDO PLANTAS SINTÉTICAS - prédio {args.predio}")
+    print("="*60)
+    gerar_predio(args.salas, args.predio, args.andares, args.pasta, args.seed)
@@ -0,0 +1,285 @@
+"""
+Representação compilada dos grafos de navegação interna
+Converte o JSON gerado por GrafoNavegacao.salvar_grafo em arrays:
+IDs internados como inteiros, adjacência CSR com pesos pré-calculados
+e coordenadas em arrays NumPy
+"""
+
+import json
+import math
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+from snapshot_grafo import Snapshot, codificar_strings, escrever_snapshot, ler_snapshot
+
+# Tipo gravado no cabeçalho dos snapshots de GrafoCompilado
+TIPO_SNAPSHOT = 'grafo_compilado'
+
+# A partir de quantas portas a escolha da mais próxima é feita com NumPy
+LIMIAR_PORTAS_VETORIZADO = 8
+
+# Folga subtraída do limite ALT para compensar o arredondamento das
+# distâncias de landmark gravadas no JSON (4 casas: erro <= 1e-4 por
+# diferença). Os landmarks são calculados sobre os mesmos pesos que
+# de_dict monta, então o arredondamento das arestas não entra aqui
+FOLGA_LANDMARKS = 1e-3
+
+class GrafoCompilado:
+    """
+    Grafo de navegação interno em formato compacto (CSR)
+
+    Cada nó é identificado por um índice inteiro em [0, n). Os vizinhos do
+    nó i estão em indices[indptr[i]:indptr[i+1]] e os pesos correspondentes
+    (distância euclidiana em pixels, ou o custo da transição nas arestas
+    entre andares) em pesos[indptr[i]:indptr[i+1]].
+    """
+
+    def __init__(self, andar: Optional[str], ids: List[str], tipos: List[str],
+                 salas: List[Optional[str]], xs: np.ndarray, ys: np.ndarray,
+                 indptr: np.ndarray, indices: np.ndarray, pesos: np.ndarray,
+                 landmarks: Optional[np.ndarray] = None,
+                 andares: Optional[List[Optional[str]]] = None):
+        self.andar = andar
+        self.ids = ids
+        self.indice = {nid: i for i, nid in enumerate(ids)}
+        self.tipos = tipos
+        self.salas = salas
+        # Andar de cada nó (apenas no grafo do prédio inteiro)
+        self.andares = andares or [None] * len(ids)
+        self.xs = xs
+        self.ys = ys
+        self.indptr = indptr
+        self.indices = indices
+        self.pesos = pesos
+        # Distâncias (k landmarks x n nós) para a heurística ALT, ou None
+        self.landmarks = landmarks
+
+        # Listas Python derivadas dos arrays para o laço do A*:
+        # indexação escalar de ndarray é bem mais lenta que de list
+        self._xs = xs.tolist()
+        self._ys = ys.tolist()
+        indptr_l = indptr.tolist()
+        indices_l = indices.tolist()
+        pesos_l = pesos.tolist()
+        self._adjacencia = [
+            list(zip(indices_l[indptr_l[i]:indptr_l[i + 1]],
+                     pesos_l[indptr_l[i]:indptr_l[i + 1]]))
+            for i in range(len(ids))
+        ]
+
+        # Índice sala -> portas e sala -> centro
+        portas_por_sala: Dict[str, List[int]] = {}
+        self.centro_por_sala: Dict[str, int] = {}
+        for i, (tipo, sala) in enumerate(zip(tipos, salas)):
+            if tipo == 'porta':
+                portas_por_sala.setdefault(sala, []).append(i)
+            elif tipo == 'sala_centro':
+                self.centro_por_sala[sala] = i
+
+        self.portas_por_sala: Dict[str, List[int]] = portas_por_sala
+        self._portas_array = {
+            sala: np.asarray(portas, dtype=np.int64)
+            for sala, portas in portas_por_sala.items()
+            if len(portas) >= LIMIAR_PORTAS_VETORIZADO
+        }
+
+    @property
+    def num_nos(self) -> int:
+        return len(self.ids)
+
+    @property
+    def num_arestas(self) -> int:
+        # Arestas não direcionadas aparecem duas vezes no CSR
+        return len(self.indices) // 2
+
+    @classmethod
+    def de_dict(cls, grafo: Dict) -> 'GrafoCompilado':
+        """
+        Compila o dicionário produzido por GrafoNavegacao.salvar_grafo
+
+        Args:
+            grafo: Dicionário com 'nos' (e opcionalmente 'andar')
+
+        Returns:
+            GrafoCompilado equivalente
+        """
+        nos = grafo['nos']
+        ids = list(nos.keys())
+        indice = {nid: i for i, nid in enumerate(ids)}
+        n = len(ids)
+
+        xs = np.fromiter((nos[nid]['x'] for nid in ids), dtype=np.float64, count=n)
+        ys = np.fromiter((nos[nid]['y'] for nid in ids), dtype=np.float64, count=n)
+        tipos = [nos[nid]['tipo'] for nid in ids]
+        salas = [nos[nid].get('sala') for nid in ids]
+        andares = [nos[nid].get('andar') for nid in ids]
+
+        # Montar CSR a partir das listas de conexões
+        graus = np.fromiter((len(nos[nid]['conexoes']) for nid in ids),
+                            dtype=np.int64, count=n)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(graus, out=indptr[1:])
+
+        indices = np.fromiter(
+            (indice[viz] for nid in ids for viz in nos[nid]['conexoes']),
+            dtype=np.int32, count=int(indptr[-1])
+        )
+        origens = np.repeat(np.arange(n, dtype=np.int32), graus)
+        pesos = np.hypot(xs[origens] - xs[indices], ys[origens] - ys[indices])
+
+        # Transições entre andares têm custo próprio, gravado na aresta
+        for aresta in grafo.get('arestas', []):
+            if aresta.get('tipo') == 'vertical':
+                i, j = indice[aresta['origem']], indice[aresta['destino']]
+                for a, b in ((i, j), (j, i)):
+                    inicio, fim = indptr[a], indptr[a + 1]
+                    pesos[inicio + np.flatnonzero(indices[inicio:fim] == b)] = aresta['distancia']
+
+        # Distâncias de landmark gravadas por GrafoNavegacao.preprocessar_landmarks
+        landmarks = None
+        if grafo.get('landmarks'):
+            distancias = grafo['landmarks']['distancias']
+            landmarks = np.array(
+                [[math.inf if d is None else d for d in distancias[nid]] for nid in ids],
+                dtype=np.float64
+            ).T.copy()
+
+        return cls(grafo.get('andar'), ids, tipos, salas, xs, ys, indptr, indices, pesos,
+                   landmarks, andares)
+
+    @classmethod
+    def carregar(cls, caminho: str) -> 'GrafoCompilado':
+        """
+        Carrega e compila um arquivo building_*_grafo.json
+        """
+        with open(caminho, 'r', encoding='utf-8') as f:
+            grafo = json.load(f)
+
+        return cls.de_dict(grafo)
+
+    def salvar_snapshot(self, caminho: Union[str, Path], meta: Optional[Dict] = None) -> Path:
+        """
+        Grava o grafo no formato binário de snapshot_grafo
+
+        Args:
+            caminho: Arquivo .snap de saída
+            meta: Dados extras (ex: 'fonte' com a assinatura do JSON)
+        """
+        secoes = {
+            'xs': self.xs.astype(np.float64, copy=False),
+            'ys': self.ys.astype(np.float64, copy=False),
+            'indptr': self.indptr.astype(np.int64, copy=False),
+            'indices': self.indices.astype(np.int32, copy=False),
+            'pesos': self.pesos.astype(np.float64, copy=False)
+        }
+        if self.landmarks is not None:
+            secoes['landmarks'] = self.landmarks.astype(np.float64, copy=False)
+        secoes.update(codificar_strings({
+            'ids': self.ids, 'tipos': self.tipos, 'salas': self.salas, 'andares': self.andares
+        }))
+
+        return escrever_snapshot(caminho, TIPO_SNAPSHOT, secoes, {'andar': self.andar, **(meta or {})})
+
+    @classmethod
+    def de_snapshot(cls, snapshot: Snapshot) -> 'GrafoCompilado':
+        """
+        Monta o grafo sobre os arrays mapeados do snapshot (sem cópia)
+        """
+        ids, tipos, salas, andares = snapshot.strings('ids', 'tipos', 'salas', 'andares')
+        landmarks = snapshot.array('landmarks') if 'landmarks' in snapshot else None
+
+        return cls(snapshot.meta.get('andar'), ids, tipos, salas,
+                   snapshot.array('xs'), snapshot.array('ys'), snapshot.array('indptr'),
+                   snapshot.array('indices'), snapshot.array('pesos'), landmarks, andares)
+
+    @classmethod
+    def carregar_snapshot(cls, caminho: Union[str, Path]) -> 'GrafoCompilado':
+        """
+        Abre um arquivo .snap gravado por salvar_snapshot
+
+        Raises:
+            SnapshotInvalido: arquivo de outro formato ou versão
+        """
+        return cls.de_snapshot(ler_snapshot(caminho, TIPO_SNAPSHOT))
+
+    def heuristica_para(self, destinos: Union[int, Sequence[int]],
+                        usar_landmarks: bool = True) -> List[float]:
+        """
+        Limite inferior da distância de todos os nós até o destino mais
+        próximo (vetorizado)
+
+        Usa a distância euclidiana e, se o grafo tiver landmarks, o maior
+        entre ela e o limite ALT max_L |d(L, destino) - d(L, nó)|.
+        """
+        if isinstance(destinos, int):
+            destinos = (destinos,)
+
+        h = None
+        for d in destinos:
+            h_d = np.hypot(self.xs - self.xs[d], self.ys - self.ys[d])
+
+            if usar_landmarks and self.landmarks is not None:
+                with np.errstate(invalid='ignore'):
+                    diferencas = np.abs(self.landmarks[:, d:d + 1] - self.landmarks)
+                # inf - inf (nó e destino fora do alcance do landmark) não limita nada
+                diferencas[np.isnan(diferencas)] = 0.0
+                np.maximum(h_d, diferencas.max(axis=0) - FOLGA_LANDMARKS, out=h_d)
+
+            h = h_d if h is None else np.minimum(h, h_d, out=h)
+
+        return h.tolist()
+
+    def portas_da_sala(self, numero_sala: str) -> List[int]:
+        """
+        Índices das portas de uma sala
+        """
+        return self.portas_por_sala.get(numero_sala, [])
+
+    def porta_mais_proxima(self, numero_sala: str, x: float, y: float) -> Optional[int]:
+        """
+        Porta da sala mais próxima (em linha reta) do ponto (x, y)
+        """
+        portas = self.portas_por_sala.get(numero_sala)
+
+        if not portas:
+            return None
+
+        if numero_sala in self._portas_array:
+            indices = self._portas_array[numero_sala]
+            distancias = np.hypot(self.xs[indices] - x, self.ys[indices] - y)
+            return int(indices[np.argmin(distancias)])
+
+        xs, ys = self._xs, self._ys
+        return min(portas, key=lambda p: (xs[p] - x) ** 2 + (ys[p] - y) ** 2)
+
+    def salas_com_multiplas_portas(self) -> Dict[str, List[str]]:
+        """
+        Salas com mais de uma porta e os IDs dessas portas
+        """
+        return {
+            sala: [self.ids[p] for p in portas]
+            for sala, portas in self.portas_por_sala.items()
+            if len(portas) > 1
+        }
+
+    def no_detalhado(self, i: int) -> Dict:
+        """
+        Dados de um nó no formato usado nas respostas da API
+        """
+        no = {
+            'id': self.ids[i],
+            'tipo': self.tipos[i],
+            'x': self._xs[i],
+            'y': self._ys[i]
+        }
+        if self.andares[i] is not None:
+            no['andar'] = self.andares[i]
+        return no
+
+def compilar_grafo(grafo) -> GrafoCompilado:
+    """
+    Retorna o grafo compilado, compilando dicionários quando necessário
+    """
+    if isinstance(grafo, GrafoCompilado):
+        return grafo
+    return GrafoCompilado.de_dict(grafo)
@@ -3,10 +3,20 @@ Campus building navigation system
 Creates connection graph between buildings and calculates routes
 """
 
+import heapq
 import json
 import math
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
+import numpy as np
+from metricas import ROTA_COMPRIMENTO, ROTA_NAO_ENCONTRADA
+from snapshot_grafo import (SnapshotInvalido, assinatura_fonte, caminho_snapshot, codificar_strings,
+                            escrever_snapshot, fonte_confere, ler_snapshot)
+import rastreamento
+from rastreamento import AVISO, INFO
+
+# Header type of GrafoPredios snapshots
+TIPO_SNAPSHOT = 'grafo_predios'
 
 class GrafoPredios:
     """
@@ -17,11 +27,23 @@ class GrafoPredios:
         self.predios = {}  # {id: {nome, ref, coords, centroide}}
         self.conexoes = []  # [(predio1, predio2, distancia)]
         self.vizinhos = {}  # {predio_id: [connected predio_ids]}
+        
+        # All-pairs route table, rebuilt whenever the graph changes
+        self._pesos = {}  # {(predio1, predio2): distancia}
+        self._distancias = {}  # {origem: {destino: distancia}}
+        self._anteriores = {}  # {origem: {destino: predio anterior no caminho}}
+        self._tabela_valida = False
+        
+        # Where the graph came from, recorded in the snapshot
+        self.caminho_geojson = None
+        self.distancia_maxima = None
     
     def carregar_geojson(self, caminho_geojson: str):
         """
         Load buildings from GeoJSON and calculate centroids
         """
+        self.caminho_geojson = caminho_geojson
+        
         with open(caminho_geojson, 'r', encoding='utf-8') as f:
             geojson = json.load(f)
         
@@ -53,6 +75,8 @@ class GrafoPredios:
                     
                     self.vizinhos[predio_id] = []
         
+        self._tabela_valida = False
+        
         print(f"   ✅ {len(self.predios)} buildings loaded")
         
         # List buildings
@@ -106,6 +130,8 @@ class GrafoPredios:
         """
         print(f"\n🔗 Creating connections between buildings (max distance: {distancia_maxima}m)...")
         
+        self.distancia_maxima = distancia_maxima
+        
         predios_ids = list(self.predios.keys())
         conexoes_criadas = 0
         
@@ -120,12 +146,12 @@ class GrafoPredios:
                 
                 # If they are close, create connection
                 if dist <= distancia_maxima:
-                    self.conexoes.append((pid1, pid2, dist))
-                    self.vizinhos[pid1].append(pid2)
-                    self.vizinhos[pid2].append(pid1)
+                    self._registrar_conexao(pid1, pid2, dist)
                     conexoes_criadas += 1
         
         print(f"   ✅ {conexoes_criadas} connections created")
+        
+        self._construir_tabela_rotas()
     
     def adicionar_conexao_manual(self, predio1: str, predio2: str):
         """
@@ -144,16 +170,79 @@ class GrafoPredios:
         dist = self._distancia_haversine(p1['centroide'], p2['centroide'])
         
         if pid2 not in self.vizinhos[pid1]:
-            self.conexoes.append((pid1, pid2, dist))
-            self.vizinhos[pid1].append(pid2)
-            self.vizinhos[pid2].append(pid1)
+            self._registrar_conexao(pid1, pid2, dist)
+            self._construir_tabela_rotas()
             return True
         
         return False
     
+    def _registrar_conexao(self, pid1: str, pid2: str, dist: float):
+        """
+        Store an undirected connection and its cached weight
+        """
+        self.conexoes.append((pid1, pid2, dist))
+        self.vizinhos[pid1].append(pid2)
+        self.vizinhos[pid2].append(pid1)
+        self._pesos[(pid1, pid2)] = dist
+        self._pesos[(pid2, pid1)] = dist
+        self._tabela_valida = False
+    
+    def _construir_tabela_rotas(self):
+        """
+        Precompute shortest routes between every pair of buildings
+        
+        Runs one Dijkstra per building over the cached edge weights and keeps
+        the distance and predecessor of every reachable destination, so each
+        route query is a walk back along the predecessor chain.
+        """
+        self._distancias = {}
+        self._anteriores = {}
+        
+        for origem in self.predios:
+            distancias = {origem: 0.0}
+            anteriores = {}
+            fila = [(0.0, origem)]
+            
+            while fila:
+                dist_atual, atual = heapq.heappop(fila)
+                
+                if dist_atual > distancias[atual]:
+                    continue
+                
+                for vizinho in self.vizinhos[atual]:
+                    nova_dist = dist_atual + self._pesos[(atual, vizinho)]
+                    
+                    if nova_dist < distancias.get(vizinho, math.inf):
+                        distancias[vizinho] = nova_dist
+                        anteriores[vizinho] = atual
+                        heapq.heappush(fila, (nova_dist, vizinho))
+            
+            self._distancias[origem] = distancias
+            self._anteriores[origem] = anteriores
+        
+        self._tabela_valida = True
+    
+    def _caminho_tabela(self, origem_id: str, destino_id: str) -> Optional[List[str]]:
+        """
+        Rebuild a route from the precomputed table (O(path length))
+        """
+        if not self._tabela_valida:
+            self._construir_tabela_rotas()
+        
+        if destino_id not in self._distancias[origem_id]:
+            return None
+        
+        anteriores = self._anteriores[origem_id]
+        caminho = [destino_id]
+        while caminho[-1] != origem_id:
+            caminho.append(anteriores[caminho[-1]])
+        caminho.reverse()
+        
+        return caminho
+    
     def calcular_rota(self, origem: str, destino: str) -> Optional[Dict]:
         """
-        Calculate route between two buildings using A*
+        Calculate route between two buildings from the precomputed route table
         
         Args:
             origem: Origin building reference (e.g.: "A", "Building A")
@@ -170,98 +259,52 @@ class GrafoPredios:
             return None
         
         if origem_id not in self.predios or destino_id not in self.predios:
-            print(f"   ❌ Building not found: {origem} or {destino}")
+            if rastreamento.ativo(AVISO):
+                rastreamento.registrar(AVISO, f"   ❌ Building not found: {origem} or {destino}")
             return None
         
-        print(f"\n🎯 Calculating route: {self.predios[origem_id]['ref']} → {self.predios[destino_id]['ref']}")
+        if rastreamento.ativo(INFO):
+            rastreamento.registrar(INFO, f"\n🎯 Calculating route: {self.predios[origem_id]['ref']} → "
+                                         f"{self.predios[destino_id]['ref']}")
         
-        # A* pathfinding
-        import heapq
+        caminho = self._caminho_tabela(origem_id, destino_id)
         
-        def heuristica(pid1, pid2):
-            return self._distancia_haversine(
-                self.predios[pid1]['centroide'],
-                self.predios[pid2]['centroide']
-            )
-        
-        # Priority queue
-        contador = 0
-        abertos = [(0, contador, origem_id)]
-        
-        # Costs
-        g_score = {origem_id: 0}
-        f_score = {origem_id: heuristica(origem_id, destino_id)}
+        if caminho is None:
+            ROTA_NAO_ENCONTRADA.inc('predios')
+            if rastreamento.ativo(AVISO):
+                rastreamento.registrar(AVISO, f"   ❌ Nenhuma rota encontrada entre {origem} e {destino}")
+            return None
         
-        # Tracking
-        veio_de = {}
-        conjunto_fechados = set()
+        # Answered from the precomputed table: no nodes expanded per query
+        ROTA_COMPRIMENTO.observar(len(caminho), 'predios')
         
-        while abertos:
-            _, _, atual = heapq.heappop(abertos)
-            
-            if atual in conjunto_fechados:
-                continue
-            
-            if atual == destino_id:
-                # Reconstruir caminho
-                caminho = [atual]
-                while atual in veio_de:
-                    atual = veio_de[atual]
-                    caminho.append(atual)
-                caminho.reverse()
-                
-                # Calcular distância total
-                dist_total = g_score[destino_id]
-                
-                # Criar lista de prédios
-                predios_rota = [
-                    {
-                        'id': pid,
-                        'nome': self.predios[pid]['nome'],
-                        'ref': self.predios[pid]['ref'],
-                        'coords': self.predios[pid]['centroide']
-                    }
-                    for pid in caminho
-                ]
-                
-                print(f"   ✅ Rota encontrada!")
-                print(f"   📏 Distância total: {dist_total:.1f}m")
-                print(f"   🏢 Prédios no caminho: {len(predios_rota)}")
-                print(f"   🗺️  Rota: {' → '.join([p['ref'] for p in predios_rota])}")
-                
-                return {
-                    'origem': predios_rota[0],
-                    'destino': predios_rota[-1],
-                    'caminho': predios_rota,
-                    'distancia_metros': round(dist_total, 1),
-                    'num_predios': len(predios_rota),
-                    'coordenadas_rota': [p['coords'] for p in predios_rota]
-                }
-            
-            conjunto_fechados.add(atual)
-            
-            # Explorar vizinhos
-            for vizinho in self.vizinhos[atual]:
-                if vizinho in conjunto_fechados:
-                    continue
-                
-                dist = self._distancia_haversine(
-                    self.predios[atual]['centroide'],
-                    self.predios[vizinho]['centroide']
-                )
-                
-                tentativa_g = g_score[atual] + dist
-                
-                if vizinho not in g_score or tentativa_g < g_score[vizinho]:
-                    veio_de[vizinho] = atual
-                    g_score[vizinho] = tentativa_g
-                    f_score[vizinho] = tentativa_g + heuristica(vizinho, destino_id)
-                    
-                    contador += 1
-                    heapq.heappush(abertos, (f_score[vizinho], contador, vizinho))
+        dist_total = self._distancias[origem_id][destino_id]
         
-        print(f"   ❌ Nenhuma rota encontrada entre {origem} e {destino}")
-        return None
+        # Criar lista de prédios
+        predios_rota = [
+            {
+                'id': pid,
+                'nome': self.predios[pid]['nome'],
+                'ref': self.predios[pid]['ref'],
+                'coords': self.predios[pid]['centroide']
+            }
+            for pid in caminho
+        ]
+        
+        if rastreamento.ativo(INFO):
+            rastreamento.registrar(INFO, f"   ✅ Rota encontrada!\n"
+                                         f"   📏 Distância total: {dist_total:.1f}m\n"
+                                         f"   🏢 Prédios no caminho: {len(predios_rota)}\n"
+                                         f"   🗺️  Rota: {' → '.join([p['ref'] for p in predios_rota])}")
+        
+        return {
+            'origem': predios_rota[0],
+            'destino': predios_rota[-1],
+            'caminho': predios_rota,
+            'distancia_metros': round(dist_total, 1),
+            'num_predios': len(predios_rota),
+            'coordenadas_rota': [p['coords'] for p in predios_rota]
+        }
     
     def _normalizar_id_predio(self, ref: str) -> Optional[str]:
         """
@@ -310,6 +353,125 @@ class GrafoPredios:
             json.dump(grafo_data, f, indent=2, ensure_ascii=False)
         
         print(f"\n💾 Grafo salvo em: {output_path}")
+        
+        snapshot_path = self.salvar_snapshot(caminho_snapshot(output_path))
+        print(f"💾 Snapshot salvo em: {snapshot_path}")
+    
+    def salvar_snapshot(self, caminho_saida: str) -> Path:
+        """
+        Save buildings, connections and the all-pairs route table in the
+        binary snapshot format (see snapshot_grafo)
+        """
+        if not self._tabela_valida:
+            self._construir_tabela_rotas()
+        
+        ids = list(self.predios.keys())
+        indice = {pid: i for i, pid in enumerate(ids)}
+        n = len(ids)
+        
+        poligonos = [self.predios[pid].get('coords_polygon') or [] for pid in ids]
+        poligono_indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in poligonos], out=poligono_indptr[1:])
+        
+        distancias = np.full((n, n), math.inf)
+        anteriores = np.full((n, n), -1, dtype=np.int32)
+        for origem, destinos in self._distancias.items():
+            for destino, dist in destinos.items():
+                distancias[indice[origem], indice[destino]] = dist
+            for destino, anterior in self._anteriores[origem].items():
+                anteriores[indice[origem], indice[destino]] = indice[anterior]
+        
+        secoes = {
+            'centroides': np.array([self.predios[pid]['centroide'] for pid in ids],
+                                   dtype=np.float64).reshape(n, 2),
+            'poligono_indptr': poligono_indptr,
+            'poligono_coords': np.array([c[:2] for p in poligonos for c in p],
+                                        dtype=np.float64).reshape(-1, 2),
+            'conexoes_origem': np.array([indice[c[0]] for c in self.conexoes], dtype=np.int32),
+            'conexoes_destino': np.array([indice[c[1]] for c in self.conexoes], dtype=np.int32),
+            'conexoes_distancia': np.array([c[2] for c in self.conexoes], dtype=np.float64),
+            'tabela_distancias': distancias,
+            'tabela_anteriores': anteriores
+        }
+        secoes.update(codificar_strings({
+            'ids': ids,
+            'nomes': [self.predios[pid]['nome'] for pid in ids],
+            'refs': [self.predios[pid]['ref'] for pid in ids]
+        }))
+        
+        meta = {
+            'fonte': assinatura_fonte(self.caminho_geojson) if self.caminho_geojson else None,
+            'distancia_maxima': self.distancia_maxima
+        }
+        
+        return escrever_snapshot(caminho_saida, TIPO_SNAPSHOT, secoes, meta)
+    
+    def carregar_snapshot(self, caminho_snapshot: str, caminho_geojson: Optional[str] = None,
+                          distancia_maxima: Optional[float] = None) -> bool:
+        """
+        Load the graph from a snapshot written by salvar_snapshot
+        
+        With caminho_geojson / distancia_maxima the snapshot is only used
+        if it was built from that GeoJSON content with that distance.
+        
+        Returns:
+            True if the graph was loaded, False if the snapshot is missing,
+            stale or invalid (the graph is left unchanged)
+        """
+        if not Path(caminho_snapshot).exists():
+            return False
+        
+        try:
+            snapshot = ler_snapshot(caminho_snapshot, TIPO_SNAPSHOT)
+        except SnapshotInvalido as e:
+            print(f"   ⚠️  Snapshot ignored: {e}")
+            return False
+        
+        if caminho_geojson is not None and not fonte_confere(snapshot, caminho_geojson):
+            return False
+        if distancia_maxima is not None and snapshot.meta.get('distancia_maxima') != distancia_maxima:
+            return False
+        
+        ids, nomes, refs = snapshot.strings('ids', 'nomes', 'refs')
+        centroides = snapshot.array('centroides').tolist()
+        poligono_indptr = snapshot.array('poligono_indptr').tolist()
+        poligono_coords = snapshot.array('poligono_coords').tolist()
+        
+        self.predios, self.conexoes, self.vizinhos = {}, [], {}
+        self._pesos, self._distancias, self._anteriores = {}, {}, {}
+        self.caminho_geojson = caminho_geojson
+        self.distancia_maxima = snapshot.meta.get('distancia_maxima')
+        
+        for i, pid in enumerate(ids):
+            self.predios[pid] = {
+                'id': pid,
+                'nome': nomes[i],
+                'ref': refs[i],
+                'centroide': tuple(centroides[i]),
+                'coords_polygon': poligono_coords[poligono_indptr[i]:poligono_indptr[i + 1]]
+            }
+            self.vizinhos[pid] = []
+        
+        for a, b, dist in zip(snapshot.array('conexoes_origem').tolist(),
+                              snapshot.array('conexoes_destino').tolist(),
+                              snapshot.array('conexoes_distancia').tolist()):
+            self._registrar_conexao(ids[a], ids[b], dist)
+        
+        # Route table as saved: no Dijkstra at load time
+        distancias = snapshot.array('tabela_distancias').tolist()
+        anteriores = snapshot.array('tabela_anteriores').tolist()
+        for i, origem in enumerate(ids):
+            self._distancias[origem] = {
+                ids[j]: d for j, d in enumerate(distancias[i]) if d != math.inf
+            }
+            self._anteriores[origem] = {
+                ids[j]: ids[a] for j, a in enumerate(anteriores[i]) if a >= 0
+            }
+        self._tabela_valida = True
+        
+        print(f"⚡ {len(self.predios)} buildings and {len(self.conexoes)} connections loaded from snapshot")
+        
+        return True
 
 def criar_grafo_campus():
     """
@@ -350,6 +512,9 @@ def criar_grafo_campus():
     return grafo
 
 if __name__ == '__main__':
+    # Mostrar as mensagens das rotas de teste no terminal
+    rastreamento.configurar_rastreador(rastreamento.RastreadorPrint(INFO))
+    
     grafo = criar_grafo_campus()
     
     print(f"\n{'='*60}")
@@ -0,0 +1,21 @@
+"""
+Configuração do gunicorn para produção
+    gunicorn api:app -c gunicorn.conf.py
+
+preload_app importa o api.py no processo mestre com API_PRELOAD=1: o grafo
+de prédios, os grafos internos, o roteador do campus e o índice de busca
+são construídos uma vez e herdados pelos workers no fork (copy-on-write).
+Os arrays dos grafos vêm de snapshots mapeados com mmap, compartilhados
+mesmo entre processos sem relação de fork. Memória por worker: /api/memoria.
+"""
+
+import multiprocessing
+import os
+
+# Lido pelo api.py durante a importação no mestre
+os.environ.setdefault("API_PRELOAD", "1")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", min(4, multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
@@ -0,0 +1,267 @@
+"""
+Índice invertido de busca de locais
+Indexa os locais de mapas.json, as salas extraídas dos SVGs
+(dados/building_elements) e os prédios/salas de predios_info.json.
+
+Cada palavra do vocabulário é quebrada em trigramas; a busca encontra as
+palavras parecidas com cada termo pelos trigramas em comum (tolerando
+erros de digitação) e por prefixo, e ordena os documentos pela soma das
+similaridades, com peso maior para o nome do local.
+"""
+
+import bisect
+import json
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Similaridade mínima (coeficiente de Dice entre trigramas) para aceitar uma palavra
+SIMILARIDADE_MINIMA = 0.45
+
+# Peso de cada campo do documento na pontuação
+PESO_NOME = 1.0
+PESO_DESCRICAO = 0.4
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Minúsculas e sem acentos
+    """
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+def tokenizar(texto: str) -> List[str]:
+    return re.findall(r'\w+', normalizar_texto(texto))
+
+def trigramas(palavra: str) -> Set[str]:
+    """
+    Trigramas da palavra com marcadores de início e fim
+    """
+    marcada = f'  {palavra} '
+    return {marcada[i:i + 3] for i in range(len(marcada) - 2)}
+
+class IndiceBusca:
+    """
+    Índice de trigramas/prefixos sobre documentos de locais
+    """
+
+    def __init__(self):
+        self.documentos: List[Dict] = []
+        self._tokens_nome: List[Set[str]] = []
+
+        # palavra -> {documento: peso do campo onde aparece}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        # trigrama -> palavras do vocabulário que o contêm
+        self._trigramas: Dict[str, Set[str]] = {}
+        self._tamanho_trigramas: Dict[str, int] = {}
+        self._vocabulario: List[str] = []
+
+    def adicionar(self, documento: Dict, nome: str, descricao: str = '',
+                  sinonimos: Iterable[str] = ()):
+        """
+        Adiciona um documento; o dicionário é devolvido como resultado da busca
+
+        Args:
+            documento: Dados do resultado (predio, local, local_id, ...)
+            nome: Texto principal
+            descricao: Texto secundário, com peso menor
+            sinonimos: Outras formas do nome (ex: 'sala 1014', '1014')
+        """
+        doc_id = len(self.documentos)
+        self.documentos.append(documento)
+
+        tokens_nome = set(tokenizar(nome))
+        for sinonimo in sinonimos:
+            tokens_nome.update(tokenizar(sinonimo))
+        self._tokens_nome.append(set(tokenizar(nome)))
+
+        for token in tokens_nome:
+            self._postings.setdefault(token, {})[doc_id] = PESO_NOME
+        for token in tokenizar(descricao):
+            postings = self._postings.setdefault(token, {})
+            postings.setdefault(doc_id, PESO_DESCRICAO)
+
+    def finalizar(self):
+        """
+        Monta os índices de trigramas e de prefixos (chamar após adicionar)
+        """
+        self._trigramas = {}
+        self._tamanho_trigramas = {}
+        for palavra in self._postings:
+            grams = trigramas(palavra)
+            self._tamanho_trigramas[palavra] = len(grams)
+            for gram in grams:
+                self._trigramas.setdefault(gram, set()).add(palavra)
+
+        self._vocabulario = sorted(self._postings)
+
+    def _palavras_parecidas(self, termo: str) -> Dict[str, float]:
+        """
+        Palavras do vocabulário parecidas com o termo e a similaridade (0..1]
+        """
+        similares: Dict[str, float] = {}
+
+        if termo in self._postings:
+            similares[termo] = 1.0
+
+        # Prefixo: o usuário ainda está digitando
+        inicio = bisect.bisect_left(self._vocabulario, termo)
+        for palavra in self._vocabulario[inicio:]:
+            if not palavra.startswith(termo):
+                break
+            if palavra != termo:
+                similares[palavra] = max(similares.get(palavra, 0.0),
+                                         0.6 + 0.3 * len(termo) / len(palavra))
+
+        # Trigramas em comum: erros de digitação
+        if len(termo) >= 3:
+            grams = trigramas(termo)
+            comuns: Dict[str, int] = {}
+            for gram in grams:
+                for palavra in self._trigramas.get(gram, ()):
+                    comuns[palavra] = comuns.get(palavra, 0) + 1
+
+            for palavra, n in comuns.items():
+                dice = 2 * n / (len(grams) + self._tamanho_trigramas[palavra])
+                if dice >= SIMILARIDADE_MINIMA and dice * 0.9 > similares.get(palavra, 0.0):
+                    similares[palavra] = dice * 0.9
+
+        return similares
+
+    def buscar(self, consulta: str, limite: int = 20) -> List[Dict]:
+        """
+        Documentos ordenados por relevância
+
+        Cada termo contribui com a melhor similaridade entre as palavras do
+        documento; documentos que não casam com pelo menos metade dos
+        termos são descartados.
+        """
+        termos = tokenizar(consulta)
+        if not termos:
+            return []
+
+        pontuacao: Dict[int, float] = {}
+        termos_casados: Dict[int, int] = {}
+
+        for termo in termos:
+            melhor_por_doc: Dict[int, float] = {}
+            for palavra, similaridade in self._palavras_parecidas(termo).items():
+                for doc_id, peso in self._postings[palavra].items():
+                    valor = similaridade * peso
+                    if valor > melhor_por_doc.get(doc_id, 0.0):
+                        melhor_por_doc[doc_id] = valor
+
+            for doc_id, valor in melhor_por_doc.items():
+                pontuacao[doc_id] = pontuacao.get(doc_id, 0.0) + valor
+                termos_casados[doc_id] = termos_casados.get(doc_id, 0) + 1
+
+        minimo = (len(termos) + 1) // 2
+        candidatos = [d for d, n in termos_casados.items() if n >= minimo]
+        candidatos.sort(key=lambda d: (-pontuacao[d], len(self._tokens_nome[d]), d))
+
+        return [
+            {**self.documentos[d], 'relevancia': round(pontuacao[d] / len(termos), 3)}
+            for d in candidatos[:limite]
+        ]
+
+    def mencoes(self, texto: str) -> List[Dict]:
+        """
+        Documentos cujo nome aparece por inteiro no texto (usado pelo chat)
+
+        Os nomes mais específicos (com mais palavras) vêm primeiro.
+        """
+        tokens = set(tokenizar(texto))
+        candidatos: Set[int] = set()
+        for token in tokens:
+            candidatos.update(self._postings.get(token, {}))
+
+        encontrados = [
+            d for d in candidatos
+            if self._tokens_nome[d] and self._tokens_nome[d] <= tokens
+        ]
+        encontrados.sort(key=lambda d: (-len(self._tokens_nome[d]), d))
+
+        return [self.documentos[d] for d in encontrados]
+
+def construir_indice(mapas: Dict, predios_info: Optional[Dict] = None,
+                     pasta_elementos: Optional[str] = None) -> IndiceBusca:
+    """
+    Monta o índice com todas as fontes de locais
+
+    Args:
+        mapas: Conteúdo de mapas.json
+        predios_info: Conteúdo de predios_info.json (ref -> info)
+        pasta_elementos: Pasta com building_*_elementos.json
+    """
+    indice = IndiceBusca()
+    predios_info = predios_info or {}
+
+    # Locais cadastrados em mapas.json
+    for predio in mapas.get("campus", {}).get("predios", []):
+        for local in predio.get("locais", []):
+            indice.adicionar({
+                "predio": predio["nome"],
+                "predio_id": predio["id"],
+                "local": local["nome"],
+                "local_id": local["id"],
+                "tipo": local["tipo"],
+                "coordenadas": local["coordenadas"],
+                "fonte": "mapa"
+            }, local["nome"], local.get("descricao", ""))
+
+    # Prédios e salas principais de predios_info.json
+    for ref, info in predios_info.items():
+        indice.adicionar({
+            "predio": info["nome"],
+            "predio_id": ref.lower(),
+            "local": info["nome"],
+            "local_id": ref,
+            "tipo": "predio",
+            "fonte": "predios_info"
+        }, info["nome"], ' '.join([info.get("descricao", "")] + info.get("facilidades", [])),
+            sinonimos=[f"predio {ref}", f"building {ref}"])
+
+        for sala in info.get("salas_principais", []):
+            indice.adicionar({
+                "predio": info["nome"],
+                "predio_id": ref.lower(),
+                "local": sala["numero"],
+                "local_id": sala["numero"],
+                "tipo": sala["tipo"],
+                "andar": sala.get("andar"),
+                "fonte": "predios_info"
+            }, sala["numero"], sala["tipo"], sinonimos=[f"room {sala['numero']}"])
+
+    # Salas extraídas dos SVGs
+    pasta = Path(pasta_elementos) if pasta_elementos else \
+        Path(__file__).parent / 'dados' / 'building_elements'
+    padrao = re.compile(r'^building_([a-z0-9]+)_([a-z0-9]+)_elementos\.json$')
+
+    for arquivo in sorted(pasta.glob('building_*_elementos.json')) if pasta.exists() else []:
+        match = padrao.match(arquivo.name)
+        if not match:
+            continue
+
+        predio_id, andar = match.group(1), match.group(2).upper()
+        nome_predio = predios_info.get(predio_id.upper(), {}).get("nome", f"Building {predio_id.upper()}")
+
+        with open(arquivo, 'r', encoding='utf-8') as f:
+            elementos = json.load(f)
+
+        for sala in elementos.get("salas", []):
+            numero = sala["numero"]
+            indice.adicionar({
+                "predio": nome_predio,
+                "predio_id": predio_id,
+                "local": f"Room {numero}",
+                # Mesmo ID usado no grafo do prédio inteiro (rota-campus)
+                "local_id": f"{andar}:{sala['id']}",
+                "tipo": "sala",
+                "andar": andar,
+                "coordenadas": sala.get("centro"),
+                "fonte": "svg"
+            }, f"Room {numero}", sinonimos=[f"sala {numero}", f"{predio_id}{numero}"])
+
+    indice.finalizar()
+
+    return indice
@@ -0,0 +1,165 @@
+"""
+Informações detalhadas dos prédios em memória
+Carrega dados/predios_info.json uma vez, pré-formata o texto de cada
+prédio e troca o conteúdo inteiro quando o arquivo muda em disco
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+def formatar_info_predio(info):
+    """Format building information in bullet points"""
+    linhas = []
+
+    # Title
+    linhas.append(f"📍 {info['nome']}")
+    linhas.append("")
+
+    # Description
+    linhas.append(f"• {info['descricao']}")
+    linhas.append("")
+
+    # Floors
+    if info.get('andares'):
+        andares_str = ', '.join(map(str, info['andares']))
+        linhas.append(f"• 🏢 Floors: {andares_str}")
+        linhas.append("")
+
+    # Facilities
+    if info.get('facilidades'):
+        linhas.append("• ✨ Available facilities:")
+        for fac in info['facilidades']:
+            linhas.append(f"  - {fac}")
+        linhas.append("")
+
+    # Main rooms
+    if info.get('salas_principais') and len(info['salas_principais']) > 0:
+        linhas.append("• 🚪 Main rooms:")
+        for sala in info['salas_principais']:
+            linhas.append(f"  - {sala['numero']}: {sala['tipo']} (Floor {sala['andar']})")
+        linhas.append("")
+
+    # Operating hours
+    if info.get('horario_funcionamento'):
+        linhas.append(f"• 🕐 Operating hours:")
+        linhas.append(f"  - {info['horario_funcionamento']}")
+
+    return '\n'.join(linhas)
+
+class _ConteudoInfo:
+    """
+    Conteúdo imutável de uma versão do arquivo
+    """
+
+    __slots__ = ('infos', 'textos', 'mtime_ns', 'tamanho')
+
+    def __init__(self, infos: Dict[str, Dict], mtime_ns: int, tamanho: int):
+        self.infos = infos
+        self.textos = {ref: formatar_info_predio(info) for ref, info in infos.items()}
+        self.mtime_ns = mtime_ns
+        self.tamanho = tamanho
+
+class InfoPredios:
+    """
+    Leitura das informações dos prédios sem acesso a disco por requisição
+
+    O arquivo é verificado (stat) no máximo uma vez por intervalo; se
+    mudou, a nova versão é carregada e formatada por completo antes de
+    substituir a anterior, então leitores nunca veem conteúdo parcial.
+    """
+
+    def __init__(self, caminho: Optional[str] = None, intervalo_verificacao: float = 2.0):
+        self.caminho = Path(caminho) if caminho else Path(__file__).parent / 'dados' / 'predios_info.json'
+        self.intervalo_verificacao = intervalo_verificacao
+
+        self._conteudo: Optional[_ConteudoInfo] = None
+        self._verificado_em = 0.0
+        self._lock = threading.Lock()
+        self.erro: Optional[str] = None
+        self.recargas = 0
+
+        self._recarregar_se_mudou()
+
+    def _recarregar_se_mudou(self):
+        try:
+            stat = self.caminho.stat()
+        except FileNotFoundError:
+            # Sem arquivo: manter a última versão carregada, se houver
+            if self._conteudo is None:
+                self.erro = "Base de dados de informações dos prédios não encontrada."
+            return
+
+        atual = self._conteudo
+        if atual is not None and stat.st_mtime_ns == atual.mtime_ns and stat.st_size == atual.tamanho:
+            return
+
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                infos = json.load(f)
+            novo = _ConteudoInfo(infos, stat.st_mtime_ns, stat.st_size)
+        except Exception as e:
+            # Arquivo sendo regravado ou inválido: continuar com a versão anterior
+            print(f"❌ Error loading building information: {e}")
+            if atual is None:
+                self.erro = f"Erro ao carregar informações: {e}"
+            return
+
+        self._conteudo = novo
+        self.erro = None
+        if atual is not None:
+            self.recargas += 1
+            print(f"🔄 Informações dos prédios recarregadas ({len(novo.infos)} prédios)")
+
+    def _conteudo_atual(self) -> Optional[_ConteudoInfo]:
+        agora = time.monotonic()
+
+        if agora - self._verificado_em >= self.intervalo_verificacao:
+            # Só uma thread verifica; as demais seguem com a versão atual
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._verificado_em = agora
+                    self._recarregar_se_mudou()
+                finally:
+                    self._lock.release()
+
+        return self._conteudo
+
+    def obter(self, predio_ref: str) -> Optional[Tuple[Dict, str]]:
+        """
+        Informações e texto formatado de um prédio
+
+        Returns:
+            (info, texto_formatado) ou None se o prédio não estiver na base
+        """
+        conteudo = self._conteudo_atual()
+
+        if conteudo is None or predio_ref not in conteudo.infos:
+            return None
+
+        return conteudo.infos[predio_ref], conteudo.textos[predio_ref]
+
+    def todos(self) -> Dict[str, Dict]:
+        """
+        Informações de todos os prédios (ref -> info)
+        """
+        conteudo = self._conteudo_atual()
+        return dict(conteudo.infos) if conteudo is not None else {}
+
+    @property
+    def versao(self) -> int:
+        """
+        Número de recargas depois de verificar o arquivo; muda a cada nova
+        versão, para quem guarda dados derivados dele (índice de busca)
+        """
+        self._conteudo_atual()
+        return self.recargas
+
+    @property
+    def carregado(self) -> bool:
+        return self._conteudo_atual() is not None
+
+# Base global do processo
+info_predios = InfoPredios()
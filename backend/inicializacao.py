@@ -0,0 +1,217 @@
+"""
+Inicialização medida do processo da API
+Os recursos pesados (grafos, índice de busca, cliente do modelo) são
+componentes preguiçosos: o primeiro acesso constrói, e um aquecimento em
+segundo plano constrói todos logo após o boot. Cada fase tem o tempo
+medido para o relatório de inicialização e o endpoint de prontidão.
+
+No modo preload (gunicorn --preload) os componentes que podem ser
+compartilhados são construídos no processo mestre antes do fork; os
+workers herdam essas páginas por copy-on-write.
+"""
+
+import gc
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class Componente:
+    """
+    Recurso construído uma única vez, no primeiro acesso
+    """
+
+    def __init__(self, nome: str, fabrica: Callable[[], Any], essencial: bool = True,
+                 compartilhavel: bool = True, aceita_none: bool = False):
+        self.nome = nome
+        self.fabrica = fabrica
+        self.essencial = essencial
+        # Pode ser construído antes do fork (sem threads, sockets ou
+        # clientes de rede que não sobrevivem a ele)
+        self.compartilhavel = compartilhavel
+        # Fábricas que só têm efeito colateral devolvem None com sucesso;
+        # nas demais, None é uma falha (a fábrica tratou a própria exceção)
+        self.aceita_none = aceita_none
+
+        self._valor = None
+        self._pronto = threading.Event()
+        self._lock = threading.Lock()
+        self.tentativas = 0
+        self.erro: Optional[str] = None
+        self.segundos: Optional[float] = None
+
+    def obter(self, timeout: Optional[float] = None) -> Any:
+        """
+        Valor do componente, construindo-o se ainda não existir
+
+        Threads que chegam durante a construção esperam pela mesma
+        construção. Com timeout, devolve None se ela não terminar a tempo.
+        Uma falha (exceção, ou None sem aceita_none) fica registrada em
+        erro, o valor é None e o próximo acesso tenta construir de novo;
+        quem esperava pela tentativa que falhou recebe None sem repeti-la.
+        """
+        if self._pronto.is_set():
+            return self._valor
+
+        tentativa = self.tentativas
+        if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+            return None
+
+        try:
+            if not self._pronto.is_set() and self.tentativas == tentativa:
+                self.tentativas += 1
+                inicio = time.perf_counter()
+                valor = None
+                try:
+                    valor = self.fabrica()
+                    if valor is None and not self.aceita_none:
+                        raise RuntimeError("fábrica devolveu None")
+                except Exception as e:
+                    print(f"❌ Error initializing {self.nome}: {e}")
+                    self.erro = str(e)
+                else:
+                    self._valor = valor
+                    self.erro = None
+                    self._pronto.set()
+                self.segundos = time.perf_counter() - inicio
+        finally:
+            self._lock.release()
+
+        return self._valor
+
+    def substituir(self, valor: Any):
+        """
+        Troca o valor por uma versão reconstruída fora do caminho das
+        requisições; quem já obteve o anterior continua com ele
+        """
+        with self._lock:
+            self._valor = valor
+            self.erro = None
+            self._pronto.set()
+
+    @property
+    def pronto(self) -> bool:
+        return self._pronto.is_set()
+
+    def estado(self) -> Dict:
+        return {
+            'pronto': self.pronto,
+            'essencial': self.essencial,
+            'segundos': round(self.segundos, 4) if self.segundos is not None else None,
+            'tentativas': self.tentativas,
+            'erro': self.erro
+        }
+
+class Inicializacao:
+    """
+    Fases medidas do boot e componentes aquecidos em segundo plano
+    """
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.fases: List[Tuple[str, float]] = []
+        self.componentes: 'OrderedDict[str, Componente]' = OrderedDict()
+        self._aquecimento: Optional[threading.Thread] = None
+        self.aquecimento_segundos: Optional[float] = None
+        self.pre_carregado = False
+
+    def registrar_fase(self, nome: str, segundos: float):
+        self.fases.append((nome, segundos))
+
+    @contextmanager
+    def medir(self, nome: str):
+        """
+        Mede uma fase feita na importação do módulo
+        """
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_fase(nome, time.perf_counter() - inicio)
+
+    def componente(self, nome: str, fabrica: Callable[[], Any], essencial: bool = True,
+                   compartilhavel: bool = True, aceita_none: bool = False) -> Componente:
+        """
+        Registra um componente preguiçoso (aquecido na ordem de registro)
+        """
+        componente = Componente(nome, fabrica, essencial, compartilhavel, aceita_none)
+        self.componentes[nome] = componente
+        return componente
+
+    def aquecer(self):
+        """
+        Constrói todos os componentes ainda não construídos
+        """
+        inicio = time.perf_counter()
+        for componente in self.componentes.values():
+            componente.obter()
+        self.aquecimento_segundos = time.perf_counter() - inicio
+        self.imprimir_relatorio()
+
+    def pre_carregar(self):
+        """
+        Constrói os componentes compartilháveis no processo atual (o mestre,
+        antes do fork dos workers)
+
+        Depois congela o coletor de lixo: os objetos já criados saem das
+        gerações varridas pelo GC, que senão escreveria em todas as páginas
+        herdadas e desfaria o compartilhamento copy-on-write.
+        """
+        for componente in self.componentes.values():
+            if componente.compartilhavel:
+                componente.obter()
+
+        gc.collect()
+        gc.freeze()
+        self.pre_carregado = True
+
+    def aquecer_em_segundo_plano(self) -> threading.Thread:
+        """
+        Inicia o aquecimento em uma thread daemon (uma única vez)
+        """
+        if self._aquecimento is None:
+            self._aquecimento = threading.Thread(target=self.aquecer, name='aquecimento', daemon=True)
+            self._aquecimento.start()
+        return self._aquecimento
+
+    @property
+    def pronto(self) -> bool:
+        """
+        Todos os componentes essenciais construídos com sucesso
+        """
+        return all(c.pronto for c in self.componentes.values() if c.essencial)
+
+    def falhas(self) -> List[str]:
+        """
+        Componentes essenciais cuja última construção falhou
+        """
+        return [nome for nome, c in self.componentes.items()
+                if c.essencial and not c.pronto and c.erro]
+
+    def relatorio(self) -> Dict:
+        return {
+            'pronto': self.pronto,
+            'falhas': self.falhas(),
+            'pre_carregado': self.pre_carregado,
+            'desde_inicio_segundos': round(time.perf_counter() - self.inicio, 3),
+            'fases_importacao': [
+                {'fase': nome, 'segundos': round(segundos, 4)} for nome, segundos in self.fases
+            ],
+            'importacao_segundos': round(sum(s for _, s in self.fases), 4),
+            'componentes': {nome: c.estado() for nome, c in self.componentes.items()},
+            'aquecimento_segundos': round(self.aquecimento_segundos, 4)
+                if self.aquecimento_segundos is not None else None
+        }
+
+    def imprimir_relatorio(self):
+        print("⏱️  Startup report:")
+        for nome, segundos in self.fases:
+            print(f"   {nome:<22} {segundos * 1000:9.1f} ms")
+        for nome, componente in self.componentes.items():
+            if componente.segundos is None:
+                continue
+            situacao = '❌' if componente.erro else '✅'
+            print(f"   {nome:<22} {componente.segundos * 1000:9.1f} ms {situacao}")
+        if self.aquecimento_segundos is not None:
+            print(f"   {'(aquecimento total)':<22} {self.aquecimento_segundos * 1000:9.1f} ms")
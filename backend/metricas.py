@@ -0,0 +1,275 @@
+"""
+Métricas do processo no formato texto do Prometheus
+Contadores e histogramas em memória, coletores que leem contadores já
+existentes (caches) e um middleware ASGI que mede a latência por rota.
+
+Registrar uma observação custa uma busca binária nos limites do
+histograma e um incremento protegido por lock, sem alocação.
+"""
+
+import bisect
+import os
+import resource
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Limites (segundos) dos histogramas de latência
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Limites dos histogramas de nós expandidos e comprimento de caminho
+BUCKETS_NOS_EXPANDIDOS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+BUCKETS_COMPRIMENTO = (2, 5, 10, 20, 50, 100, 200, 500)
+
+def _formatar_rotulos(nomes: Sequence[str], valores: Sequence[str], extra: str = '') -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _numero(valor: float) -> str:
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+class Contador:
+    """
+    Contador monotônico com rótulos
+    """
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores_rotulos: str, valor: float = 1.0):
+        with self._lock:
+            self._valores[valores_rotulos] = self._valores.get(valores_rotulos, 0.0) + valor
+
+    def exportar(self) -> List[str]:
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} counter']
+        with self._lock:
+            itens = sorted(self._valores.items())
+        for valores, total in itens:
+            linhas.append(f'{self.nome}{_formatar_rotulos(self.rotulos, valores)} {_numero(total)}')
+        return linhas
+
+class Histograma:
+    """
+    Histograma com limites fixos e rótulos
+    """
+
+    def __init__(self, nome: str, ajuda: str, buckets: Sequence[float],
+                 rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(sorted(buckets))
+        # rótulos -> [contagens por bucket (+Inf no fim), soma]
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, *valores_rotulos: str):
+        posicao = bisect.bisect_left(self.buckets, valor)
+
+        with self._lock:
+            serie = self._series.get(valores_rotulos)
+            if serie is None:
+                serie = self._series[valores_rotulos] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][posicao] += 1
+            serie[1] += valor
+
+    def exportar(self) -> List[str]:
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} histogram']
+        with self._lock:
+            itens = sorted((k, (list(v[0]), v[1])) for k, v in self._series.items())
+
+        for valores, (contagens, soma) in itens:
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (float('inf'),), contagens):
+                acumulado += contagem
+                rotulos = _formatar_rotulos(self.rotulos, valores, f'le="{_numero(limite)}"')
+                linhas.append(f'{self.nome}_bucket{rotulos} {acumulado}')
+            rotulos = _formatar_rotulos(self.rotulos, valores)
+            linhas.append(f'{self.nome}_sum{rotulos} {_numero(soma)}')
+            linhas.append(f'{self.nome}_count{rotulos} {acumulado}')
+        return linhas
+
+class Coletor:
+    """
+    Métrica lida na hora da exportação (ex: contadores de um cache)
+
+    A função devolve {valores dos rótulos: valor}.
+    """
+
+    def __init__(self, nome: str, ajuda: str, tipo: str, rotulos: Sequence[str],
+                 funcao: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.tipo = tipo
+        self.rotulos = tuple(rotulos)
+        self.funcao = funcao
+
+    def exportar(self) -> List[str]:
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} {self.tipo}']
+        try:
+            itens = sorted(self.funcao().items())
+        except Exception as e:
+            print(f"⚠️ Metric collector {self.nome} failed: {e}")
+            return linhas
+        for valores, valor in itens:
+            linhas.append(f'{self.nome}{_formatar_rotulos(self.rotulos, valores)} {_numero(valor)}')
+        return linhas
+
+class RegistroMetricas:
+    """
+    Conjunto de métricas exportadas em /metrics
+    """
+
+    def __init__(self):
+        self._metricas: Dict[str, object] = {}
+
+    def registrar(self, metrica):
+        # Registrar de novo com o mesmo nome substitui (ex: reload de módulo)
+        self._metricas[metrica.nome] = metrica
+        return metrica
+
+    def contador(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Contador:
+        return self.registrar(Contador(nome, ajuda, rotulos))
+
+    def histograma(self, nome: str, ajuda: str, buckets: Sequence[float],
+                   rotulos: Sequence[str] = ()) -> Histograma:
+        return self.registrar(Histograma(nome, ajuda, buckets, rotulos))
+
+    def coletor(self, nome: str, ajuda: str, tipo: str, rotulos: Sequence[str],
+                funcao: Callable[[], Dict[Tuple[str, ...], float]]) -> Coletor:
+        return self.registrar(Coletor(nome, ajuda, tipo, rotulos, funcao))
+
+    def exportar(self) -> str:
+        linhas = []
+        for metrica in self._metricas.values():
+            linhas.extend(metrica.exportar())
+        return '\n'.join(linhas) + '\n'
+
+# Registro global do processo
+registro_metricas = RegistroMetricas()
+
+HTTP_REQUISICOES = registro_metricas.contador(
+    'http_requisicoes_total', 'Requisições HTTP atendidas', ('metodo', 'rota', 'status'))
+HTTP_LATENCIA = registro_metricas.histograma(
+    'http_latencia_segundos', 'Latência das requisições HTTP por rota',
+    BUCKETS_LATENCIA, ('metodo', 'rota'))
+
+ROTA_NOS_EXPANDIDOS = registro_metricas.histograma(
+    'rota_nos_expandidos', 'Nós expandidos por busca de caminho',
+    BUCKETS_NOS_EXPANDIDOS, ('grafo',))
+ROTA_COMPRIMENTO = registro_metricas.histograma(
+    'rota_comprimento_nos', 'Número de nós no caminho encontrado',
+    BUCKETS_COMPRIMENTO, ('grafo',))
+ROTA_NAO_ENCONTRADA = registro_metricas.contador(
+    'rota_nao_encontrada_total', 'Buscas de caminho sem resultado', ('grafo',))
+
+GEMINI_LATENCIA = registro_metricas.histograma(
+    'gemini_latencia_segundos', 'Latência das chamadas ao modelo', BUCKETS_LATENCIA, ('modo',))
+GEMINI_ERROS = registro_metricas.contador(
+    'gemini_erros_total', 'Chamadas ao modelo que falharam ou estouraram o prazo', ('modo', 'tipo'))
+CHAT_INTENCOES = registro_metricas.contador(
+    'chat_intencoes_total', 'Mensagens do chat resolvidas pelo motor local ou encaminhadas',
+    ('resolucao',))
+
+_CACHES: Dict[str, Callable[[], Dict]] = {}
+
+def registrar_cache(nome: str, estatisticas: Callable[[], Dict]):
+    """
+    Exporta hits, misses e taxa de acerto de um cache com método estatisticas()
+    """
+    _CACHES[nome] = estatisticas
+
+def _coletar_caches(chave: str) -> Dict[Tuple[str, ...], float]:
+    return {(nome, ): funcao()[chave] for nome, funcao in _CACHES.items()}
+
+registro_metricas.coletor('cache_hits_total', 'Acertos de cache', 'counter', ('cache',),
+                          lambda: _coletar_caches('hits'))
+registro_metricas.coletor('cache_misses_total', 'Faltas de cache', 'counter', ('cache',),
+                          lambda: _coletar_caches('misses'))
+registro_metricas.coletor('cache_taxa_acerto', 'Fração de acertos desde o início', 'gauge', ('cache',),
+                          lambda: _coletar_caches('taxa_acerto'))
+
+# Campos de /proc/self/smaps_rollup (kB) exportados como memória do processo
+CAMPOS_MEMORIA = {
+    'Rss': 'rss',
+    'Pss': 'pss',
+    'Shared_Clean': 'compartilhada_limpa',
+    'Shared_Dirty': 'compartilhada_suja',
+    'Private_Clean': 'privada_limpa',
+    'Private_Dirty': 'privada_suja'
+}
+
+def ler_memoria_processo() -> Dict[str, int]:
+    """
+    Memória do processo atual em bytes
+
+    No Linux lê /proc/self/smaps_rollup: PSS divide as páginas
+    compartilhadas entre os processos que as usam, então a soma do PSS dos
+    workers é a memória real do conjunto. Sem /proc, só o pico de RSS.
+    """
+    memoria = {}
+
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for linha in f:
+                partes = linha.split()
+                if len(partes) >= 2 and partes[0].rstrip(':') in CAMPOS_MEMORIA:
+                    memoria[CAMPOS_MEMORIA[partes[0].rstrip(':')]] = int(partes[1]) * 1024
+    except OSError:
+        pass
+
+    if not memoria:
+        # ru_maxrss: kB no Linux, bytes no macOS
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        memoria['rss_pico'] = pico if os.uname().sysname == 'Darwin' else pico * 1024
+
+    return memoria
+
+registro_metricas.coletor(
+    'processo_memoria_bytes', 'Memória do processo (worker) por tipo', 'gauge', ('tipo',),
+    lambda: {(tipo, ): valor for tipo, valor in ler_memoria_processo().items()}
+)
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI que conta requisições e mede a latência por rota
+
+    O rótulo é o padrão da rota (ex: /api/predios/{predio_id}), não o
+    caminho da URL, para manter a cardinalidade limitada.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        status = [500]
+
+        async def enviar(mensagem):
+            if mensagem['type'] == 'http.response.start':
+                status[0] = mensagem['status']
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            rota = scope.get('route')
+            padrao = getattr(rota, 'path', None) or 'nao_mapeada'
+            metodo = scope.get('method', '')
+            HTTP_LATENCIA.observar(time.perf_counter() - inicio, metodo, padrao)
+            HTTP_REQUISICOES.inc(metodo, padrao, str(status[0]))
@@ -0,0 +1,346 @@
+"""
+Backends de modelo de linguagem do chatbot
+O chatbot fala com qualquer objeto com a interface do GenerativeModel do
+SDK do Gemini (generate_content e generate_content_async, com ou sem
+stream). Os backends ficam em um registro escolhido por CHATBOT_MODELO:
+
+- gemini: Google Gemini (padrão, precisa de rede e GEMINI_API_KEY)
+- stub: modelo local com latência fixa CHATBOT_STUB_ATRASO
+- local: modelo local configurável por CHATBOT_LOCAL_CONFIG (arquivo
+  JSON) com distribuição de latência, taxas de erro, travamento e
+  resposta inválida, e respostas JSON prontas por padrão de mensagem
+
+Os modelos locais permitem medir o /api/chat sob carga e conferir o
+comportamento de prazo e fallback sem acesso à rede.
+
+Exemplo de CHATBOT_LOCAL_CONFIG:
+    {
+      "latencia": {"tipo": "lognormal", "media": 0.8, "desvio": 0.4, "maximo": 5},
+      "taxa_erro": 0.02,
+      "taxa_travamento": 0.01,
+      "taxa_invalida": 0.01,
+      "respostas": [
+        {"padrao": "library", "resposta": {"origem": null, "destino": "D",
+                                           "resposta": "The library is in building D."}}
+      ]
+    }
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Extração de intenção usada quando nenhuma resposta pronta casa
+Extrator = Callable[[str], Dict]
+
+class RespostaModelo:
+    """
+    Resposta (ou pedaço de resposta em stream) com o atributo text, como
+    a do SDK do Gemini
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+
+class ErroModeloLocal(RuntimeError):
+    """
+    Falha simulada pelo modelo local
+    """
+
+class DistribuicaoLatencia:
+    """
+    Latência em segundos sorteada a cada chamada
+
+    tipos: fixa, uniforme (minimo..maximo), normal, lognormal e exponencial
+    (parametrizadas pela média e desvio em segundos); o resultado é
+    limitado a [minimo, maximo]
+    """
+
+    TIPOS = ('fixa', 'uniforme', 'normal', 'lognormal', 'exponencial')
+
+    def __init__(self, tipo: str = 'fixa', media: float = 0.0, desvio: float = 0.0,
+                 minimo: float = 0.0, maximo: float = math.inf):
+        if tipo not in self.TIPOS:
+            raise ValueError(f"Distribuição de latência desconhecida: {tipo} "
+                             f"(use {', '.join(self.TIPOS)})")
+        self.tipo = tipo
+        self.media = media
+        self.desvio = desvio
+        self.minimo = minimo
+        self.maximo = maximo
+
+        if tipo == 'lognormal' and media > 0:
+            # Parâmetros da normal subjacente para a média e desvio pedidos
+            variancia = math.log(1 + (desvio / media) ** 2)
+            self._mu = math.log(media) - variancia / 2
+            self._sigma = math.sqrt(variancia)
+
+    @classmethod
+    def de_config(cls, config) -> 'DistribuicaoLatencia':
+        """
+        Aceita um número (latência fixa) ou um dicionário com tipo e parâmetros
+        """
+        if isinstance(config, (int, float)):
+            return cls('fixa', float(config))
+        return cls(**config)
+
+    def amostrar(self, rnd: random.Random) -> float:
+        if self.tipo == 'fixa':
+            valor = self.media
+        elif self.tipo == 'uniforme':
+            valor = rnd.uniform(self.minimo, self.maximo)
+        elif self.tipo == 'normal':
+            valor = rnd.gauss(self.media, self.desvio)
+        elif self.tipo == 'lognormal':
+            valor = rnd.lognormvariate(self._mu, self._sigma) if self.media > 0 else 0.0
+        else:
+            valor = rnd.expovariate(1 / self.media) if self.media > 0 else 0.0
+
+        return min(max(valor, self.minimo), self.maximo)
+
+class ModeloLocal:
+    """
+    Substituto local do modelo, com a interface do GenerativeModel
+
+    Cada chamada sorteia uma latência e um desfecho:
+    - erro (taxa_erro): ErroModeloLocal, no início ou no meio do stream
+    - travamento (taxa_travamento): não responde por segundos_travado,
+      para o prazo do chatbot estourar
+    - inválida (taxa_invalida): texto sem JSON, que o chatbot não interpreta
+    - normal: a primeira resposta pronta cujo padrão casa com a mensagem,
+      ou a do extrator
+    """
+
+    def __init__(self, latencia: Optional[DistribuicaoLatencia] = None,
+                 taxa_erro: float = 0.0, taxa_travamento: float = 0.0,
+                 taxa_invalida: float = 0.0, segundos_travado: float = 60.0,
+                 respostas: Optional[List[Dict]] = None,
+                 extrator: Optional[Extrator] = None, semente: Optional[int] = None,
+                 tamanho_pedaco: int = 16):
+        self.latencia = latencia or DistribuicaoLatencia()
+        self.taxa_erro = taxa_erro
+        self.taxa_travamento = taxa_travamento
+        self.taxa_invalida = taxa_invalida
+        self.segundos_travado = segundos_travado
+        self.respostas = [
+            (re.compile(r['padrao'], re.IGNORECASE), r['resposta']) for r in (respostas or [])
+        ]
+        self.extrator = extrator
+        self.tamanho_pedaco = tamanho_pedaco
+
+        self._rnd = random.Random(semente)
+        self._lock = threading.Lock()
+        self._contagem = {'chamadas': 0, 'erros': 0, 'travamentos': 0,
+                          'invalidas': 0, 'prontas': 0}
+
+    @classmethod
+    def de_config(cls, config: Dict, extrator: Optional[Extrator] = None) -> 'ModeloLocal':
+        """
+        Cria o modelo a partir do dicionário de configuração (ver o
+        exemplo no topo do módulo)
+        """
+        config = dict(config)
+        latencia = DistribuicaoLatencia.de_config(config.pop('latencia', 0.0))
+        return cls(latencia=latencia, extrator=extrator, **config)
+
+    def _sortear(self) -> str:
+        with self._lock:
+            self._contagem['chamadas'] += 1
+            sorteio = self._rnd.random()
+            for desfecho, taxa in (('erros', self.taxa_erro),
+                                   ('travamentos', self.taxa_travamento),
+                                   ('invalidas', self.taxa_invalida)):
+                if sorteio < taxa:
+                    self._contagem[desfecho] += 1
+                    return desfecho
+                sorteio -= taxa
+            return 'normal'
+
+    def _atraso(self) -> float:
+        with self._lock:
+            return self.latencia.amostrar(self._rnd)
+
+    def _texto(self, prompt: str, desfecho: str) -> str:
+        if desfecho == 'invalidas':
+            return "Sorry, I could not understand the request."
+
+        mensagem = prompt.rsplit("User: ", 1)[-1]
+        for padrao, resposta in self.respostas:
+            if padrao.search(mensagem):
+                with self._lock:
+                    self._contagem['prontas'] += 1
+                return json.dumps(resposta, ensure_ascii=False)
+
+        if self.extrator:
+            return json.dumps(self.extrator(mensagem), ensure_ascii=False)
+        return json.dumps({"origem": None, "destino": None,
+                           "resposta": "How can I help you with navigation?"})
+
+    def generate_content(self, prompt: str) -> RespostaModelo:
+        desfecho = self._sortear()
+        if desfecho == 'travamentos':
+            time.sleep(self.segundos_travado)
+        else:
+            time.sleep(self._atraso())
+        if desfecho == 'erros':
+            raise ErroModeloLocal("Simulated model error")
+        return RespostaModelo(self._texto(prompt, desfecho))
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        desfecho = self._sortear()
+        if stream:
+            return self._stream(prompt, desfecho)
+
+        if desfecho == 'travamentos':
+            await asyncio.sleep(self.segundos_travado)
+        else:
+            await asyncio.sleep(self._atraso())
+        if desfecho == 'erros':
+            raise ErroModeloLocal("Simulated model error")
+        return RespostaModelo(self._texto(prompt, desfecho))
+
+    async def _stream(self, prompt: str, desfecho: str):
+        # A latência sorteada é distribuída entre os pedaços, como na API real
+        texto = self._texto(prompt, desfecho)
+        pedacos = [texto[i:i + self.tamanho_pedaco]
+                   for i in range(0, len(texto), self.tamanho_pedaco)]
+        atraso = self._atraso() / len(pedacos)
+        falha_em = self._rnd.randrange(len(pedacos)) if desfecho == 'erros' else None
+
+        for i, pedaco in enumerate(pedacos):
+            if desfecho == 'travamentos' and i == len(pedacos) // 2:
+                await asyncio.sleep(self.segundos_travado)
+            await asyncio.sleep(atraso)
+            if i == falha_em:
+                raise ErroModeloLocal("Simulated model error during stream")
+            yield RespostaModelo(pedaco)
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            return dict(self._contagem)
+
+BACKENDS_LLM: Dict[str, Callable[[Optional[Extrator]], object]] = {}
+
+def registrar_backend(nome: str):
+    """
+    Decorador que registra uma fábrica de modelo: fabrica(extrator) -> modelo
+    """
+    def decorador(fabrica):
+        BACKENDS_LLM[nome] = fabrica
+        return fabrica
+    return decorador
+
+@registrar_backend('gemini')
+def _criar_gemini(extrator: Optional[Extrator] = None):
+    # Importado só aqui: o SDK leva ~1s para carregar
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel('gemini-2.5-flash')
+
+@registrar_backend('stub')
+def _criar_stub(extrator: Optional[Extrator] = None) -> ModeloLocal:
+    return ModeloLocal(DistribuicaoLatencia('fixa', float(os.getenv("CHATBOT_STUB_ATRASO", "0"))),
+                       extrator=extrator)
+
+@registrar_backend('local')
+def _criar_local(extrator: Optional[Extrator] = None) -> ModeloLocal:
+    caminho = os.getenv("CHATBOT_LOCAL_CONFIG")
+    config = {}
+    if caminho:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    return ModeloLocal.de_config(config, extrator)
+
+def criar_modelo(nome: Optional[str] = None, extrator: Optional[Extrator] = None):
+    """
+    Cria o modelo do backend pedido (padrão: CHATBOT_MODELO ou gemini)
+
+    Raises:
+        ValueError: backend não registrado
+    """
+    nome = (nome or os.getenv("CHATBOT_MODELO", "gemini")).lower()
+    if nome not in BACKENDS_LLM:
+        raise ValueError(f"Unknown model backend: {nome} (use {', '.join(BACKENDS_LLM)})")
+    return BACKENDS_LLM[nome](extrator)
+
+async def _verificar_fallbacks() -> List[str]:
+    """
+    Confere prazo e fallback do chatbot com o modelo local; retorna as falhas
+    """
+    from chatbot import ChatbotNavegacao
+
+    pronta = {"origem": "A", "destino": "M", "resposta": "canned answer"}
+    # Sem prédio mencionado: o motor de intenções encaminha ao modelo
+    mensagem = "I need to get to the library"
+    falhas = []
+
+    def chatbot_com(**config) -> ChatbotNavegacao:
+        bot = ChatbotNavegacao()
+        bot.model = ModeloLocal(respostas=[{"padrao": ".", "resposta": pronta}],
+                                extrator=bot._processar_com_regex, semente=1, **config)
+        bot.use_ai = True
+        bot.modelo_inicializado = True
+        return bot
+
+    async def stream_final(bot, timeout):
+        final = None
+        async for evento, dados in bot.processar_mensagem_stream(mensagem, timeout=timeout):
+            if evento == "final":
+                final = dados
+        return final
+
+    cenarios = [
+        ("normal", {}, pronta),
+        ("erro", {"taxa_erro": 1.0}, None),
+        ("inválida", {"taxa_invalida": 1.0}, None),
+        ("travamento", {"taxa_travamento": 1.0, "segundos_travado": 30.0}, None),
+    ]
+    prazo = 0.3
+    regex = ChatbotNavegacao._processar_com_regex(mensagem)
+
+    for nome, config, esperado in cenarios:
+        for modo in ("async", "stream"):
+            bot = chatbot_com(latencia=DistribuicaoLatencia('fixa', 0.01), **config)
+            inicio = time.perf_counter()
+            if modo == "async":
+                resultado = await bot.processar_mensagem_async(mensagem, timeout=prazo)
+            else:
+                resultado = await stream_final(bot, prazo)
+            segundos = time.perf_counter() - inicio
+
+            ok = resultado == (esperado or regex) and segundos < prazo + 0.5
+            print(f"   {'✅' if ok else '❌'} {nome:<11} {modo:<7} {segundos * 1000:7.1f} ms "
+                  f"→ {'modelo' if resultado == pronta else 'regex'}")
+            if not ok:
+                falhas.append(f"{nome}/{modo}: {resultado} em {segundos:.2f}s")
+
+    return falhas
+
+if __name__ == '__main__':
+    import contextlib
+    import io
+    import sys
+
+    print("="*60)
+    print("🧪 MODELO LOCAL - prazo e fallback do chatbot")
+    print("="*60)
+
+    # Sem os logs por mensagem do chatbot
+    saida = io.StringIO()
+    with contextlib.redirect_stdout(saida):
+        falhas = asyncio.run(_verificar_fallbacks())
+    print('\n'.join(l for l in saida.getvalue().splitlines() if l.startswith('   ')))
+
+    if falhas:
+        print(f"\n❌ {len(falhas)} falha(s):")
+        for falha in falhas:
+            print(f"   - {falha}")
+        sys.exit(1)
+
+    print("\n✅ Prazo e fallback funcionando")
@@ -0,0 +1,554 @@
+"""
+Motor de intenções do chat, executado antes do modelo de linguagem
+Um autômato Aho-Corasick construído uma vez com os nomes, refs e apelidos
+dos prédios (predios_info.json e campus.geojson) encontra todas as
+menções em uma única passada pela mensagem normalizada. Uma gramática
+pequena de palavras-guia em inglês e português ("from X to Y", "de X
+para Y", "where is X", "o que tem no X") dá o papel de cada menção, e a
+intenção recebe uma confiança entre 0 e 1. Só mensagens abaixo do
+limiar seguem para o modelo.
+
+Uso (relatório da fração resolvida localmente):
+    python motor_intencoes.py mensagens.txt      # uma mensagem por linha
+    python motor_intencoes.py mensagens.jsonl    # {"mensagem": ...} por linha
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from cache_intencoes import normalizar_mensagem
+
+# Confiança mínima para responder sem o modelo
+LIMIAR_CONFIANCA = float(os.getenv("CHAT_LIMIAR_CONFIANCA", "0.75"))
+
+# Letra isolada ("a", "e") também é palavra comum: vale menos que um nome
+CONFIANCA_FORTE = 1.0
+CONFIANCA_FRACA = 0.85
+# Menção sem palavra-guia: o papel é um palpite
+FATOR_SEM_GUIA = 0.6
+# Só a origem, sem destino: a resposta pede o destino
+FATOR_SO_ORIGEM = 0.9
+# Negações e perguntas fora de rota pedem o modelo
+FATOR_DUVIDOSA = 0.5
+CONFIANCA_AMBIGUA = 0.3
+
+# Palavras-guia (já normalizadas) e o papel da menção que vem logo depois
+GUIAS = {
+    'origem': [
+        ('from',), ('de',), ('do',), ('da',), ('desde',), ('leaving',), ('at',),
+        ('i', 'am', 'at'), ("i'm", 'at'), ('im', 'at'), ('i', 'am', 'in'), ("i'm", 'in'),
+        ('starting', 'at'), ('estou', 'no'), ('estou', 'na'), ('estou', 'em'),
+        ('to', 'no'), ('to', 'na'), ('saindo', 'do'), ('saindo', 'da'), ('saindo', 'de'),
+    ],
+    'destino': [
+        ('to',), ('para',), ('pra',), ('pro',), ('ate',), ('ao',), ('into',), ('reach',),
+        ('where', 'is'), ("where's",), ('wheres',), ('find',), ('onde', 'fica'),
+        ('onde', 'e'), ('onde', 'esta'), ('ir', 'no'), ('ir', 'na'), ('vou', 'no'),
+        ('vou', 'na'), ('chegar', 'no'), ('chegar', 'na'), ('chego', 'no'),
+        ('chego', 'na'), ('going', 'to'),
+    ],
+    'info': [
+        ('about',), ('sobre',), ('info',), ('what', 'is', 'in'), ("what's", 'in'),
+        ('whats', 'in'), ('o', 'que', 'tem', 'no'), ('o', 'que', 'tem', 'na'),
+        ('o', 'que', 'ha', 'no'), ('o', 'que', 'ha', 'na'), ('informacoes', 'do'),
+        ('informacoes', 'da'), ('info', 'do'), ('info', 'da'),
+    ],
+}
+
+# Ignoradas entre a palavra-guia e a menção ("to the building B"); "a" e
+# "o" ficam de fora por serem também artigos ("to a building")
+INTERMEDIARIAS = frozenset({'the', 'building', 'predio', 'bloco', 'edificio'})
+INTERMEDIARIAS_ARTIGOS = INTERMEDIARIAS | {'a', 'o'}
+
+# Palavras que podem seguir uma letra isolada usada como prédio
+FINAIS_LETRA = {'please', 'pls', 'now', 'then', 'and', 'e', 'por', 'favor', 'agora',
+                'thanks', 'obrigado', 'obrigada'}
+
+DUVIDOSAS = {'not', 'dont', "don't", 'avoid', 'without', 'except', 'instead', 'but',
+             'nao', 'sem', 'evitar', 'exceto', 'mas', 'when', 'quando', 'hours',
+             'horario', 'open', 'aberto', 'close', 'closed', 'fecha', 'fechado'}
+
+# Apelidos que não estão nos arquivos de dados
+APELIDOS_EXTRAS = {'student center': 'SC'}
+
+# Letras que também são palavras comuns (artigo, conjunção): só contam
+# depois de um substantivo ("building a", apelido forte), nunca sozinhas
+# nem antes de um ("a building"), e não geram o apelido "<letra> building"
+LETRAS_COMUNS = {'a', 'e', 'o'}
+
+class AhoCorasick:
+    """
+    Autômato de Aho-Corasick: todas as ocorrências de um conjunto de
+    padrões em uma passada pelo texto
+    """
+
+    def __init__(self):
+        self._transicoes: List[Dict[str, int]] = [{}]
+        self._falha: List[int] = [0]
+        self._saidas: List[List[Tuple[int, object]]] = [[]]
+
+    def adicionar(self, padrao: str, valor: object):
+        no = 0
+        for c in padrao:
+            proximo = self._transicoes[no].get(c)
+            if proximo is None:
+                proximo = len(self._transicoes)
+                self._transicoes[no][c] = proximo
+                self._transicoes.append({})
+                self._falha.append(0)
+                self._saidas.append([])
+            no = proximo
+        self._saidas[no].append((len(padrao), valor))
+
+    def construir(self):
+        """
+        Calcula as ligações de falha (busca em largura a partir da raiz)
+        """
+        fila = deque(self._transicoes[0].values())
+        while fila:
+            no = fila.popleft()
+            for c, filho in self._transicoes[no].items():
+                fila.append(filho)
+                falha = self._falha[no]
+                while falha and c not in self._transicoes[falha]:
+                    falha = self._falha[falha]
+                self._falha[filho] = self._transicoes[falha].get(c, 0)
+                self._saidas[filho] = self._saidas[filho] + self._saidas[self._falha[filho]]
+
+    def buscar(self, texto: str) -> Iterator[Tuple[int, int, object]]:
+        """
+        Gera (início, fim, valor) de cada ocorrência
+        """
+        no = 0
+        for i, c in enumerate(texto):
+            while no and c not in self._transicoes[no]:
+                no = self._falha[no]
+            no = self._transicoes[no].get(c, 0)
+            for tamanho, valor in self._saidas[no]:
+                yield i + 1 - tamanho, i + 1, valor
+
+class Mencao:
+    __slots__ = ('inicio', 'fim', 'ref', 'forte', 'papel', 'guiada')
+
+    def __init__(self, inicio: int, fim: int, ref: Optional[str], forte: bool):
+        # Posições em palavras: [inicio, fim)
+        self.inicio = inicio
+        self.fim = fim
+        self.ref = ref
+        self.forte = forte
+        self.papel: Optional[str] = None
+        self.guiada = False
+
+    @property
+    def confianca(self) -> float:
+        base = CONFIANCA_FORTE if self.forte else CONFIANCA_FRACA
+        return base if self.guiada else base * FATOR_SEM_GUIA
+
+def resposta_navegacao(origem: Optional[str], destino: Optional[str]) -> str:
+    """
+    Texto da resposta do chat para a origem/destino extraídos
+    """
+    if origem and destino:
+        return f"✅ Done! Showing the path from building {origem} to building {destino} on the map."
+    if destino:
+        return f"📍 Destination: building {destino}. Which building are you leaving from?"
+    if origem:
+        return f"📍 Origin: building {origem}. Which building would you like to go to?"
+    return "How can I help you with navigation?"
+
+class Intencao:
+    """
+    Resultado da análise de uma mensagem
+    """
+
+    __slots__ = ('tipo', 'origem', 'destino', 'predio_ref', 'confianca', 'motivo')
+
+    def __init__(self, tipo: str, confianca: float, motivo: str, origem: Optional[str] = None,
+                 destino: Optional[str] = None, predio_ref: Optional[str] = None):
+        self.tipo = tipo  # 'rota', 'info_predio' ou 'desconhecida'
+        self.origem = origem
+        self.destino = destino
+        self.predio_ref = predio_ref
+        self.confianca = round(confianca, 3)
+        self.motivo = motivo
+
+    def para_resultado(self) -> Dict:
+        """
+        Mesmo formato de ChatbotNavegacao.processar_mensagem
+        """
+        if self.tipo == 'info_predio':
+            return {
+                "tipo": "info_predio",
+                "predio_ref": self.predio_ref,
+                "resposta": f"Buscando informações sobre o prédio {self.predio_ref}..."
+            }
+        return {
+            "origem": self.origem,
+            "destino": self.destino,
+            "resposta": resposta_navegacao(self.origem, self.destino)
+        }
+
+    def para_dict(self) -> Dict:
+        return {nome: getattr(self, nome) for nome in self.__slots__}
+
+class MotorIntencoes:
+    """
+    Extração determinística de intenção com confiança
+    """
+
+    def __init__(self, apelidos: Dict[str, Tuple[Optional[str], bool]],
+                 limiar: float = LIMIAR_CONFIANCA):
+        """
+        Args:
+            apelidos: {texto normalizado: (ref do prédio ou None se não
+                      for um prédio com rota, menção forte)}
+            limiar: Confiança mínima para resolver sem o modelo
+        """
+        self.limiar = limiar
+        self.apelidos = apelidos
+
+        self._automato = AhoCorasick()
+        for apelido, valor in apelidos.items():
+            self._automato.adicionar(apelido, valor)
+        self._automato.construir()
+
+        # Mais longas primeiro: "informacoes do" vence "do"
+        self._guias = sorted(((g, papel) for papel, guias in GUIAS.items() for g in guias),
+                             key=lambda item: -len(item[0]))
+        self._inicios_guia = {g[0] for g, _ in self._guias}
+
+        self._lock = threading.Lock()
+        self._contagem = {'mensagens': 0, 'locais': 0, 'por_tipo': {}, 'segundos': 0.0}
+
+    @classmethod
+    def de_arquivos(cls, caminho_info: Optional[str] = None,
+                    caminho_geojson: Optional[str] = None,
+                    limiar: float = LIMIAR_CONFIANCA) -> 'MotorIntencoes':
+        """
+        Vocabulário a partir de predios_info.json e campus.geojson
+        """
+        pasta = Path(__file__).parent / 'dados'
+        with open(caminho_info or pasta / 'predios_info.json', 'r', encoding='utf-8') as f:
+            infos = json.load(f)
+        with open(caminho_geojson or pasta / 'campus.geojson', 'r', encoding='utf-8') as f:
+            geojson = json.load(f)
+
+        refs = {info.get('ref', ref).upper() for ref, info in infos.items()}
+        nomes = [(info.get('nome'), info.get('ref', ref)) for ref, info in infos.items()]
+        nomes += [(f['properties'].get('name'), f['properties'].get('ref'))
+                  for f in geojson.get('features', []) if f['properties'].get('name')]
+
+        return cls(construir_apelidos(refs, nomes), limiar)
+
+    def _mencoes(self, palavras: List[str], texto: str) -> List[Mencao]:
+        """
+        Ocorrências dos apelidos em limites de palavra, sem sobreposição
+        (a mais longa vence)
+        """
+        inicio_palavra = {}
+        fim_palavra = {}
+        posicao = 0
+        for i, palavra in enumerate(palavras):
+            inicio_palavra[posicao] = i
+            fim_palavra[posicao + len(palavra)] = i + 1
+            posicao += len(palavra) + 1
+
+        candidatas = [
+            (inicio_palavra[inicio], fim_palavra[fim], valor)
+            for inicio, fim, valor in self._automato.buscar(texto)
+            if inicio in inicio_palavra and fim in fim_palavra
+        ]
+        candidatas.sort(key=lambda c: (c[0] - c[1], c[0]))
+
+        ocupadas = set()
+        mencoes = []
+        for inicio, fim, (ref, forte) in candidatas:
+            if ocupadas.isdisjoint(range(inicio, fim)):
+                ocupadas.update(range(inicio, fim))
+                mencoes.append(Mencao(inicio, fim, ref, forte))
+
+        return sorted(mencoes, key=lambda m: m.inicio)
+
+    def _guia_antes(self, palavras: List[str], inicio: int,
+                    intermediarias: frozenset = INTERMEDIARIAS) -> Optional[str]:
+        """
+        Papel dado pela palavra-guia logo antes da posição
+        """
+        fim = inicio
+        while fim > 0 and palavras[fim - 1] in intermediarias:
+            fim -= 1
+        for guia, papel in self._guias:
+            if fim >= len(guia) and tuple(palavras[fim - len(guia):fim]) == guia:
+                return papel
+        return None
+
+    def analisar(self, mensagem: str) -> Intencao:
+        """
+        Intenção da mensagem, com confiança entre 0 e 1
+        """
+        inicio_analise = time.perf_counter()
+        intencao = self._analisar(mensagem)
+
+        with self._lock:
+            contagem = self._contagem
+            contagem['mensagens'] += 1
+            contagem['segundos'] += time.perf_counter() - inicio_analise
+            if intencao.confianca >= self.limiar:
+                contagem['locais'] += 1
+                contagem['por_tipo'][intencao.tipo] = contagem['por_tipo'].get(intencao.tipo, 0) + 1
+
+        return intencao
+
+    def resolver(self, mensagem: str) -> Optional[Dict]:
+        """
+        Resultado no formato do chatbot se a confiança atinge o limiar
+        """
+        intencao = self.analisar(mensagem)
+        return intencao.para_resultado() if intencao.confianca >= self.limiar else None
+
+    def _analisar(self, mensagem: str) -> Intencao:
+        texto = normalizar_mensagem(mensagem)
+        palavras = texto.split()
+        mencoes = self._mencoes(palavras, texto)
+
+        inicios_mencao = {m.inicio for m in mencoes}
+        aceitas = []
+        ambiguas = 0
+        for i, mencao in enumerate(mencoes):
+            mencao.papel = self._guia_antes(palavras, mencao.inicio)
+            mencao.guiada = mencao.papel is not None
+            seguinte = mencoes[i + 1] if i + 1 < len(mencoes) else None
+
+            # "X to Y" sem "from": X é a origem
+            if (mencao.papel is None and seguinte is not None and seguinte.inicio > mencao.fim
+                    and self._guia_antes(palavras, seguinte.inicio) == 'destino'
+                    and all(p in self._inicios_guia or p in INTERMEDIARIAS
+                            for p in palavras[mencao.fim:seguinte.inicio])):
+                mencao.papel = 'origem'
+                mencao.guiada = True
+
+            if not mencao.forte:
+                # Letra isolada só conta como prédio com palavra-guia antes e
+                # no fim da frase ou antes de outra guia/menção ("from a to m")
+                proxima = palavras[mencao.fim] if mencao.fim < len(palavras) else None
+                fronteira = (proxima is None or proxima in FINAIS_LETRA
+                             or proxima in self._inicios_guia or mencao.fim in inicios_mencao)
+                if mencao.ref.lower() in LETRAS_COMUNS:
+                    # "from a to m", "para o E", "A to M": pode ser o prédio,
+                    # mas quem decide é o modelo; "to a building" é só artigo
+                    if fronteira and (mencao.guiada or self._guia_antes(
+                            palavras, mencao.inicio, INTERMEDIARIAS_ARTIGOS)):
+                        ambiguas += 1
+                    continue
+                if not mencao.guiada or not fronteira:
+                    continue
+
+            aceitas.append(mencao)
+
+        intencao = self._classificar(aceitas)
+
+        if ambiguas and intencao.confianca > CONFIANCA_AMBIGUA:
+            intencao.confianca = CONFIANCA_AMBIGUA
+            intencao.motivo += '; letra que também é artigo ou conjunção'
+
+        if intencao.confianca and DUVIDOSAS.intersection(palavras):
+            intencao.confianca = round(intencao.confianca * FATOR_DUVIDOSA, 3)
+            intencao.motivo += '; negação ou pergunta fora de rota'
+
+        return intencao
+
+    @staticmethod
+    def _classificar(mencoes: Sequence[Mencao]) -> Intencao:
+        if not mencoes:
+            return Intencao('desconhecida', 0.0, 'nenhum prédio mencionado')
+
+        if any(m.ref is None for m in mencoes):
+            return Intencao('desconhecida', CONFIANCA_AMBIGUA, 'local sem rota no campus')
+
+        confianca = min(m.confianca for m in mencoes)
+        refs = {m.ref for m in mencoes}
+
+        if any(m.papel == 'info' for m in mencoes):
+            if len(refs) > 1:
+                return Intencao('desconhecida', CONFIANCA_AMBIGUA, 'informação de mais de um prédio')
+            return Intencao('info_predio', confianca, 'pedido de informação', predio_ref=refs.pop())
+
+        origens = {m.ref for m in mencoes if m.papel == 'origem'}
+        destinos = {m.ref for m in mencoes if m.papel == 'destino'}
+        sem_papel = [m for m in mencoes if m.papel is None]
+
+        if len(origens) > 1 or len(destinos) > 1:
+            return Intencao('desconhecida', CONFIANCA_AMBIGUA, 'origens ou destinos em conflito')
+
+        if sem_papel:
+            if origens or destinos or len(sem_papel) > 1:
+                return Intencao('desconhecida', CONFIANCA_AMBIGUA, 'prédio sem papel definido')
+            # Só um prédio, sem guia: provavelmente o destino
+            return Intencao('rota', confianca, 'prédio sem palavra-guia', destino=sem_papel[0].ref)
+
+        origem = origens.pop() if origens else None
+        destino = destinos.pop() if destinos else None
+
+        if origem and origem == destino:
+            return Intencao('desconhecida', CONFIANCA_AMBIGUA, 'origem igual ao destino')
+        if origem and not destino:
+            confianca *= FATOR_SO_ORIGEM
+
+        return Intencao('rota', confianca, 'gramática de rota', origem=origem, destino=destino)
+
+    def estatisticas(self) -> Dict:
+        """
+        Fração das mensagens analisadas que foi resolvida sem o modelo
+        """
+        with self._lock:
+            contagem = self._contagem
+            mensagens = contagem['mensagens']
+            return {
+                'mensagens': mensagens,
+                'resolvidas_localmente': contagem['locais'],
+                'fracao_local': round(contagem['locais'] / mensagens, 4) if mensagens else 0.0,
+                'por_tipo': dict(contagem['por_tipo']),
+                'limiar': self.limiar,
+                'microssegundos_medio': round(contagem['segundos'] / mensagens * 1e6, 1)
+                    if mensagens else 0.0
+            }
+
+def construir_apelidos(refs: Iterable[str], nomes: Iterable[Tuple[Optional[str], Optional[str]]]
+                       ) -> Dict[str, Tuple[Optional[str], bool]]:
+    """
+    Apelidos normalizados de cada prédio
+
+    Args:
+        refs: Prédios com rota (A, B, ..., SC)
+        nomes: Pares (nome, ref) dos arquivos de dados; nomes cuja ref não
+               está em refs viram menções sem rota
+    """
+    refs = {r.upper() for r in refs}
+    apelidos: Dict[str, Tuple[Optional[str], bool]] = {}
+
+    for ref in sorted(refs):
+        r = ref.lower()
+        apelidos[r] = (ref, len(r) > 1)
+        for prefixo in ('building', 'predio', 'bloco', 'edificio', 'bldg'):
+            apelidos[f'{prefixo} {r}'] = (ref, True)
+        if r not in LETRAS_COMUNS:
+            apelidos[f'{r} building'] = (ref, True)
+            apelidos[f'{r} block'] = (ref, True)
+
+    for nome, ref in nomes:
+        if not nome:
+            continue
+        ref = ref.upper() if ref and ref.upper() in refs else None
+        apelidos.setdefault(normalizar_mensagem(nome), (ref, True))
+
+    for apelido, ref in APELIDOS_EXTRAS.items():
+        if ref in refs:
+            apelidos.setdefault(apelido, (ref, True))
+
+    return apelidos
+
+_motor: Optional[MotorIntencoes] = None
+_lock_motor = threading.Lock()
+
+def obter_motor() -> MotorIntencoes:
+    """
+    Motor com os arquivos de dados padrão, construído no primeiro uso
+    """
+    global _motor
+    if _motor is None:
+        with _lock_motor:
+            if _motor is None:
+                _motor = MotorIntencoes.de_arquivos()
+    return _motor
+
+def _ler_mensagens(caminho: str) -> List[str]:
+    mensagens = []
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for linha in f:
+            linha = linha.strip()
+            if not linha:
+                continue
+            if linha.startswith('{'):
+                linha = json.loads(linha).get('mensagem', '')
+            mensagens.append(linha)
+    return mensagens
+
+MENSAGENS_EXEMPLO = [
+    "how do I get from A to M?", "I'm at building A, where is building B",
+    "take me to the student centre", "como chego no prédio M saindo do A?",
+    "route from K to SC please", "de J para T", "where is the library?",
+    "what's in building D", "o que tem no prédio F?", "tell me about building SC",
+    "I am at a loss, help", "vou para a biblioteca", "is building A open on sunday?",
+    "A to M", "hello!", "from b to b", "go to H", "estou no prédio C e quero ir para o E",
+    "how do I get to Peregrine House Residence", "don't take me through building C to M",
+]
+
+# Artigos que não podem virar o prédio A/E: (mensagem, destino esperado
+# ou None se a mensagem deve ir para o modelo)
+# (mensagem, origem, destino) esperados da resposta local; None nos dois
+# quando a mensagem deve seguir para o modelo
+CASOS_ARTIGO = [
+    ("I want to go to a building near the library", None, None),
+    ("take me to a quiet place", None, None),
+    ("is there a printer at a building close to E", None, None),
+    ("vou para a sala de estudos", None, None),
+    ("how do I get to a", None, None),
+    ("estou no prédio C e quero ir para o E", None, None),
+    ("A to M", None, None),
+    ("a to m", None, None),
+    ("E to C", None, None),
+    ("take me to building a", None, 'A'),
+    ("go to building E please", None, 'E'),
+    ("C to M", 'C', 'M'),
+]
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fração das mensagens resolvida sem o modelo")
+    parser.add_argument('arquivo', nargs='?', help="Mensagens (texto ou JSONL); padrão: exemplos")
+    parser.add_argument('--limiar', type=float, default=LIMIAR_CONFIANCA)
+    parser.add_argument('-v', '--detalhes', action='store_true', help="Mostra cada mensagem")
+    args = parser.parse_args()
+
+    motor = MotorIntencoes.de_arquivos(limiar=args.limiar)
+    mensagens = _ler_mensagens(args.arquivo) if args.arquivo else MENSAGENS_EXEMPLO
+    detalhes = args.detalhes or not args.arquivo
+
+    print("="*60)
+    print(f"🧭 MOTOR DE INTENÇÕES - {len(mensagens)} mensagens, limiar {motor.limiar}")
+    print("="*60)
+
+    falhas = []
+    if not args.arquivo:
+        for mensagem, origem, destino in CASOS_ARTIGO:
+            intencao = motor.analisar(mensagem)
+            local = intencao.confianca >= motor.limiar
+            obtido = (intencao.origem, intencao.destino) if local else (None, None)
+            if obtido != (origem, destino):
+                falhas.append(f"{mensagem!r}: {intencao.para_dict()}")
+
+    for mensagem in mensagens:
+        intencao = motor.analisar(mensagem)
+        if detalhes:
+            situacao = '⚡' if intencao.confianca >= motor.limiar else '🤖'
+            alvo = intencao.predio_ref or f"{intencao.origem or '-'} → {intencao.destino or '-'}"
+            print(f"   {situacao} {intencao.confianca:4.2f} {intencao.tipo:<12} {alvo:<9} "
+                  f"{mensagem[:50]!r} ({intencao.motivo})")
+
+    estatisticas = motor.estatisticas()
+    print(f"\n📊 Resolvidas localmente: {estatisticas['resolvidas_localmente']}/"
+          f"{estatisticas['mensagens']} ({estatisticas['fracao_local']:.1%})")
+    print(f"   Por tipo: {estatisticas['por_tipo']}")
+    print(f"   Tempo médio: {estatisticas['microssegundos_medio']:.1f} µs por mensagem")
+
+    if falhas:
+        print(f"\n❌ {len(falhas)} caso(s) de letra isolada resolvido(s) errado:")
+        for falha in falhas:
+            print(f"   - {falha}")
+        raise SystemExit(1)
@@ -6,8 +6,14 @@ Usa o grafo gerado a partir dos SVGs
 import heapq
 import json
 import math
+import random
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Set, Tuple, Union
+from grafo_compilado import GrafoCompilado, compilar_grafo
+from metricas import ROTA_COMPRIMENTO, ROTA_NAO_ENCONTRADA, ROTA_NOS_EXPANDIDOS
+from registro_grafos import registro_grafos
+import rastreamento
+from rastreamento import AVISO, INFO, ExplicacaoBusca
 
 def calcular_heuristica(no1: Dict, no2: Dict) -> float:
     """
@@ -17,165 +23,285 @@ def calcular_heuristica(no1: Dict, no2: Dict) -> float:
     dy = no1['y'] - no2['y']
     return math.sqrt(dx*dx + dy*dy)
 
-def encontrar_porta_mais_proxima(grafo: Dict, sala_id: str, origem_id: str) -> Optional[str]:
+def encontrar_porta_mais_proxima(grafo: Union[Dict, GrafoCompilado], sala_id: str,
+                                 origem_id: str) -> Optional[str]:
     """
     Encontra a porta da sala mais próxima da origem
     
     Args:
-        grafo: Dicionário com 'nos' e 'arestas'
+        grafo: Dicionário com 'nos' e 'arestas' ou GrafoCompilado
         sala_id: ID da sala (ex: "Room_1014")
         origem_id: ID do nó de origem
     
     Returns:
         ID da porta mais próxima ou None
     """
-    nos = grafo['nos']
-    numero_sala = sala_id.replace('Room_', '').replace('Centro_Room_', '')
-    
-    # Buscar todas as portas da sala
-    portas_sala = [
-        nid for nid, no in nos.items()
-        if no['tipo'] == 'porta' and no.get('sala') == numero_sala
-    ]
+    grafo_c = compilar_grafo(grafo)
+    idx = _porta_mais_proxima(grafo_c, sala_id, grafo_c.indice.get(origem_id))
+    return grafo_c.ids[idx] if idx is not None else None
+
+def _porta_mais_proxima(grafo_c: GrafoCompilado, sala_id: str,
+                        origem: Optional[int]) -> Optional[int]:
+    """
+    Versão indexada de encontrar_porta_mais_proxima
+    """
+    numero_sala = _numero_sala(sala_id)
+    portas_sala = grafo_c.portas_da_sala(numero_sala)
     
     if not portas_sala:
-        print(f"   ⚠️  Nenhuma porta encontrada para sala {numero_sala}")
+        if rastreamento.ativo(AVISO):
+            rastreamento.registrar(AVISO, f"   ⚠️  Nenhuma porta encontrada para sala {numero_sala}")
         return None
     
-    # Se houver apenas uma porta
-    if len(portas_sala) == 1:
+    # Se houver apenas uma porta ou origem desconhecida
+    if len(portas_sala) == 1 or origem is None:
         return portas_sala[0]
     
     # Encontrar porta mais próxima da origem
-    if origem_id not in nos:
-        return portas_sala[0]  # Retornar primeira porta
-    
-    origem = nos[origem_id]
-    
-    def dist_porta(porta_id: str) -> float:
-        porta = nos[porta_id]
-        return calcular_heuristica(origem, porta)
-    
-    porta_mais_proxima = min(portas_sala, key=dist_porta)
-    print(f"   ℹ️  Sala {numero_sala} tem {len(portas_sala)} portas, usando {porta_mais_proxima}")
-    
-    return porta_mais_proxima
+    return grafo_c.porta_mais_proxima(numero_sala, grafo_c._xs[origem], grafo_c._ys[origem])
 
-def calcular_caminho_a_star(grafo: Dict, origem_id: str, destino_id: str) -> Optional[List[str]]:
+def _numero_sala(sala_id: str) -> str:
     """
-    Calcula caminho usando algoritmo A*
+    Número da sala a partir de um ID Room_XXXX ou Centro_Room_XXXX.
+    No grafo do prédio inteiro o prefixo do andar é mantido ("A2:Room_2001"
+    -> "A2:2001").
+    """
+    prefixo, separador, local = sala_id.rpartition(':')
+    return prefixo + separador + local.replace('Centro_Room_', '').replace('Room_', '')
+
+def _eh_sala(no_id: str) -> bool:
+    """
+    Se o ID se refere a uma sala (com ou sem prefixo de andar)
+    """
+    local = no_id.rpartition(':')[2]
+    return local.startswith('Room_') or local.startswith('Centro_Room_')
+
+def _resolver_no(grafo_c: GrafoCompilado, no_id: str) -> List[int]:
+    """
+    Converte um ID (nó ou sala) nos índices onde a busca pode começar/terminar.
+    Salas resolvem para todas as suas portas ou, sem portas, para o centro
+    da sala. Lista vazia se nada for encontrado.
+    """
+    if _eh_sala(no_id):
+        numero_sala = _numero_sala(no_id)
+        portas = grafo_c.portas_da_sala(numero_sala)
+        if portas:
+            return portas
+        
+        # Tentar usar centro da sala se não houver portas
+        if numero_sala not in grafo_c.centro_por_sala:
+            if rastreamento.ativo(AVISO):
+                rastreamento.registrar(AVISO, f"   ❌ Nenhuma porta ou centro encontrado para a sala {no_id}")
+            return []
+        return [grafo_c.centro_por_sala[numero_sala]]
+    
+    if no_id not in grafo_c.indice:
+        if rastreamento.ativo(AVISO):
+            rastreamento.registrar(AVISO, f"   ❌ Nó não encontrado: {no_id}")
+        return []
+    
+    return [grafo_c.indice[no_id]]
+
+def _a_star(grafo_c: GrafoCompilado, origens: List[int], destinos: List[int],
+            usar_landmarks: bool = True, explicacao: Optional[ExplicacaoBusca] = None
+            ) -> Tuple[Optional[List[int]], float, int]:
+    """
+    A* multi-origem/multi-destino sobre o grafo compilado
     
-    Args:
-        grafo: Dicionário com 'nos' e 'arestas'
-        origem_id: ID do nó de origem
-        destino_id: ID do nó de destino
+    Todas as origens começam com custo zero e a busca termina no primeiro
+    destino retirado da fila; a heurística é a distância ao destino mais
+    próximo, que continua admissível. Com landmarks no grafo (e
+    usar_landmarks) a heurística é a ALT.
+    
+    Com explicacao (modo depuração) cada expansão é registrada junto com o
+    tamanho da fila; sem ela o laço não faz nenhum trabalho extra além de
+    um teste de None.
     
     Returns:
-        Lista de IDs de nós no caminho, ou None se não houver caminho
+        (lista de índices do caminho ou None, distância total, nós expandidos)
     """
-    nos = grafo['nos']
+    adjacencia = grafo_c._adjacencia
+    h = grafo_c.heuristica_para(destinos, usar_landmarks)
+    alvos = set(destinos)
     
-    # Validar nós
-    if origem_id not in nos:
-        print(f"   ❌ Origem não encontrada: {origem_id}")
-        return None
+    # Fila de prioridade: (f_score, contador, índice)
+    abertos = [(h[o], contador, o) for contador, o in enumerate(origens)]
+    heapq.heapify(abertos)
+    contador = len(abertos)
     
-    if destino_id not in nos:
-        print(f"   ❌ Destino não encontrado: {destino_id}")
-        return None
-    
-    # Se destino é uma sala, usar a porta mais próxima
-    if destino_id.startswith('Room_') or destino_id.startswith('Centro_Room_'):
-        nova_destino = encontrar_porta_mais_proxima(grafo, destino_id, origem_id)
-        if nova_destino:
-            destino_id = nova_destino
-        else:
-            # Tentar usar centro da sala se não houver portas
-            if not destino_id.startswith('Centro_'):
-                destino_id = f'Centro_{destino_id}'
-                if destino_id not in nos:
-                    print(f"   ❌ Nenhuma porta ou centro encontrado para a sala")
-                    return None
-    
-    # Se origem é uma sala, usar a porta mais próxima
-    if origem_id.startswith('Room_') or origem_id.startswith('Centro_Room_'):
-        nova_origem = encontrar_porta_mais_proxima(grafo, origem_id, destino_id)
-        if nova_origem:
-            origem_id = nova_origem
-        else:
-            if not origem_id.startswith('Centro_'):
-                origem_id = f'Centro_{origem_id}'
-                if origem_id not in nos:
-                    print(f"   ❌ Nenhuma porta ou centro encontrado para a sala de origem")
-                    return None
-    
-    print(f"   🎯 Calculando rota: {origem_id} → {destino_id}")
-    
-    # Implementação A*
-    # Fila de prioridade: (f_score, contador, id)
-    contador = 0
-    abertos = [(0, contador, origem_id)]
-    
-    # Conjuntos de controle
-    conjunto_abertos = {origem_id}
-    conjunto_fechados = set()
-    
-    # Custos
-    g_score = {origem_id: 0}
-    f_score = {origem_id: calcular_heuristica(nos[origem_id], nos[destino_id])}
-    
-    # Rastreamento de caminho
+    g_score = {o: 0.0 for o in origens}
     veio_de = {}
+    fechados = set()
     
     while abertos:
         _, _, atual = heapq.heappop(abertos)
         
-        if atual in conjunto_fechados:
+        if atual in fechados:
             continue
         
-        # Chegou no destino
-        if atual == destino_id:
-            # Reconstruir caminho
+        # Chegou em um dos destinos
+        if atual in alvos:
+            distancia = g_score[atual]
             caminho = [atual]
             while atual in veio_de:
                 atual = veio_de[atual]
                 caminho.append(atual)
             caminho.reverse()
-            
-            # Calcular distância total
-            distancia_total = g_score[destino_id]
-            
-            print(f"   ✅ Caminho encontrado!")
-            print(f"   📏 Distância total: {distancia_total:.2f} pixels")
-            print(f"   🔢 Nós no caminho: {len(caminho)}")
-            
-            return caminho
+            if explicacao is not None:
+                explicacao.g_scores = g_score
+            return caminho, distancia, len(fechados)
         
-        conjunto_fechados.add(atual)
-        conjunto_abertos.discard(atual)
+        fechados.add(atual)
+        g_atual = g_score[atual]
         
-        # Explorar vizinhos
-        for vizinho in nos[atual]['conexoes']:
-            if vizinho in conjunto_fechados:
+        if explicacao is not None:
+            explicacao.expandir(atual, len(abertos))
+        
+        # Explorar vizinhos (pesos já calculados no CSR)
+        for vizinho, peso in adjacencia[atual]:
+            if vizinho in fechados:
                 continue
             
-            # Calcular distância
-            distancia = calcular_heuristica(nos[atual], nos[vizinho])
-            tentativa_g = g_score[atual] + distancia
+            tentativa_g = g_atual + peso
             
-            if vizinho not in g_score or tentativa_g < g_score[vizinho]:
-                # Melhor caminho encontrado
+            if tentativa_g < g_score.get(vizinho, math.inf):
                 veio_de[vizinho] = atual
                 g_score[vizinho] = tentativa_g
-                f_score[vizinho] = tentativa_g + calcular_heuristica(nos[vizinho], nos[destino_id])
-                
-                if vizinho not in conjunto_abertos:
-                    contador += 1
-                    heapq.heappush(abertos, (f_score[vizinho], contador, vizinho))
-                    conjunto_abertos.add(vizinho)
-    
-    print(f"   ❌ Nenhum caminho encontrado de {origem_id} para {destino_id}")
-    return None
+                contador += 1
+                heapq.heappush(abertos, (tentativa_g + h[vizinho], contador, vizinho))
+    
+    if explicacao is not None:
+        explicacao.g_scores = g_score
+    return None, math.inf, len(fechados)
+
+def calcular_distancias_dijkstra(grafo_c: GrafoCompilado, origens: List[int],
+                                 alvos: Optional[Set[int]] = None,
+                                 limite: float = math.inf) -> Tuple[Dict[int, float], Dict[int, int]]:
+    """
+    Dijkstra de uma (ou várias) origens para muitos nós
+    
+    Args:
+        grafo_c: Grafo compilado
+        origens: Índices de partida, todos com custo zero
+        alvos: Se informado, a busca para quando todos forem fechados
+        limite: Não expande nós com custo acima deste valor (pixels)
+    
+    Returns:
+        (distâncias dos nós fechados, predecessores) por índice
+    """
+    adjacencia = grafo_c._adjacencia
+    distancias = {o: 0.0 for o in origens}
+    anteriores = {}
+    fechados = {}
+    restantes = set(alvos) if alvos is not None else None
+    
+    fila = [(0.0, o) for o in origens]
+    heapq.heapify(fila)
+    
+    while fila:
+        dist_atual, atual = heapq.heappop(fila)
+        
+        if atual in fechados:
+            continue
+        if dist_atual > limite:
+            break
+        
+        fechados[atual] = dist_atual
+        
+        if restantes is not None:
+            restantes.discard(atual)
+            if not restantes:
+                break
+        
+        for vizinho, peso in adjacencia[atual]:
+            nova_dist = dist_atual + peso
+            if nova_dist < distancias.get(vizinho, math.inf):
+                distancias[vizinho] = nova_dist
+                anteriores[vizinho] = atual
+                heapq.heappush(fila, (nova_dist, vizinho))
+    
+    return fechados, anteriores
+
+def reconstruir_caminho(anteriores: Dict[int, int], destino: int) -> List[int]:
+    """
+    Caminho da origem até destino a partir do mapa de predecessores
+    """
+    caminho = [destino]
+    while caminho[-1] in anteriores:
+        caminho.append(anteriores[caminho[-1]])
+    caminho.reverse()
+    return caminho
+
+def calcular_caminho_a_star(grafo: Union[Dict, GrafoCompilado], origem_id: str,
+                            destino_id: str, usar_landmarks: bool = True) -> Optional[List[str]]:
+    """
+    Calcula caminho usando algoritmo A*
+    
+    Args:
+        grafo: GrafoCompilado (preferível) ou dicionário com 'nos' e 'arestas',
+               que é compilado a cada chamada
+        origem_id: ID do nó de origem
+        destino_id: ID do nó de destino
+        usar_landmarks: Usar a heurística ALT quando o grafo tiver landmarks
+    
+    Returns:
+        Lista de IDs de nós no caminho, ou None se não houver caminho
+    """
+    grafo_c = compilar_grafo(grafo)
+    resultado = _calcular_caminho_indices(grafo_c, origem_id, destino_id, usar_landmarks)
+    
+    if not resultado:
+        return None
+    
+    return [grafo_c.ids[i] for i in resultado[0]]
+
+def _calcular_caminho_indices(grafo_c: GrafoCompilado, origem_id: str, destino_id: str,
+                              usar_landmarks: bool = True,
+                              explicacao: Optional[ExplicacaoBusca] = None
+                              ) -> Optional[Tuple[List[int], float, int]]:
+    """
+    Resolve origem/destino e executa o A*, retornando índices, distância e
+    número de nós expandidos. Salas com várias portas entram na busca com
+    todas elas de uma vez. Com explicacao, os passos da busca são registrados nela.
+    """
+    destinos = _resolver_no(grafo_c, destino_id)
+    if not destinos:
+        return None
+    
+    origens = _resolver_no(grafo_c, origem_id)
+    if not origens:
+        return None
+    
+    if rastreamento.ativo(INFO):
+        rastreamento.registrar(INFO, f"   🎯 Calculando rota: {_rotulo(grafo_c, origem_id, origens)} → "
+                                     f"{_rotulo(grafo_c, destino_id, destinos)}")
+    
+    caminho, distancia_total, expandidos = _a_star(grafo_c, origens, destinos, usar_landmarks,
+                                                   explicacao)
+    ROTA_NOS_EXPANDIDOS.observar(expandidos, 'interno')
+    
+    if caminho is None:
+        ROTA_NAO_ENCONTRADA.inc('interno')
+        if rastreamento.ativo(AVISO):
+            rastreamento.registrar(AVISO, f"   ❌ Nenhum caminho encontrado de {origem_id} para {destino_id}")
+        return None
+    
+    ROTA_COMPRIMENTO.observar(len(caminho), 'interno')
+    
+    if rastreamento.ativo(INFO):
+        rastreamento.registrar(INFO, f"   ✅ Caminho encontrado!\n"
+                                     f"   📏 Distância total: {distancia_total:.2f} pixels\n"
+                                     f"   🔢 Nós no caminho: {len(caminho)} ({expandidos} nós expandidos)")
+    
+    return caminho, distancia_total, expandidos
+
+def _rotulo(grafo_c: GrafoCompilado, no_id: str, indices: List[int]) -> str:
+    """
+    Texto de log para um ponto da busca
+    """
+    if len(indices) == 1:
+        return grafo_c.ids[indices[0]]
+    return f"{no_id} ({len(indices)} portas)"
 
 def testar_pathfinding():
     """
@@ -196,6 +322,8 @@ def testar_pathfinding():
     with open(grafo_path, 'r', encoding='utf-8') as f:
         grafo = json.load(f)
     
+    grafo_c = GrafoCompilado.de_dict(grafo)
+    
     print(f"\n✅ Grafo carregado: {len(grafo['nos'])} nós, {len(grafo['arestas'])} arestas")
     
     # Listar alguns nós disponíveis
@@ -255,7 +383,7 @@ def testar_pathfinding():
         })
     
     # Teste 5: Para sala Room_1014 (se existir)
-    if nos_corredor and 'Room_1014' in [n.replace('Centro_', '') for n in grafo['nos'].keys()]:
+    if nos_corredor and 'Centro_Room_1014' in grafo['nos']:
         testes.append({
             'nome': 'Corredor para Sala 1014',
             'origem': nos_corredor[0],
@@ -269,7 +397,7 @@ def testar_pathfinding():
         print(f"Teste {i}: {teste['nome']}")
         print(f"{'─'*60}")
         
-        caminho = calcular_caminho_a_star(grafo, teste['origem'], teste['destino'])
+        caminho = calcular_caminho_a_star(grafo_c, teste['origem'], teste['destino'])
         
         resultado = {
             'teste': teste['nome'],
@@ -300,6 +428,15 @@ def testar_pathfinding():
     print(f"Falhas.........: {total - sucessos}")
     print(f"Taxa de sucesso: {(sucessos/total*100):.1f}%" if total > 0 else "N/A")
     
+    # Comparar heurísticas (se o grafo tiver landmarks)
+    comparacao = None
+    if grafo_c.landmarks is not None:
+        comparacao = comparar_heuristicas(grafo_c)
+        print(f"\n📉 Nós expandidos por consulta ({comparacao['consultas']} consultas aleatórias):")
+        print(f"   Euclidiana....: {comparacao['media_euclidiana']:.1f}")
+        print(f"   ALT...........: {comparacao['media_alt']:.1f}")
+        print(f"   Redução.......: {comparacao['reducao_percentual']:.1f}%")
+    
     # Salvar resultados
     resultados_path = Path(__file__).parent / 'dados' / 'grafos' / 'testes_pathfinding.json'
     with open(resultados_path, 'w', encoding='utf-8') as f:
@@ -307,67 +444,108 @@ def testar_pathfinding():
             'total_testes': total,
             'sucessos': sucessos,
             'falhas': total - sucessos,
+            'comparacao_heuristicas': comparacao,
             'testes': resultados
         }, f, indent=2, ensure_ascii=False)
     
     print(f"\n💾 Resultados salvos em: {resultados_path}")
 
-def calcular_rota_completa(origem: str, destino: str, andar: str = 'A1') -> Optional[Dict]:
+def comparar_heuristicas(grafo_c: GrafoCompilado, num_consultas: int = 200,
+                         seed: int = 0) -> Dict:
+    """
+    Compara os nós expandidos pelo A* com heurística euclidiana e ALT
+    em pares aleatórios de nós
+    """
+    rnd = random.Random(seed)
+    n = grafo_c.num_nos
+    expandidos_euclidiana = []
+    expandidos_alt = []
+    
+    for _ in range(num_consultas):
+        origem, destino = rnd.randrange(n), rnd.randrange(n)
+        expandidos_euclidiana.append(_a_star(grafo_c, [origem], [destino], usar_landmarks=False)[2])
+        expandidos_alt.append(_a_star(grafo_c, [origem], [destino], usar_landmarks=True)[2])
+    
+    media_euclidiana = sum(expandidos_euclidiana) / num_consultas
+    media_alt = sum(expandidos_alt) / num_consultas
+    
+    return {
+        'consultas': num_consultas,
+        'media_euclidiana': media_euclidiana,
+        'media_alt': media_alt,
+        'reducao_percentual': (1 - media_alt / media_euclidiana) * 100 if media_euclidiana else 0.0
+    }
+
+def carregar_grafo_andar(andar: Optional[str], predio: str = 'A') -> Optional[GrafoCompilado]:
+    """
+    Retorna o grafo compilado de um andar (ou do prédio inteiro, com
+    andar None) a partir do registro em memória
+    """
+    return registro_grafos.obter(predio, andar)
+
+def calcular_rota_completa(origem: str, destino: str, andar: Optional[str] = 'A1',
+                           predio: str = 'A', explicar: bool = False) -> Optional[Dict]:
     """
     Função de alto nível para calcular rota completa
     
     Args:
         origem: ID do local de origem (pode ser sala, porta, nó)
         destino: ID do local de destino (pode ser sala, porta, nó)
-        andar: Andar do prédio (default: 'A1')
+        andar: Andar do prédio (default: 'A1'). Com None a rota usa o grafo
+               do prédio inteiro e pode trocar de andar; nesse caso os IDs
+               levam o andar como prefixo (ex: 'A1:Node_H1_01', 'A3:Room_3010')
+        predio: Referência do prédio (default: 'A')
+        explicar: Incluir em 'explicacao' a ordem de expansão, o tamanho da
+                  fila de abertos e os g-scores da busca (depuração)
     
     Returns:
         Dicionário com informações da rota ou None
     """
-    # Carregar grafo
-    grafo_path = Path(__file__).parent / 'dados' / 'grafos' / f'building_a_{andar.lower()}_grafo.json'
+    grafo_c = carregar_grafo_andar(andar, predio)
     
-    if not grafo_path.exists():
-        print(f"❌ Grafo não encontrado: {grafo_path}")
+    if grafo_c is None:
         return None
     
-    with open(grafo_path, 'r', encoding='utf-8') as f:
-        grafo = json.load(f)
-    
     # Calcular caminho
-    caminho = calcular_caminho_a_star(grafo, origem, destino)
+    explicacao = ExplicacaoBusca() if explicar else None
+    resultado = _calcular_caminho_indices(grafo_c, origem, destino, explicacao=explicacao)
     
-    if not caminho:
+    if not resultado:
         return None
     
-    # Calcular informações adicionais
-    nos = grafo['nos']
-    distancia_total = 0
-    
-    for i in range(len(caminho) - 1):
-        no_atual = nos[caminho[i]]
-        no_prox = nos[caminho[i + 1]]
-        distancia_total += calcular_heuristica(no_atual, no_prox)
+    caminho, distancia_total, expandidos = resultado
     
-    return {
+    rota = {
         'origem': origem,
         'destino': destino,
         'andar': andar,
-        'caminho': caminho,
+        'caminho': [grafo_c.ids[i] for i in caminho],
         'num_passos': len(caminho),
         'distancia_pixels': round(distancia_total, 2),
-        'nos_detalhados': [
+        'nos_expandidos': expandidos,
+        'nos_detalhados': [grafo_c.no_detalhado(i) for i in caminho],
+        'transicoes': [
             {
-                'id': nid,
-                'tipo': nos[nid]['tipo'],
-                'x': nos[nid]['x'],
-                'y': nos[nid]['y']
+                'de': grafo_c.ids[a],
+                'para': grafo_c.ids[b],
+                'tipo': grafo_c.tipos[a],
+                'andar_origem': grafo_c.andares[a],
+                'andar_destino': grafo_c.andares[b]
             }
-            for nid in caminho
+            for a, b in zip(caminho, caminho[1:])
+            if grafo_c.andares[a] != grafo_c.andares[b]
         ]
     }
+    
+    if explicacao is not None:
+        rota['explicacao'] = explicacao.para_dict(grafo_c.ids)
+    
+    return rota
 
 if __name__ == '__main__':
+    # Mostrar as mensagens das buscas no terminal
+    rastreamento.configurar_rastreador(rastreamento.RastreadorPrint(INFO))
+    
     # Executar testes
     testar_pathfinding()
     
@@ -0,0 +1,124 @@
+"""
+Rastreamento das buscas de caminho
+Substitui os print() dos caminhos quentes por um rastreador configurável.
+O rastreador padrão fica desligado: quem registra testa o nível antes de
+montar a mensagem, então nada é formatado nem escrito.
+
+O modo "explicar" registra a ordem de expansão do A*, o tamanho da fila
+de abertos a cada passo e os g-scores finais, para depuração.
+"""
+
+import logging
+import os
+from typing import Dict, List, Optional
+
+# Níveis (mesmos valores do módulo logging)
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+AVISO = logging.WARNING
+ERRO = logging.ERROR
+DESLIGADO = logging.CRITICAL + 10
+
+# Limite de passos guardados em uma explicação (buscas grandes são truncadas)
+MAX_PASSOS_EXPLICACAO = 20000
+
+class Rastreador:
+    """
+    Interface do rastreador; esta implementação descarta tudo
+    """
+
+    nivel = DESLIGADO
+
+    def registrar(self, nivel: int, mensagem: str):
+        pass
+
+class RastreadorPrint(Rastreador):
+    """
+    Escreve as mensagens no stdout (comportamento antigo dos scripts)
+    """
+
+    def __init__(self, nivel: int = INFO):
+        self.nivel = nivel
+
+    def registrar(self, nivel: int, mensagem: str):
+        if nivel >= self.nivel:
+            print(mensagem)
+
+class RastreadorLogging(Rastreador):
+    """
+    Encaminha as mensagens para um logger do módulo logging
+    """
+
+    def __init__(self, nivel: int = INFO, nome: str = 'campus_guide.rotas'):
+        self.nivel = nivel
+        self.logger = logging.getLogger(nome)
+
+    def registrar(self, nivel: int, mensagem: str):
+        if nivel >= self.nivel:
+            self.logger.log(nivel, mensagem)
+
+def _rastreador_do_ambiente() -> Rastreador:
+    """
+    RASTREAMENTO=print|logging e RASTREAMENTO_NIVEL=debug|info|aviso|erro
+    """
+    destino = os.getenv('RASTREAMENTO', '').lower()
+    niveis = {'debug': DEBUG, 'info': INFO, 'aviso': AVISO, 'erro': ERRO}
+    nivel = niveis.get(os.getenv('RASTREAMENTO_NIVEL', 'info').lower(), INFO)
+
+    if destino == 'print':
+        return RastreadorPrint(nivel)
+    if destino == 'logging':
+        return RastreadorLogging(nivel)
+    return Rastreador()
+
+rastreador: Rastreador = _rastreador_do_ambiente()
+
+def configurar_rastreador(novo: Rastreador):
+    """
+    Troca o rastreador global do processo
+    """
+    global rastreador
+    rastreador = novo
+
+def ativo(nivel: int) -> bool:
+    """
+    Se mensagens deste nível serão registradas (testar antes de formatar)
+    """
+    return nivel >= rastreador.nivel
+
+def registrar(nivel: int, mensagem: str):
+    rastreador.registrar(nivel, mensagem)
+
+class ExplicacaoBusca:
+    """
+    Registro passo a passo de uma busca A*
+    """
+
+    def __init__(self, max_passos: int = MAX_PASSOS_EXPLICACAO):
+        self.max_passos = max_passos
+        self.ordem_expansao: List[int] = []
+        self.tamanho_abertos: List[int] = []
+        self.g_scores: Dict[int, float] = {}
+        self.truncada = False
+
+    def expandir(self, no: int, tamanho_abertos: int):
+        if len(self.ordem_expansao) >= self.max_passos:
+            self.truncada = True
+            return
+        self.ordem_expansao.append(no)
+        self.tamanho_abertos.append(tamanho_abertos)
+
+    def para_dict(self, ids: Optional[List[str]] = None) -> Dict:
+        """
+        Explicação em formato JSON, com IDs de nós se ids for informado
+        """
+        nome = (lambda i: ids[i]) if ids is not None else (lambda i: i)
+
+        return {
+            'nos_expandidos': len(self.ordem_expansao),
+            'truncada': self.truncada,
+            'ordem_expansao': [nome(i) for i in self.ordem_expansao],
+            'tamanho_abertos': self.tamanho_abertos,
+            'pico_abertos': max(self.tamanho_abertos, default=0),
+            'g_scores': {nome(i): round(g, 3) for i, g in self.g_scores.items()}
+        }
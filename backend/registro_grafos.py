@@ -0,0 +1,298 @@
+"""
+Registro em memória dos grafos de navegação interna
+Mantém os grafos compilados de cada prédio/andar carregados no processo,
+com despejo LRU, revalidação por mtime/hash do arquivo e contadores de uso
+
+Quando há um snapshot binário (.snap) correspondente ao JSON, o grafo é
+mapeado dele em vez de compilado do JSON; sem snapshot, o JSON é
+compilado e o snapshot gravado para os próximos processos.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from grafo_compilado import TIPO_SNAPSHOT, GrafoCompilado
+from snapshot_grafo import SnapshotInvalido, caminho_snapshot, fonte_confere, ler_snapshot
+
+# building_<predio>_<andar>_grafo.json ou building_<predio>_grafo.json (prédio
+# inteiro), ou só o snapshot .snap correspondente
+PADRAO_ARQUIVO_GRAFO = re.compile(r'^building_([a-z0-9]+)(?:_([a-z0-9]+))?_grafo\.(?:json|snap)$')
+
+class _EntradaGrafo:
+    """
+    Grafo carregado e a assinatura do arquivo de onde veio
+    """
+
+    __slots__ = ('grafo', 'mtime_ns', 'tamanho', 'hash', 'verificado_em')
+
+    def __init__(self, grafo: GrafoCompilado, mtime_ns: int, tamanho: int, hash_conteudo: str):
+        self.grafo = grafo
+        self.mtime_ns = mtime_ns
+        self.tamanho = tamanho
+        self.hash = hash_conteudo
+        self.verificado_em = time.monotonic()
+
+class RegistroGrafos:
+    """
+    Cache LRU de grafos compilados, chaveado por (prédio, andar)
+
+    Andar None corresponde ao grafo do prédio inteiro, com as transições
+    entre andares.
+    """
+
+    def __init__(self, diretorio: Optional[str] = None, capacidade: int = 16,
+                 intervalo_revalidacao: float = 1.0, gravar_snapshots: bool = True):
+        """
+        Args:
+            diretorio: Pasta com os arquivos building_*_grafo.json
+            capacidade: Número máximo de andares mantidos em memória
+            intervalo_revalidacao: Segundos entre verificações do arquivo
+                                   em disco para um mesmo grafo
+            gravar_snapshots: Gravar o .snap ao compilar um JSON sem
+                              snapshot atualizado
+        """
+        self.diretorio = Path(diretorio) if diretorio else Path(__file__).parent / 'dados' / 'grafos'
+        self.capacidade = capacidade
+        self.intervalo_revalidacao = intervalo_revalidacao
+        self.gravar_snapshots = gravar_snapshots
+
+        self._entradas: 'OrderedDict[Tuple[str, str], _EntradaGrafo]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Um lock por grafo para carga e revalidação
+        self._locks_chave: Dict[Tuple[str, str], threading.Lock] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.recargas = 0
+        self.despejos = 0
+        self.carregados_de_snapshot = 0
+
+    def caminho_grafo(self, predio: str, andar: Optional[str]) -> Path:
+        """
+        Caminho do arquivo de grafo de um andar (ou do prédio inteiro)
+        """
+        if andar is None:
+            return self.diretorio / f'building_{predio.lower()}_grafo.json'
+        return self.diretorio / f'building_{predio.lower()}_{andar.lower()}_grafo.json'
+
+    def obter(self, predio: str, andar: Optional[str]) -> Optional[GrafoCompilado]:
+        """
+        Retorna o grafo compilado do andar, carregando-o se necessário
+
+        Args:
+            predio: Referência do prédio (ex: 'A')
+            andar: Andar (ex: 'A1') ou None para o prédio inteiro
+
+        Returns:
+            GrafoCompilado ou None se o arquivo não existir
+        """
+        chave = (predio.lower(), andar.lower() if andar else '')
+        caminho = self.caminho_grafo(predio, andar)
+
+        # O lock do registro só protege o OrderedDict e os contadores;
+        # carga e revalidação (leitura, hash, compilação) usam o lock da
+        # chave, e só pedidos pelo mesmo grafo esperam uns pelos outros
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and not self._revalidacao_pendente(entrada):
+                self.hits += 1
+                self._entradas.move_to_end(chave)
+                return entrada.grafo
+            lock_chave = self._locks_chave.setdefault(chave, threading.Lock())
+
+        with lock_chave:
+            with self._lock:
+                # Outro pedido pode ter carregado enquanto este esperava
+                entrada = self._entradas.get(chave)
+
+            if entrada is not None:
+                nova = self._revalidar(entrada, caminho)
+                with self._lock:
+                    self.hits += 1
+                    if nova is not entrada:
+                        self.recargas += 1
+                    self._inserir(chave, nova)
+                return nova.grafo
+
+            with self._lock:
+                self.misses += 1
+
+            if not caminho.exists() and not caminho_snapshot(caminho).exists():
+                print(f"❌ Grafo não encontrado: {caminho}")
+                return None
+
+            entrada = self._carregar(caminho)
+            if entrada is None:
+                print(f"❌ Grafo não encontrado: {caminho}")
+                return None
+
+            with self._lock:
+                self._inserir(chave, entrada)
+            return entrada.grafo
+
+    def _carregar(self, caminho: Path) -> Optional[_EntradaGrafo]:
+        """
+        Mapeia o snapshot se ele corresponder ao JSON; senão compila o JSON
+
+        Returns:
+            None se o snapshot foi rejeitado e não há JSON para compilar
+        """
+        entrada = self._carregar_snapshot(caminho)
+        if entrada is not None:
+            return entrada
+
+        if not caminho.exists():
+            return None
+
+        stat = caminho.stat()
+        conteudo = caminho.read_bytes()
+
+        return self._compilar(caminho, conteudo, stat)
+
+    def _carregar_snapshot(self, caminho: Path) -> Optional[_EntradaGrafo]:
+        caminho_snap = caminho_snapshot(caminho)
+        if not caminho_snap.exists():
+            return None
+
+        try:
+            snapshot = ler_snapshot(caminho_snap, TIPO_SNAPSHOT)
+            if not fonte_confere(snapshot, caminho):
+                return None
+            grafo = GrafoCompilado.de_snapshot(snapshot)
+        except (SnapshotInvalido, KeyError, OSError) as e:
+            print(f"⚠️ Snapshot ignorado ({caminho_snap.name}): {e}")
+            return None
+
+        # A assinatura do JSON de origem, para a revalidação seguir igual
+        fonte = snapshot.meta.get('fonte') or {}
+        with self._lock:
+            self.carregados_de_snapshot += 1
+        return _EntradaGrafo(grafo, fonte.get('mtime_ns', 0), fonte.get('tamanho', 0),
+                             fonte.get('sha256', ''))
+
+    def _compilar(self, caminho: Path, conteudo: bytes, stat: os.stat_result) -> _EntradaGrafo:
+        """
+        Compila o JSON já lido e grava o snapshot para os próximos processos
+        """
+        grafo = GrafoCompilado.de_dict(json.loads(conteudo))
+        hash_conteudo = hashlib.sha256(conteudo).hexdigest()
+
+        if self.gravar_snapshots:
+            fonte = {'arquivo': caminho.name, 'tamanho': stat.st_size,
+                     'mtime_ns': stat.st_mtime_ns, 'sha256': hash_conteudo}
+            try:
+                grafo.salvar_snapshot(caminho_snapshot(caminho), {'fonte': fonte})
+            except OSError as e:
+                # Pasta somente leitura: seguir com o grafo compilado
+                print(f"⚠️ Não foi possível gravar o snapshot de {caminho.name}: {e}")
+
+        return _EntradaGrafo(grafo, stat.st_mtime_ns, stat.st_size, hash_conteudo)
+
+    def _revalidacao_pendente(self, entrada: _EntradaGrafo) -> bool:
+        return time.monotonic() - entrada.verificado_em >= self.intervalo_revalidacao
+
+    def _revalidar(self, entrada: _EntradaGrafo, caminho: Path) -> _EntradaGrafo:
+        """
+        Confere se o arquivo mudou desde o carregamento (com o lock da chave)
+
+        mtime e tamanho são consultados no máximo uma vez por intervalo;
+        se mudaram, o hash do conteúdo decide se é preciso recompilar.
+
+        Returns:
+            A própria entrada ou, se o conteúdo mudou, a recompilada
+        """
+        if not self._revalidacao_pendente(entrada):
+            return entrada
+        entrada.verificado_em = time.monotonic()
+
+        try:
+            stat = caminho.stat()
+        except FileNotFoundError:
+            # Arquivo removido: continuar servindo a versão em memória
+            return entrada
+
+        if stat.st_mtime_ns == entrada.mtime_ns and stat.st_size == entrada.tamanho:
+            return entrada
+
+        conteudo = caminho.read_bytes()
+        hash_conteudo = hashlib.sha256(conteudo).hexdigest()
+
+        if hash_conteudo == entrada.hash:
+            # Apenas o mtime mudou (ex: arquivo regravado igual)
+            entrada.mtime_ns = stat.st_mtime_ns
+            entrada.tamanho = stat.st_size
+            return entrada
+
+        nova = self._compilar(caminho, conteudo, stat)
+        print(f"🔄 Grafo recarregado: {caminho.name}")
+        return nova
+
+    def _inserir(self, chave: Tuple[str, str], entrada: _EntradaGrafo):
+        """
+        Insere a entrada como mais recente, despejando as mais antigas
+        """
+        self._entradas[chave] = entrada
+        self._entradas.move_to_end(chave)
+
+        while len(self._entradas) > self.capacidade:
+            self._entradas.popitem(last=False)
+            self.despejos += 1
+
+    def aquecer(self) -> List[Tuple[str, Optional[str]]]:
+        """
+        Carrega todos os grafos encontrados no diretório
+
+        Returns:
+            Lista de (prédio, andar) carregados (andar None = prédio inteiro)
+        """
+        carregados = []
+
+        if not self.diretorio.exists():
+            return carregados
+
+        grafos = set()
+        for arquivo in os.listdir(self.diretorio):
+            match = PADRAO_ARQUIVO_GRAFO.match(arquivo)
+            if match:
+                grafos.add(match.groups())
+
+        for predio, andar in sorted(grafos, key=lambda g: (g[0], g[1] or '')):
+            if self.obter(predio, andar) is not None:
+                carregados.append((predio, andar))
+
+        print(f"🔥 {len(carregados)} grafos internos carregados em memória")
+
+        return carregados
+
+    def limpar(self):
+        """
+        Remove todos os grafos da memória
+        """
+        with self._lock:
+            self._entradas.clear()
+
+    def estatisticas(self) -> Dict:
+        """
+        Contadores de uso do registro
+        """
+        total = self.hits + self.misses
+
+        return {
+            'grafos_em_memoria': [f'{p}_{a}' if a else p for p, a in self._entradas.keys()],
+            'capacidade': self.capacidade,
+            'hits': self.hits,
+            'misses': self.misses,
+            'recargas': self.recargas,
+            'despejos': self.despejos,
+            'carregados_de_snapshot': self.carregados_de_snapshot,
+            'taxa_acerto': round(self.hits / total, 4) if total else 0.0
+        }
+
+# Registro global do processo
+registro_grafos = RegistroGrafos()
@@ -0,0 +1,107 @@
+"""
+Respostas JSON pré-serializadas para dados que mudam pouco
+Serializa uma vez, guarda as variantes gzip/brotli e responde com
+ETag forte, 304 Not Modified e Cache-Control
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Ordem de preferência entre codificações com o mesmo q
+PREFERENCIA_CODIFICACAO = ('br', 'gzip', 'identity')
+
+# Variantes comprimidas menores que isso não compensam
+TAMANHO_MINIMO_COMPRESSAO = 1024
+
+class RespostaPreSerializada:
+    """
+    Corpo JSON serializado uma única vez, com variantes comprimidas
+    """
+
+    def __init__(self, dados, max_age: int = 300):
+        """
+        Args:
+            dados: Objeto serializável em JSON
+            max_age: Segundos de cache permitidos ao cliente
+        """
+        # Mesmo formato de saída do JSONResponse do FastAPI
+        corpo = json.dumps(dados, ensure_ascii=False, allow_nan=False,
+                           separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(corpo).hexdigest()[:32]
+
+        self.cache_control = f'public, max-age={max_age}'
+        self.variantes: Dict[str, Tuple[bytes, str]] = {
+            'identity': (corpo, f'"{digest}"')
+        }
+
+        if len(corpo) >= TAMANHO_MINIMO_COMPRESSAO:
+            # mtime fixo para que o gzip seja reprodutível entre processos
+            self.variantes['gzip'] = (gzip.compress(corpo, compresslevel=9, mtime=0),
+                                      f'"{digest}-gzip"')
+            if brotli is not None:
+                self.variantes['br'] = (brotli.compress(corpo, quality=11),
+                                        f'"{digest}-br"')
+
+    def escolher_codificacao(self, accept_encoding: Optional[str]) -> str:
+        """
+        Escolhe a variante conforme o cabeçalho Accept-Encoding (com valores q)
+        """
+        if not accept_encoding:
+            return 'identity'
+
+        pesos: Dict[str, float] = {}
+        for parte in accept_encoding.split(','):
+            campos = [c.strip() for c in parte.split(';')]
+            nome = campos[0].lower()
+            q = 1.0
+            for parametro in campos[1:]:
+                if parametro.startswith('q='):
+                    try:
+                        q = float(parametro[2:])
+                    except ValueError:
+                        q = 0.0
+            if nome:
+                pesos[nome] = q
+
+        candidatas: List[Tuple[float, int, str]] = []
+        for ordem, codificacao in enumerate(PREFERENCIA_CODIFICACAO):
+            if codificacao not in self.variantes:
+                continue
+            q = pesos.get(codificacao, pesos.get('*', 1.0 if codificacao == 'identity' else 0.0))
+            if q > 0:
+                candidatas.append((-q, ordem, codificacao))
+
+        return min(candidatas)[2] if candidatas else 'identity'
+
+    def responder(self, request: Request) -> Response:
+        """
+        Monta a resposta para a requisição, ou 304 se o ETag bater
+        """
+        codificacao = self.escolher_codificacao(request.headers.get('accept-encoding'))
+        corpo, etag = self.variantes[codificacao]
+
+        cabecalhos = {
+            'ETag': etag,
+            'Cache-Control': self.cache_control,
+            'Vary': 'Accept-Encoding'
+        }
+
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match:
+            # If-None-Match usa comparação fraca: ignorar o prefixo W/
+            etags = {e.strip().removeprefix('W/') for e in if_none_match.split(',')}
+            if '*' in etags or etag in etags:
+                return Response(status_code=304, headers=cabecalhos)
+
+        if codificacao != 'identity':
+            cabecalhos['Content-Encoding'] = codificacao
+
+        return Response(content=corpo, media_type='application/json', headers=cabecalhos)
@@ -0,0 +1,525 @@
+"""
+Roteamento hierárquico campus -> sala
+Combina o grafo de prédios (GrafoPredios, coordenadas lat/lon) com os
+grafos internos (pixels do SVG): rota interna até a melhor saída, trecho
+externo pelo grafo de prédios e rota interna até a sala de destino.
+
+A busca externa nunca expande nós internos: para cada prédio com grafo
+interno as distâncias saída -> saída são pré-calculadas em uma tabela.
+"""
+
+import heapq
+import json
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import rastreamento
+from rastreamento import AVISO, INFO
+from grafo_compilado import GrafoCompilado
+from grafo_predios import GrafoPredios
+from pathfinding_interno import (_a_star, _resolver_no, calcular_distancias_dijkstra,
+                                 reconstruir_caminho)
+from registro_grafos import RegistroGrafos, registro_grafos
+
+# Escala dos SVGs (mesma usada em api.calcular_distancia_caminho)
+METROS_POR_PIXEL = 0.1
+
+# Nó do grafo externo: (prédio, índice da saída no grafo interno)
+# Prédios sem grafo interno têm um único nó, no centroide, com índice -1
+NoExterno = Tuple[str, int]
+
+class TabelaSaidas:
+    """
+    Saídas de um prédio e custos (metros) entre todos os pares delas
+    """
+
+    def __init__(self, predio_id: str, grafo: GrafoCompilado, geo_saidas: Dict[str, Tuple[float, float]],
+                 centroide: Tuple[float, float]):
+        self.predio_id = predio_id
+        self.grafo = grafo
+        self.saidas = [i for i, tipo in enumerate(grafo.tipos) if tipo == 'saida']
+
+        # Posição geográfica de cada saída; sem georreferência, o centroide
+        self.geo = {
+            s: tuple(geo_saidas.get(grafo.ids[s], centroide))
+            for s in self.saidas
+        }
+
+        alvos = set(self.saidas)
+        self.custos: Dict[int, Dict[int, float]] = {}
+        for s in self.saidas:
+            distancias, _ = calcular_distancias_dijkstra(grafo, [s], alvos=alvos)
+            self.custos[s] = {
+                t: distancias[t] * METROS_POR_PIXEL
+                for t in self.saidas if t != s and t in distancias
+            }
+
+class RoteadorCampus:
+    """
+    Roteador em dois níveis sobre GrafoPredios e os grafos internos
+    """
+
+    def __init__(self, grafo_predios: GrafoPredios, registro: RegistroGrafos = registro_grafos,
+                 caminho_georreferencia: Optional[str] = None):
+        """
+        Args:
+            grafo_predios: Grafo de prédios já conectado
+            registro: Registro de onde vêm os grafos internos (prédio inteiro)
+            caminho_georreferencia: JSON opcional {predio: {saida_id: [lon, lat]}}
+        """
+        self.grafo_predios = grafo_predios
+        self.registro = registro
+        self.caminho_georreferencia = Path(caminho_georreferencia) if caminho_georreferencia \
+            else Path(__file__).parent / 'dados' / 'georreferencia_saidas.json'
+
+        self.tabelas: Dict[str, TabelaSaidas] = {}
+        self.adjacencia: Dict[NoExterno, List[Tuple[NoExterno, float]]] = {}
+
+        self.construir()
+
+    def _carregar_georreferencia(self) -> Dict[str, Dict[str, Tuple[float, float]]]:
+        if not self.caminho_georreferencia.exists():
+            return {}
+
+        with open(self.caminho_georreferencia, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+
+        return {predio.lower(): saidas for predio, saidas in dados.items()}
+
+    def construir(self):
+        """
+        Pré-calcula as tabelas de saídas e monta o grafo externo
+
+        Deve ser chamado de novo se o grafo de prédios ou algum grafo
+        interno mudar.
+        """
+        georreferencia = self._carregar_georreferencia()
+        self.tabelas = {}
+
+        for pid, info in self.grafo_predios.predios.items():
+            if not self.registro.caminho_grafo(info['ref'], None).exists():
+                continue
+
+            grafo = self.registro.obter(info['ref'], None)
+            if grafo is None:
+                continue
+
+            tabela = TabelaSaidas(pid, grafo, georreferencia.get(pid, {}), info['centroide'])
+            if tabela.saidas:
+                self.tabelas[pid] = tabela
+
+        # Nós externos: saídas dos prédios com grafo interno, centroide dos demais
+        nos_por_predio: Dict[str, List[NoExterno]] = {
+            pid: [(pid, s) for s in self.tabelas[pid].saidas] if pid in self.tabelas else [(pid, -1)]
+            for pid in self.grafo_predios.predios
+        }
+
+        self.adjacencia = {no: [] for nos in nos_por_predio.values() for no in nos}
+
+        # Arestas internas: tabela saída -> saída
+        for pid, tabela in self.tabelas.items():
+            for s, custos in tabela.custos.items():
+                for t, custo in custos.items():
+                    self.adjacencia[(pid, s)].append(((pid, t), custo))
+
+        # Arestas externas: toda saída de um prédio com toda saída de cada vizinho
+        for pid, vizinhos in self.grafo_predios.vizinhos.items():
+            for vid in vizinhos:
+                for no in nos_por_predio[pid]:
+                    for no_viz in nos_por_predio[vid]:
+                        custo = self.grafo_predios._distancia_haversine(self.geo(no), self.geo(no_viz))
+                        self.adjacencia[no].append((no_viz, custo))
+
+        num_arestas = sum(len(a) for a in self.adjacencia.values())
+        print(f"🧭 Roteador do campus: {len(self.tabelas)} prédios com grafo interno, "
+              f"{len(self.adjacencia)} nós externos, {num_arestas} arestas")
+
+    def geo(self, no: NoExterno) -> Tuple[float, float]:
+        """
+        Coordenada (lon, lat) de um nó externo
+        """
+        pid, saida = no
+        if saida < 0:
+            return self.grafo_predios.predios[pid]['centroide']
+        return self.tabelas[pid].geo[saida]
+
+    def _pontas(self, pid: str, local: Optional[str]) -> Optional[Dict[NoExterno, Tuple[float, List[int]]]]:
+        """
+        Custo (metros) e caminho interno entre o local e cada nó externo do prédio
+
+        Returns:
+            {nó externo: (custo, caminho interno do local até a saída)}
+            ou None se o local não existir no prédio (ou se o prédio não
+            tiver grafo interno para resolvê-lo)
+        """
+        tabela = self.tabelas.get(pid)
+
+        if tabela is None:
+            return {(pid, -1): (0.0, [])} if local is None else None
+
+        if local is None:
+            return {(pid, s): (0.0, []) for s in tabela.saidas}
+
+        indices = _resolver_no(tabela.grafo, local)
+        if not indices:
+            return None
+
+        distancias, anteriores = calcular_distancias_dijkstra(tabela.grafo, indices,
+                                                              alvos=set(tabela.saidas))
+        return {
+            (pid, s): (distancias[s] * METROS_POR_PIXEL, reconstruir_caminho(anteriores, s))
+            for s in tabela.saidas if s in distancias
+        }
+
+    def _trecho_interno(self, pid: str, caminho: List[int]) -> Dict:
+        grafo = self.tabelas[pid].grafo
+        distancia = sum(
+            next(peso for v, peso in grafo._adjacencia[a] if v == b)
+            for a, b in zip(caminho, caminho[1:])
+        )
+
+        return {
+            'tipo': 'interno',
+            'predio': self.grafo_predios.predios[pid]['ref'],
+            'caminho': [grafo.ids[i] for i in caminho],
+            'nos_detalhados': [grafo.no_detalhado(i) for i in caminho],
+            'distancia_metros': round(distancia * METROS_POR_PIXEL, 1)
+        }
+
+    def _rota_direta(self, pid: str, origem_local: str, destino_local: str) -> Optional[Tuple[float, List[int]]]:
+        """
+        Rota sem sair do prédio, quando origem e destino estão nele
+        """
+        grafo = self.tabelas[pid].grafo
+        origens = _resolver_no(grafo, origem_local)
+        destinos = _resolver_no(grafo, destino_local)
+
+        if not origens or not destinos:
+            return None
+
+        caminho, distancia, _ = _a_star(grafo, origens, destinos)
+        if caminho is None:
+            return None
+
+        return distancia * METROS_POR_PIXEL, caminho
+
+    def _dijkstra_externo(self, origens: Dict[NoExterno, Tuple[float, List[int]]]
+                          ) -> Tuple[Dict[NoExterno, float], Dict[NoExterno, NoExterno]]:
+        """
+        Dijkstra no grafo externo partindo de todas as saídas da origem
+
+        O grafo externo tem só saídas e centroides, então a busca é feita
+        até o fim e serve para qualquer número de destinos.
+        """
+        distancias = {no: custo for no, (custo, _) in origens.items()}
+        anteriores: Dict[NoExterno, NoExterno] = {}
+        fechados: Dict[NoExterno, float] = {}
+        fila = [(custo, no) for no, custo in distancias.items()]
+        heapq.heapify(fila)
+
+        while fila:
+            custo, no = heapq.heappop(fila)
+
+            if no in fechados:
+                continue
+            fechados[no] = custo
+
+            for vizinho, peso in self.adjacencia[no]:
+                novo = custo + peso
+                if novo < distancias.get(vizinho, math.inf):
+                    distancias[vizinho] = novo
+                    anteriores[vizinho] = no
+                    heapq.heappush(fila, (novo, vizinho))
+
+        return fechados, anteriores
+
+    def rotear(self, origem_predio: str, destino_predio: str,
+               origem_local: Optional[str] = None,
+               destino_local: Optional[str] = None) -> Optional[Dict]:
+        """
+        Calcula a rota de um local (ou prédio) até outro local do campus
+
+        Args:
+            origem_predio: Referência do prédio de origem (ex: "A")
+            destino_predio: Referência do prédio de destino
+            origem_local: Nó ou sala no grafo interno da origem (ex: "A1:Room_1014")
+            destino_local: Nó ou sala no grafo interno do destino
+
+        Returns:
+            Dicionário com a distância total e os trechos internos/externos,
+            ou None se não houver rota
+        """
+        return self.rotear_varios(origem_predio, origem_local,
+                                  [(destino_predio, destino_local)])[0]
+
+    def rotear_varios(self, origem_predio: str, origem_local: Optional[str],
+                      destinos: Sequence[Tuple[str, Optional[str]]],
+                      detalhar: bool = True) -> List[Optional[Dict]]:
+        """
+        Rotas de uma origem para vários destinos com uma única busca externa
+
+        Args:
+            origem_predio: Referência do prédio de origem
+            origem_local: Nó ou sala de origem, ou None
+            destinos: Lista de (prédio, local ou None)
+            detalhar: Se False, devolve apenas as distâncias, sem os trechos
+
+        Returns:
+            Uma rota (ou None) para cada destino, na mesma ordem
+        """
+        predios = self.grafo_predios.predios
+        oid = self.grafo_predios._normalizar_id_predio(origem_predio)
+        origens = self._pontas(oid, origem_local) if oid else None
+
+        if not origens:
+            if rastreamento.ativo(AVISO):
+                rastreamento.registrar(AVISO, f"   ❌ Origem não encontrada: {origem_predio} {origem_local or ''}")
+            return [None] * len(destinos)
+
+        distancias, anteriores = self._dijkstra_externo(origens)
+
+        # O mesmo destino pode aparecer várias vezes no lote
+        pontas_destino: Dict[Tuple[str, Optional[str]], Optional[Dict]] = {}
+        resultados = []
+
+        for destino_predio, destino_local in destinos:
+            did = self.grafo_predios._normalizar_id_predio(destino_predio)
+
+            if not did:
+                if rastreamento.ativo(AVISO):
+                    rastreamento.registrar(AVISO, f"   ❌ Prédio não encontrado: {destino_predio}")
+                resultados.append(None)
+                continue
+
+            chave = (did, destino_local)
+            if chave not in pontas_destino:
+                pontas_destino[chave] = self._pontas(did, destino_local)
+            pontas = pontas_destino[chave]
+
+            if not pontas:
+                if rastreamento.ativo(AVISO):
+                    rastreamento.registrar(AVISO, f"   ❌ Local não encontrado: {destino_local}")
+                resultados.append(None)
+                continue
+
+            melhor, melhor_no = math.inf, None
+            for no, (custo, _) in pontas.items():
+                if no in distancias and distancias[no] + custo < melhor:
+                    melhor, melhor_no = distancias[no] + custo, no
+
+            # Origem e destino no mesmo prédio: talvez nem seja preciso sair
+            direta = None
+            if oid == did and oid in self.tabelas and origem_local and destino_local:
+                direta = self._rota_direta(oid, origem_local, destino_local)
+
+            if direta is not None and direta[0] <= melhor:
+                melhor = direta[0]
+            elif melhor_no is None:
+                if rastreamento.ativo(AVISO):
+                    rastreamento.registrar(AVISO, f"   ❌ Nenhuma rota encontrada entre "
+                                                  f"{origem_predio} e {destino_predio}")
+                resultados.append(None)
+                continue
+            else:
+                direta = None
+
+            rota = {
+                'origem': {'predio': predios[oid]['ref'], 'local': origem_local},
+                'destino': {'predio': predios[did]['ref'], 'local': destino_local},
+                'distancia_metros': round(melhor, 1)
+            }
+
+            if detalhar:
+                if direta is not None:
+                    rota['trechos'] = [self._trecho_interno(oid, direta[1])]
+                else:
+                    caminho = [melhor_no]
+                    while caminho[-1] in anteriores:
+                        caminho.append(anteriores[caminho[-1]])
+                    caminho.reverse()
+                    rota['trechos'] = self._montar_trechos(caminho, origens, pontas)
+
+            resultados.append(rota)
+
+        if rastreamento.ativo(INFO):
+            rastreamento.registrar(INFO, f"   ✅ {sum(r is not None for r in resultados)}/"
+                                         f"{len(destinos)} rotas a partir de {predios[oid]['ref']}")
+
+        return resultados
+
+    def rotear_lote(self, pares: Sequence[Tuple[str, Optional[str], str, Optional[str]]],
+                    detalhar: bool = False) -> List[Optional[Dict]]:
+        """
+        Calcula um lote de rotas com uma busca por origem distinta
+
+        As buscas rodam em sequência: são Python puro e não ganham nada
+        com threads (GIL), e a requisição já ocupa uma thread do servidor.
+
+        Args:
+            pares: Lista de (prédio origem, local origem, prédio destino, local destino)
+            detalhar: Incluir os trechos de cada rota
+
+        Returns:
+            Uma rota (ou None) para cada par, na ordem recebida
+        """
+        # Agrupar os destinos por origem, guardando a posição de cada par
+        grupos: Dict[Tuple[str, Optional[str]], List[int]] = {}
+        for posicao, (origem_predio, origem_local, _, _) in enumerate(pares):
+            oid = self.grafo_predios._normalizar_id_predio(origem_predio) or origem_predio
+            grupos.setdefault((oid, origem_local), []).append(posicao)
+
+        resultados: List[Optional[Dict]] = [None] * len(pares)
+        for (oid, origem_local), posicoes in grupos.items():
+            destinos = [(pares[p][2], pares[p][3]) for p in posicoes]
+            rotas = self.rotear_varios(oid, origem_local, destinos, detalhar)
+            for posicao, rota in zip(posicoes, rotas):
+                resultados[posicao] = rota
+
+        return resultados
+
+    def alcancaveis(self, predio: str, local: Optional[str], limite_metros: float) -> Optional[Dict]:
+        """
+        Prédios, saídas e salas a até limite_metros de caminhada
+
+        Uma única busca de Dijkstra limitada sobre o espaço misto: nós
+        internos dos prédios com grafo interno e centroides dos demais,
+        ligados pelas arestas externas do roteador.
+
+        Args:
+            predio: Referência do prédio de partida
+            local: Nó ou sala de partida, ou None (qualquer saída do prédio)
+            limite_metros: Distância máxima
+
+        Returns:
+            {'predios', 'saidas', 'salas'}, cada um com a distância mínima,
+            ou None se a origem não existir
+        """
+        pid = self.grafo_predios._normalizar_id_predio(predio)
+        if not pid:
+            return None
+
+        tabela = self.tabelas.get(pid)
+        if local is None:
+            inicio = list(self._pontas(pid, None))
+        elif tabela is not None:
+            inicio = [(pid, i) for i in _resolver_no(tabela.grafo, local)]
+        else:
+            # Sem grafo interno o local não pode ser resolvido
+            return None
+
+        if not inicio:
+            return None
+
+        distancias = {estado: 0.0 for estado in inicio}
+        fechados: Dict[NoExterno, float] = {}
+        fila = [(0.0, estado) for estado in inicio]
+        heapq.heapify(fila)
+
+        while fila:
+            custo, estado = heapq.heappop(fila)
+
+            if estado in fechados:
+                continue
+            if custo > limite_metros:
+                break
+            fechados[estado] = custo
+
+            pid_atual, no = estado
+            tabela = self.tabelas.get(pid_atual)
+
+            if tabela is not None:
+                vizinhos = [((pid_atual, v), peso * METROS_POR_PIXEL)
+                            for v, peso in tabela.grafo._adjacencia[no]]
+                # Saídas levam aos prédios vizinhos (as arestas saída -> saída
+                # do mesmo prédio já estão cobertas pelo grafo interno)
+                for vizinho, peso in self.adjacencia.get(estado, ()):
+                    if vizinho[0] != pid_atual:
+                        vizinhos.append((vizinho, peso))
+            else:
+                vizinhos = self.adjacencia[estado]
+
+            for vizinho, peso in vizinhos:
+                novo = custo + peso
+                if novo < distancias.get(vizinho, math.inf):
+                    distancias[vizinho] = novo
+                    heapq.heappush(fila, (novo, vizinho))
+
+        predios_alcancados: Dict[str, float] = {}
+        saidas = []
+        salas: Dict[Tuple[str, str], Tuple[float, str]] = {}
+
+        for (pid_no, no), custo in fechados.items():
+            if custo < predios_alcancados.get(pid_no, math.inf):
+                predios_alcancados[pid_no] = custo
+
+            if no < 0:
+                continue
+
+            grafo = self.tabelas[pid_no].grafo
+            tipo = grafo.tipos[no]
+
+            if tipo == 'saida':
+                saidas.append({
+                    'predio': self.grafo_predios.predios[pid_no]['ref'],
+                    'id': grafo.ids[no],
+                    'distancia_metros': round(custo, 1)
+                })
+            elif tipo in ('porta', 'sala_centro') and grafo.salas[no]:
+                chave = (pid_no, grafo.salas[no])
+                if custo < salas.get(chave, (math.inf, ''))[0]:
+                    salas[chave] = (custo, grafo.ids[no])
+
+        predios = self.grafo_predios.predios
+
+        return {
+            'predios': sorted(
+                ({'predio': predios[p]['ref'], 'nome': predios[p]['nome'],
+                  'distancia_metros': round(c, 1)} for p, c in predios_alcancados.items()),
+                key=lambda x: x['distancia_metros']),
+            'saidas': sorted(saidas, key=lambda x: x['distancia_metros']),
+            'salas': sorted(
+                ({'predio': predios[p]['ref'], 'sala': sala, 'id': no_id,
+                  'distancia_metros': round(c, 1)} for (p, sala), (c, no_id) in salas.items()),
+                key=lambda x: x['distancia_metros'])
+        }
+
+    def _montar_trechos(self, caminho: List[NoExterno], origens: Dict, destinos: Dict) -> List[Dict]:
+        """
+        Converte a sequência de nós externos em trechos internos e externos
+        """
+        trechos = []
+        predios = self.grafo_predios.predios
+
+        inicial = origens[caminho[0]][1]
+        if len(inicial) > 1:
+            trechos.append(self._trecho_interno(caminho[0][0], inicial))
+
+        externo = None
+        for a, b in zip(caminho, caminho[1:]):
+            if a[0] == b[0]:
+                # Atravessando um prédio de uma saída para outra
+                externo = None
+                grafo = self.tabelas[a[0]].grafo
+                percurso, _, _ = _a_star(grafo, [a[1]], [b[1]])
+                trechos.append(self._trecho_interno(a[0], percurso))
+                continue
+
+            if externo is None:
+                externo = {
+                    'tipo': 'externo',
+                    'predios': [predios[a[0]]['ref']],
+                    'coordenadas': [list(self.geo(a))],
+                    'distancia_metros': 0.0
+                }
+                trechos.append(externo)
+
+            externo['predios'].append(predios[b[0]]['ref'])
+            externo['coordenadas'].append(list(self.geo(b)))
+            externo['distancia_metros'] = round(
+                externo['distancia_metros'] + self.grafo_predios._distancia_haversine(self.geo(a), self.geo(b)), 1)
+
+        final = destinos[caminho[-1]][1]
+        if len(final) > 1:
+            trechos.append(self._trecho_interno(caminho[-1][0], final[::-1]))
+
+        return trechos
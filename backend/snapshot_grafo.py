@@ -0,0 +1,238 @@
+"""
+Snapshot binário dos grafos
+Formato versionado e compacto gravado ao lado do JSON dos grafos e lido
+com mmap: os arrays NumPy do grafo são visões diretas sobre o arquivo,
+então carregar custa milissegundos e os workers do uvicorn que abrem o
+mesmo arquivo compartilham as páginas no cache do sistema operacional.
+
+Layout (little-endian):
+    0   MAGICO (8 bytes)
+    8   uint32 versão do formato
+    12  uint32 tamanho do cabeçalho
+    16  cabeçalho JSON: tipo, meta e seções {nome: dtype, forma, offset}
+    ... seções alinhadas em ALINHAMENTO bytes, offsets relativos ao
+        início da área de dados (primeiro múltiplo de ALINHAMENTO após
+        o cabeçalho)
+
+Textos (IDs de nós, tipos, salas) ficam em uma tabela de strings
+internadas separadas por NUL; cada coluna é um array int32 de índices na
+tabela, com -1 para None.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+MAGICO = b'CGSNAP\r\n'
+VERSAO_SNAPSHOT = 1
+ALINHAMENTO = 64
+EXTENSAO_SNAPSHOT = '.snap'
+
+_CABECALHO_FIXO = struct.Struct('<8sII')
+
+class SnapshotInvalido(ValueError):
+    """
+    Arquivo que não é um snapshot, de outra versão ou corrompido
+    """
+
+def _alinhar(posicao: int) -> int:
+    return -(-posicao // ALINHAMENTO) * ALINHAMENTO
+
+def caminho_snapshot(caminho_json: Union[str, Path]) -> Path:
+    """
+    Snapshot correspondente a um arquivo de grafo JSON
+    """
+    return Path(caminho_json).with_suffix(EXTENSAO_SNAPSHOT)
+
+def assinatura_fonte(caminho: Union[str, Path]) -> Dict:
+    """
+    Tamanho, mtime e hash do arquivo de origem de um snapshot
+    """
+    caminho = Path(caminho)
+    stat = caminho.stat()
+    return {
+        'arquivo': caminho.name,
+        'tamanho': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': hashlib.sha256(caminho.read_bytes()).hexdigest()
+    }
+
+def codificar_strings(colunas: Dict[str, Sequence[Optional[str]]]) -> Dict[str, np.ndarray]:
+    """
+    Colunas de texto -> seção 'strings' (tabela) + uma seção int32 por coluna
+    """
+    tabela: Dict[str, int] = {}
+    secoes = {}
+
+    for nome, valores in colunas.items():
+        indices = np.empty(len(valores), dtype=np.int32)
+        for i, valor in enumerate(valores):
+            if valor is None:
+                indices[i] = -1
+            else:
+                if '\0' in valor:
+                    raise ValueError(f"Texto com NUL não pode ser gravado: {valor!r}")
+                indices[i] = tabela.setdefault(valor, len(tabela))
+        secoes[nome] = indices
+
+    blob = '\0'.join(tabela).encode('utf-8')
+    secoes['strings'] = np.frombuffer(blob, dtype=np.uint8)
+    return secoes
+
+def escrever_snapshot(caminho: Union[str, Path], tipo: str,
+                      secoes: Dict[str, np.ndarray], meta: Optional[Dict] = None) -> Path:
+    """
+    Grava o snapshot de forma atômica (arquivo temporário + rename)
+
+    Args:
+        caminho: Arquivo de saída
+        tipo: Tipo do conteúdo (ex: 'grafo_compilado'), conferido na leitura
+        secoes: Arrays gravados como estão (dtype e forma preservados)
+        meta: Dados pequenos em JSON (andar, origem do grafo, ...)
+    """
+    caminho = Path(caminho)
+    descricao = {}
+    posicao = 0
+
+    arrays = {}
+    for nome, array in secoes.items():
+        array = np.ascontiguousarray(array)
+        # Ordem de bytes explícita para o arquivo ser portável
+        array = array.astype(array.dtype.newbyteorder('<'), copy=False)
+        posicao = _alinhar(posicao)
+        descricao[nome] = {
+            'dtype': array.dtype.str,
+            'forma': list(array.shape),
+            'offset': posicao
+        }
+        arrays[nome] = array
+        posicao += array.nbytes
+
+    cabecalho = json.dumps({
+        'tipo': tipo,
+        'meta': meta or {},
+        'secoes': descricao
+    }, ensure_ascii=False).encode('utf-8')
+    inicio_dados = _alinhar(_CABECALHO_FIXO.size + len(cabecalho))
+
+    temporario = caminho.with_name(f'.{caminho.name}.{os.getpid()}.tmp')
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        with open(temporario, 'wb') as f:
+            f.write(_CABECALHO_FIXO.pack(MAGICO, VERSAO_SNAPSHOT, len(cabecalho)))
+            f.write(cabecalho)
+            for nome, array in arrays.items():
+                f.seek(inicio_dados + descricao[nome]['offset'])
+                f.write(array.tobytes())
+            f.truncate(inicio_dados + _alinhar(posicao))
+        os.replace(temporario, caminho)
+    finally:
+        if temporario.exists():
+            temporario.unlink()
+
+    return caminho
+
+class Snapshot:
+    """
+    Snapshot aberto com mmap; arrays() devolve visões somente leitura
+    """
+
+    def __init__(self, caminho: Union[str, Path]):
+        self.caminho = Path(caminho)
+
+        with open(self.caminho, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise SnapshotInvalido(f"Snapshot vazio: {self.caminho}")
+
+        if len(self._mmap) < _CABECALHO_FIXO.size:
+            raise SnapshotInvalido(f"Snapshot truncado: {self.caminho}")
+
+        magico, versao, tamanho_cabecalho = _CABECALHO_FIXO.unpack_from(self._mmap, 0)
+        if magico != MAGICO:
+            raise SnapshotInvalido(f"Não é um snapshot de grafo: {self.caminho}")
+        if versao != VERSAO_SNAPSHOT:
+            raise SnapshotInvalido(f"Versão {versao} do snapshot não suportada "
+                                   f"(esperada {VERSAO_SNAPSHOT}): {self.caminho}")
+
+        fim_cabecalho = _CABECALHO_FIXO.size + tamanho_cabecalho
+        try:
+            cabecalho = json.loads(self._mmap[_CABECALHO_FIXO.size:fim_cabecalho])
+        except ValueError as e:
+            raise SnapshotInvalido(f"Cabeçalho inválido em {self.caminho}: {e}")
+
+        self.tipo: str = cabecalho['tipo']
+        self.meta: Dict = cabecalho['meta']
+        self._secoes: Dict[str, Dict] = cabecalho['secoes']
+        self._inicio_dados = _alinhar(fim_cabecalho)
+
+    def __contains__(self, nome: str) -> bool:
+        return nome in self._secoes
+
+    def array(self, nome: str) -> np.ndarray:
+        """
+        Seção como array NumPy apontando para as páginas do arquivo
+        """
+        secao = self._secoes[nome]
+        dtype = np.dtype(secao['dtype'])
+        forma = tuple(secao['forma'])
+        quantidade = int(np.prod(forma, dtype=np.int64))
+        offset = self._inicio_dados + secao['offset']
+
+        if offset + quantidade * dtype.itemsize > len(self._mmap):
+            raise SnapshotInvalido(f"Seção {nome} fora do arquivo: {self.caminho}")
+
+        return np.frombuffer(self._mmap, dtype=dtype, count=quantidade, offset=offset).reshape(forma)
+
+    def strings(self, *colunas: str) -> List[List[Optional[str]]]:
+        """
+        Decodifica colunas gravadas com codificar_strings
+        """
+        blob = self.array('strings').tobytes()
+        tabela = [s.decode('utf-8') for s in blob.split(b'\0')] if blob else []
+        tabela.append(None)  # índice -1
+
+        return [[tabela[i] for i in self.array(coluna).tolist()] for coluna in colunas]
+
+def ler_snapshot(caminho: Union[str, Path], tipo: str) -> Snapshot:
+    """
+    Abre um snapshot conferindo o tipo do conteúdo
+
+    Raises:
+        SnapshotInvalido: formato, versão ou tipo incompatível
+    """
+    snapshot = Snapshot(caminho)
+    if snapshot.tipo != tipo:
+        raise SnapshotInvalido(f"Snapshot de tipo {snapshot.tipo}, esperado {tipo}: {caminho}")
+    return snapshot
+
+def fonte_confere(snapshot: Snapshot, caminho_fonte: Union[str, Path]) -> bool:
+    """
+    Se o snapshot foi gerado a partir da versão atual do arquivo de origem
+
+    Tamanho e mtime iguais bastam; se diferirem (ex: checkout do git),
+    o hash do conteúdo decide. Sem arquivo de origem, o snapshot vale.
+    """
+    fonte = snapshot.meta.get('fonte')
+    caminho_fonte = Path(caminho_fonte)
+
+    if not caminho_fonte.exists():
+        return True
+    if not fonte:
+        return False
+
+    stat = caminho_fonte.stat()
+    if stat.st_size == fonte['tamanho'] and stat.st_mtime_ns == fonte['mtime_ns']:
+        return True
+    if stat.st_size != fonte['tamanho']:
+        return False
+
+    return hashlib.sha256(caminho_fonte.read_bytes()).hexdigest() == fonte['sha256']
@@ -0,0 +1,388 @@
+"""
+Teste de carga de ponta a ponta da API
+Dispara uma mistura de requisições (GeoJSON, rota entre prédios, busca e
+chat) contra o api.app no próprio processo (httpx + ASGITransport, sem
+rede) ou contra um servidor em --url, e mede vazão e latência
+p50/p95/p99 por endpoint. O resultado é gravado em JSON para comparar
+execuções ao longo do tempo.
+
+Chegadas seguem um processo de Poisson com --taxa requisições/s (carga
+aberta); no máximo --concorrencia ficam em andamento e as demais esperam
+na fila do cliente. A latência é medida desde a chegada programada, então
+inclui essa espera (sem omissão coordenada); o tempo de serviço, desde o
+envio, é reportado à parte. Com --taxa 0 a carga é fechada: --concorrencia
+clientes enviando sem pausa.
+
+No modo em processo o chat usa o modelo stub (CHATBOT_MODELO=stub) com
+--atraso-stub segundos por resposta, ou o modelo local configurado por
+--modelo-config (distribuição de latência, erros e travamentos; ver
+modelos_llm.py), cujas contagens de desfechos entram no resultado. Contra
+--url, inicie o servidor com essas variáveis para rodar sem acesso à rede.
+
+Uso:
+    python teste_carga.py --duracao 20 --taxa 100 --concorrencia 32
+    python teste_carga.py --mix geojson=1,rota_predios=5,buscar=3,chat=1
+    python teste_carga.py --mix chat=1 --modelo-config dados/modelo_local_exemplo.json
+    python teste_carga.py --url http://localhost:8000 --comparar anterior.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+MIX_PADRAO = {'geojson': 1.0, 'rota_predios': 4.0, 'buscar': 4.0, 'chat': 1.0}
+
+TERMOS_BUSCA = [
+    'library', 'cafeteria', 'student centre', 'gym', 'parking', 'computer lab',
+    'room 1014', 'sala 2001', 'buiding a', 'libary', 'health', 'A2', 'theatre'
+]
+
+MENSAGENS_CHAT = [
+    "how do I get from {a} to {b}?",
+    "I'm at building {a}, where is building {b}",
+    "take me to {b}",
+    "como chego no prédio {b} saindo do {a}?",
+    "route from {a} to {b} please",
+    # Sem prédio: o motor de intenções encaminha ao modelo
+    "where can I find the library?",
+    "preciso de um lugar para estudar perto do meu próximo horário"
+]
+
+class GeradorRequisicoes:
+    """
+    Sorteia requisições de cada tipo com dados do campus
+    """
+
+    def __init__(self, predios: List[str], semente: int):
+        self.predios = predios or ['A', 'M']
+        self.rnd = random.Random(semente)
+
+    def _par_predios(self) -> Tuple[str, str]:
+        if len(self.predios) < 2:
+            return self.predios[0], self.predios[0]
+        a, b = self.rnd.sample(self.predios, 2)
+        return a, b
+
+    def gerar(self, tipo: str) -> Dict:
+        """
+        Argumentos de httpx.AsyncClient.request para o tipo
+        """
+        if tipo == 'geojson':
+            codificacao = self.rnd.choice(['gzip, deflate, br', 'gzip', 'identity'])
+            return {'method': 'GET', 'url': '/api/geojson',
+                    'headers': {'Accept-Encoding': codificacao}}
+
+        if tipo == 'rota_predios':
+            a, b = self._par_predios()
+            return {'method': 'POST', 'url': '/api/rota-predios',
+                    'json': {'origem': a, 'destino': b}}
+
+        if tipo == 'buscar':
+            return {'method': 'POST', 'url': '/api/buscar',
+                    'json': {'termo': self.rnd.choice(TERMOS_BUSCA), 'limite': 10}}
+
+        if tipo == 'chat':
+            a, b = self._par_predios()
+            mensagem = self.rnd.choice(MENSAGENS_CHAT).format(a=a, b=b)
+            return {'method': 'POST', 'url': '/api/chat', 'json': {'mensagem': mensagem}}
+
+        raise ValueError(f"Tipo de requisição desconhecido: {tipo}")
+
+def percentil(valores_ordenados: List[float], p: float) -> float:
+    """
+    Percentil pelo posto mais próximo (valores já ordenados)
+    """
+    if not valores_ordenados:
+        return 0.0
+    posto = max(1, min(len(valores_ordenados), math.ceil(p / 100 * len(valores_ordenados))))
+    return valores_ordenados[posto - 1]
+
+def _resumo_latencias(segundos: List[float]) -> Dict:
+    ordenados = sorted(segundos)
+    if not ordenados:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'media': 0.0, 'max': 0.0}
+    return {
+        'p50': round(percentil(ordenados, 50) * 1000, 3),
+        'p95': round(percentil(ordenados, 95) * 1000, 3),
+        'p99': round(percentil(ordenados, 99) * 1000, 3),
+        'media': round(sum(ordenados) / len(ordenados) * 1000, 3),
+        'max': round(ordenados[-1] * 1000, 3)
+    }
+
+def resumir(amostras: Dict[str, List[Tuple[float, float, str]]], duracao: float) -> Dict:
+    """
+    Vazão e latências (ms) por endpoint e no total
+    """
+    def resumo(lista):
+        status: Dict[str, int] = {}
+        for _, _, s in lista:
+            status[s] = status.get(s, 0) + 1
+        erros = sum(n for s, n in status.items() if not s.startswith('2'))
+        return {
+            'requisicoes': len(lista),
+            'erros': erros,
+            'status': dict(sorted(status.items())),
+            'vazao_rps': round(len(lista) / duracao, 2) if duracao > 0 else 0.0,
+            'latencia_ms': _resumo_latencias([total for total, _, _ in lista]),
+            'servico_ms': _resumo_latencias([servico for _, servico, _ in lista])
+        }
+
+    todas = [a for lista in amostras.values() for a in lista]
+    return {
+        'total': resumo(todas),
+        'endpoints': {tipo: resumo(lista) for tipo, lista in sorted(amostras.items())}
+    }
+
+async def executar_carga(cliente: httpx.AsyncClient, gerador: GeradorRequisicoes,
+                         mix: Dict[str, float], duracao: float, taxa: float,
+                         concorrencia: int) -> Dict:
+    """
+    Executa a carga por duracao segundos e devolve o resumo
+    """
+    loop = asyncio.get_running_loop()
+    tipos = list(mix)
+    pesos = [mix[t] for t in tipos]
+    semaforo = asyncio.Semaphore(concorrencia)
+    amostras: Dict[str, List[Tuple[float, float, str]]] = {t: [] for t in tipos}
+
+    async def enviar(tipo: str, chegada: float):
+        requisicao = gerador.gerar(tipo)
+        async with semaforo:
+            envio = loop.time()
+            try:
+                resposta = await cliente.request(**requisicao)
+                status = str(resposta.status_code)
+            except Exception as e:
+                status = f'erro:{type(e).__name__}'
+            fim = loop.time()
+        amostras[tipo].append((fim - chegada, fim - envio, status))
+
+    inicio = loop.time()
+    limite = inicio + duracao
+
+    if taxa > 0:
+        # Carga aberta: chegadas de Poisson, independentes das respostas
+        pendentes = set()
+        chegada = inicio
+        while True:
+            chegada += gerador.rnd.expovariate(taxa)
+            if chegada >= limite:
+                break
+            espera = chegada - loop.time()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            tipo = gerador.rnd.choices(tipos, pesos)[0]
+            tarefa = asyncio.ensure_future(enviar(tipo, chegada))
+            pendentes.add(tarefa)
+            tarefa.add_done_callback(pendentes.discard)
+        if pendentes:
+            await asyncio.gather(*pendentes)
+    else:
+        # Carga fechada: cada cliente envia a próxima ao receber a resposta
+        async def cliente_fechado():
+            while loop.time() < limite:
+                await enviar(gerador.rnd.choices(tipos, pesos)[0], loop.time())
+
+        await asyncio.gather(*(cliente_fechado() for _ in range(concorrencia)))
+
+    return resumir(amostras, loop.time() - inicio)
+
+async def _aguardar_pronto(cliente: httpx.AsyncClient, timeout: float = 60.0):
+    """
+    Espera /api/pronto responder 200 (grafos e índice construídos)
+    """
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            if (await cliente.get('/api/pronto')).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"API não ficou pronta em {timeout}s")
+
+async def _intencoes(cliente: httpx.AsyncClient) -> Dict:
+    return (await cliente.get('/api/chat/intencoes')).json()
+
+async def _carregar_predios(cliente: httpx.AsyncClient) -> List[str]:
+    resposta = await cliente.get('/api/predios-disponiveis')
+    return [p['ref'] for p in resposta.json().get('predios', [])]
+
+async def rodar(url: Optional[str], mix: Dict[str, float], duracao: float, taxa: float,
+                concorrencia: int, semente: int, aquecimento: float) -> Dict:
+    """
+    Prepara o alvo (em processo ou --url), aquece e executa a carga
+    """
+    limites = httpx.Limits(max_connections=concorrencia, max_keepalive_connections=concorrencia)
+
+    async with contextlib.AsyncExitStack() as pilha:
+        if url:
+            cliente = await pilha.enter_async_context(
+                httpx.AsyncClient(base_url=url, limits=limites, timeout=30.0))
+        else:
+            # Sem rede: o modelo do chat é o stub local. api.py abre dados/
+            # relativo ao diretório atual
+            os.chdir(Path(__file__).parent)
+            with contextlib.redirect_stdout(io.StringIO()):
+                import api
+            await pilha.enter_async_context(api.app.router.lifespan_context(api.app))
+            cliente = await pilha.enter_async_context(httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=api.app), base_url='http://carga',
+                limits=limites, timeout=30.0))
+            # Mensagens de log por requisição distorceriam as latências
+            pilha.enter_context(contextlib.redirect_stdout(io.StringIO()))
+
+        await _aguardar_pronto(cliente)
+        gerador = GeradorRequisicoes(await _carregar_predios(cliente), semente)
+
+        if aquecimento > 0:
+            await executar_carga(cliente, gerador, mix, aquecimento, taxa, concorrencia)
+
+        # Desfechos sorteados pelo modelo local e mensagens resolvidas pelo
+        # motor de intenções durante a medição
+        modelo = None if url else getattr(sys.modules['chatbot'].chatbot, 'model', None)
+        contar = getattr(modelo, 'estatisticas', None)
+        antes = contar() if contar else None
+        intencoes_antes = None if url else await _intencoes(cliente)
+
+        resumo = await executar_carga(cliente, gerador, mix, duracao, taxa, concorrencia)
+
+        if contar:
+            resumo['modelo_chat'] = {k: v - antes[k] for k, v in contar().items()}
+        if intencoes_antes is not None:
+            intencoes = await _intencoes(cliente)
+            mensagens = intencoes['mensagens'] - intencoes_antes['mensagens']
+            locais = intencoes['resolvidas_localmente'] - intencoes_antes['resolvidas_localmente']
+            resumo['intencoes_chat'] = {
+                'mensagens': mensagens,
+                'resolvidas_localmente': locais,
+                'fracao_local': round(locais / mensagens, 4) if mensagens else 0.0
+            }
+        return resumo
+
+def _commit_atual() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=Path(__file__).parent, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _ler_mix(texto: str) -> Dict[str, float]:
+    mix = {}
+    for parte in texto.split(','):
+        tipo, _, peso = parte.partition('=')
+        tipo = tipo.strip()
+        if tipo not in MIX_PADRAO:
+            raise argparse.ArgumentTypeError(f"tipo desconhecido no mix: {tipo} "
+                                             f"(use {', '.join(MIX_PADRAO)})")
+        mix[tipo] = float(peso or 1)
+    return {t: p for t, p in mix.items() if p > 0}
+
+def imprimir_resumo(resultado: Dict, anterior: Optional[Dict] = None):
+    print(f"\n{'Endpoint':<14} {'Req':>7} {'Erros':>6} {'Req/s':>8} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+
+    linhas = list(resultado['endpoints'].items()) + [('TOTAL', resultado['total'])]
+    for nome, r in linhas:
+        lat = r['latencia_ms']
+        linha = (f"{nome:<14} {r['requisicoes']:>7} {r['erros']:>6} {r['vazao_rps']:>8.1f} "
+                 f"{lat['p50']:>9.2f} {lat['p95']:>9.2f} {lat['p99']:>9.2f}")
+
+        if anterior is not None:
+            antes = anterior['total'] if nome == 'TOTAL' else anterior['endpoints'].get(nome)
+            if antes and antes['latencia_ms']['p99'] > 0:
+                delta = lat['p99'] / antes['latencia_ms']['p99'] - 1
+                linha += f"   p99 {delta:+.0%} vs anterior"
+        print(linha)
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Teste de carga da API do Campus Guide")
+    parser.add_argument('--url', help="Servidor alvo (padrão: api.app no próprio processo)")
+    parser.add_argument('--duracao', type=float, default=10.0, help="Segundos de medição")
+    parser.add_argument('--aquecimento', type=float, default=2.0, help="Segundos de carga antes de medir")
+    parser.add_argument('--taxa', type=float, default=50.0,
+                        help="Chegadas por segundo (Poisson); 0 = carga fechada")
+    parser.add_argument('--concorrencia', type=int, default=16, help="Requisições simultâneas no máximo")
+    parser.add_argument('--mix', type=_ler_mix, default=dict(MIX_PADRAO),
+                        help="Pesos por tipo, ex: geojson=1,rota_predios=4,buscar=4,chat=1")
+    parser.add_argument('--atraso-stub', type=float, default=0.2,
+                        help="Latência do modelo stub do chat (s), modo em processo")
+    parser.add_argument('--modelo-config',
+                        help="Configuração JSON do modelo local do chat, modo em processo")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help="Arquivo JSON do resultado (padrão: carga_<data>.json)")
+    parser.add_argument('--comparar', help="Resultado anterior para comparar o p99")
+    args = parser.parse_args(argv)
+
+    # Antes de rodar: o modo em processo muda o diretório atual
+    saida = Path(args.saida or f"carga_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json").resolve()
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            anterior = json.load(f)
+
+    if not args.url:
+        if args.modelo_config:
+            os.environ['CHATBOT_MODELO'] = 'local'
+            os.environ['CHATBOT_LOCAL_CONFIG'] = str(Path(args.modelo_config).resolve())
+        else:
+            os.environ['CHATBOT_MODELO'] = 'stub'
+            os.environ['CHATBOT_STUB_ATRASO'] = str(args.atraso_stub)
+
+    print("="*60)
+    print("🚦 TESTE DE CARGA - Campus Guide API")
+    print("="*60)
+    print(f"   Alvo: {args.url or 'api.app (em processo)'}")
+    print(f"   {args.duracao:.0f}s, taxa {args.taxa or 'fechada'}, concorrência {args.concorrencia}")
+    print(f"   Mix: {args.mix}")
+
+    resumo = asyncio.run(rodar(args.url, args.mix, args.duracao, args.taxa,
+                               args.concorrencia, args.semente, args.aquecimento))
+
+    resultado = {
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _commit_atual(),
+        'python': platform.python_version(),
+        'maquina': platform.node(),
+        'parametros': {
+            'alvo': args.url or 'em_processo',
+            'duracao_s': args.duracao,
+            'taxa_rps': args.taxa,
+            'concorrencia': args.concorrencia,
+            'mix': args.mix,
+            'atraso_stub_s': None if args.url or args.modelo_config else args.atraso_stub,
+            'modelo_config': None if args.url else args.modelo_config,
+            'semente': args.semente
+        },
+        **resumo
+    }
+
+    imprimir_resumo(resultado, anterior)
+    if 'intencoes_chat' in resultado:
+        print(f"\n🧭 Intenções do chat resolvidas localmente: {resultado['intencoes_chat']}")
+    if 'modelo_chat' in resultado:
+        print(f"🧪 Modelo local do chat: {resultado['modelo_chat']}")
+
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultado salvo em: {saida}")
+
+    return resultado
+
+if __name__ == '__main__':
+    sys.exit(0 if main()['total']['erros'] == 0 else 1)